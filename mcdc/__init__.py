@@ -20,6 +20,7 @@ from mcdc.input_ import (
     weight_roulette,
     IC_generator,
     uq,
+    volume_calculation,
     reset,
     domain_decomposition,
     make_particle_bank,
@@ -29,6 +30,7 @@ import mcdc.tally
 from mcdc.main import (
     prepare,
     run,
+    locate_points,
     visualize,
 )
 
@@ -1,3 +1,4 @@
+import ctypes
 import importlib
 import numpy as np
 from numba import njit, jit, objmode, literal_unroll, types
@@ -75,6 +76,30 @@ def cast_voidptr_to_uintp(typingctx, src):
         return sig, codegen
 
 
+def float64_array_at(address, size):
+    return numba.carray(ctypes.c_void_p(int(address)), (size,), np.float64)
+
+
+@numba.extending.overload(float64_array_at)
+def float64_array_at_overload(address, size):
+    def impl(address, size):
+        return numba.carray(cast_uintp_to_voidptr(address), (size,), np.float64)
+
+    return impl
+
+
+def int32_array_at(address, size):
+    return numba.carray(ctypes.c_void_p(int(address)), (size,), np.int32)
+
+
+@numba.extending.overload(int32_array_at)
+def int32_array_at_overload(address, size):
+    def impl(address, size):
+        return numba.carray(cast_uintp_to_voidptr(address), (size,), np.int32)
+
+    return impl
+
+
 def leak(arg):
     pass
 
@@ -95,6 +120,104 @@ def leak_overload(arg):
     return impl
 
 
+# =============================================================================
+# CPU Atomics
+# =============================================================================
+
+# Shared state updated by concurrent numba threads (see setting N_thread),
+# such as the sizes of the shared particle banks and the eigenvalue tallies,
+# goes through these
+
+
+def _atomic_item_pointer(context, builder, signature, args):
+    ary_type, idx_type = signature.args[:2]
+    ary, idx = args[:2]
+    if isinstance(idx_type, types.BaseTuple):
+        indices = numba.core.cgutils.unpack_tuple(builder, idx, len(idx_type))
+        index_types = idx_type.types
+    else:
+        indices = [idx]
+        index_types = [idx_type]
+    indices = [
+        context.cast(builder, index, index_type, types.intp)
+        for index, index_type in zip(indices, index_types)
+    ]
+    array = context.make_array(ary_type)(context, builder, ary)
+    return numba.core.cgutils.get_item_pointer(
+        context, builder, ary_type, array, indices, wraparound=True
+    )
+
+
+@intrinsic
+def atomic_add_inner(typingctx, ary, idx, val):
+    dtype = ary.dtype
+    sig = dtype(ary, idx, val)
+
+    def codegen(context, builder, signature, args):
+        ptr = _atomic_item_pointer(context, builder, signature, args)
+        value = context.cast(builder, args[2], signature.args[2], dtype)
+        op = "fadd" if isinstance(dtype, types.Float) else "add"
+        return builder.atomic_rmw(op, ptr, value, "monotonic")
+
+    return sig, codegen
+
+
+@intrinsic
+def atomic_cas_inner(typingctx, ary, idx, expected, val):
+    dtype = ary.dtype
+    sig = types.boolean(ary, idx, expected, val)
+
+    def codegen(context, builder, signature, args):
+        ptr = _atomic_item_pointer(context, builder, signature, args)
+        expected = context.cast(builder, args[2], signature.args[2], dtype)
+        value = context.cast(builder, args[3], signature.args[3], dtype)
+
+        # Compare-exchange works on integers; floats are swapped by their bits
+        if isinstance(dtype, types.Float):
+            int_type = numba.core.cgutils.ir.IntType(dtype.bitwidth)
+            ptr = builder.bitcast(ptr, int_type.as_pointer())
+            expected = builder.bitcast(expected, int_type)
+            value = builder.bitcast(value, int_type)
+        result = builder.cmpxchg(ptr, expected, value, "monotonic", "monotonic")
+        return builder.extract_value(result, 1)
+
+    return sig, codegen
+
+
+def atomic_add(ary, idx, val):
+    result = ary[idx]
+    ary[idx] += val
+    return result
+
+
+@numba.extending.overload(atomic_add)
+def atomic_add_overload(ary, idx, val):
+    def impl(ary, idx, val):
+        return atomic_add_inner(ary, idx, val)
+
+    return impl
+
+
+def atomic_max(ary, idx, val):
+    result = ary[idx]
+    if ary[idx] < val:
+        ary[idx] = val
+    return result
+
+
+@numba.extending.overload(atomic_max)
+def atomic_max_overload(ary, idx, val):
+    def impl(ary, idx, val):
+        old = ary[idx]
+        while old < val:
+            if atomic_cas_inner(ary, idx, old, val):
+                break
+            old = ary[idx]
+        return old
+
+    return impl
+
+
 # =============================================================================
 # Generic GPU/CPU Local Array Variable Constructors
 # =============================================================================
@@ -515,7 +638,7 @@ def thread(prog):
 
 @for_cpu()
 def add_active(particle, prog):
-    kernel.add_particle(particle, prog["bank_active"])
+    kernel.add_particle(particle, prog["bank_active"][numba.get_thread_id()])
 
 
 @for_gpu()
@@ -530,7 +653,7 @@ def add_active(P_reclike, prog):
 
 @for_cpu()
 def add_source(particle, prog):
-    kernel.add_particle(particle, prog["bank_source"])
+    kernel.add_bank_record(particle, prog["bank_source"])
 
 
 @for_gpu()
@@ -541,7 +664,7 @@ def add_source(particle, prog):
 
 @for_cpu()
 def add_census(particle, prog):
-    kernel.add_particle(particle, prog["bank_census"])
+    kernel.add_bank_record(particle, prog["bank_census"])
 
 
 @for_gpu()
@@ -563,9 +686,7 @@ def add_IC(particle, prog):
 
 @for_cpu()
 def global_add(ary, idx, val):
-    result = ary[idx]
-    ary[idx] += val
-    return result
+    return atomic_add(ary, idx, val)
 
 
 @for_gpu()
@@ -575,10 +696,7 @@ def global_add(ary, idx, val):
 
 @for_cpu()
 def global_max(ary, idx, val):
-    result = ary[idx]
-    if ary[idx] < val:
-        ary[idx] = val
-    return result
+    return atomic_max(ary, idx, val)
 
 
 @for_gpu()
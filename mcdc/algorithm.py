@@ -1,3 +1,5 @@
+import numpy as np
+
 from numba import njit
 
 
@@ -28,6 +30,25 @@ def binary_search_with_length(val, grid, length):
     return int(right)
 
 
+@njit
+def binary_search_window(val, grid, left, right):
+    """
+    Binary search that only looks into the window grid[left : right + 1]
+
+    The caller guarantees that grid[:left] < val and grid[right + 1 :] >= val,
+    so that the result is identical to that of binary_search_with_length.
+    See binary_search_with_length
+    """
+    mid = -1
+    while left <= right:
+        mid = int((left + right) / 2)
+        if grid[mid] < val:
+            left = mid + 1
+        else:
+            right = mid - 1
+    return int(right)
+
+
 @njit
 def binary_search(val, grid):
     """
@@ -35,3 +56,39 @@ def binary_search(val, grid):
     See binary_search_with _length
     """
     return binary_search_with_length(val, grid, 0)
+
+
+@njit
+def halton(N, dim, skip=0):
+    """
+    Points skip + 1, ..., skip + N of the `dim`-dimensional Halton sequence
+    (first ten prime bases); the origin (point 0) is never returned
+    """
+    primes = np.array((2, 3, 5, 7, 11, 13, 17, 19, 23, 29), dtype=np.int64)
+    halton = np.zeros((N, dim), dtype=np.float64)
+
+    for D in range(dim):
+        b = primes[D]
+
+        # Start from the radical inverse n / d of the skipped point count
+        #   (digits of skip in base b, reversed)
+        n, d = 0, 1
+        m = skip
+        while m > 0:
+            n = n * b + m % b
+            d *= b
+            m //= b
+
+        for i in range(N):
+            x = d - n
+            if x == 1:
+                n = 1
+                d *= b
+            else:
+                y = d // b
+                while x <= y:
+                    y //= b
+                n = (b + 1) * y - x
+            halton[i, D] = n / d
+
+    return halton
@@ -88,6 +88,7 @@ class MaterialCard(InputCard):
         self.nu_f = np.zeros(G)
         self.chi_s = np.zeros([G, G])
         self.chi_p = np.zeros([G, G])
+        self.precompute_xs = False
         self.uq = False
         self.flags = []
         self.distribution = ""
@@ -349,6 +350,19 @@ class SourceCard(InputCard):
 # ======================================================================================
 
 
+class VolumeCalculationCard(InputCard):
+    def __init__(self):
+        InputCard.__init__(self, "Volume calculation")
+
+        # Set card data
+        self.ID = None
+        self.x = np.array([0.0, 0.0])
+        self.y = np.array([0.0, 0.0])
+        self.z = np.array([0.0, 0.0])
+        self.N_sample = 0
+        self.method = "random"
+
+
 class TallyCard(InputCard):
     def __init__(self, type_):
         InputCard.__init__(self, type_)
@@ -5,6 +5,8 @@ import numba as nb
 
 # Data index
 TALLY = 0
+TALLY_DIRTY = 1
+TALLY_DIRTY_SIZE = 2
 
 # Tally bins
 TALLY_SCORE = 0
@@ -25,11 +27,28 @@ BC_NONE = 0
 BC_VACUUM = 1
 BC_REFLECTIVE = 2
 
+# Surface type
+SURFACE_QUADRIC = 0
+SURFACE_PLANE = 1
+SURFACE_PLANE_X = 2
+SURFACE_PLANE_Y = 3
+SURFACE_PLANE_Z = 4
+SURFACE_CYLINDER_X = 5
+SURFACE_CYLINDER_Y = 6
+SURFACE_CYLINDER_Z = 7
+SURFACE_SPHERE = 8
+
 # Cell fill
 FILL_MATERIAL = 0
 FILL_UNIVERSE = 1
 FILL_LATTICE = 2
 
+# Geometry check status
+GEOMETRY_CHECK_OK = 0
+GEOMETRY_CHECK_OVERLAP = 1
+GEOMETRY_CHECK_UNDEFINED = 2
+GEOMETRY_CHECK_PARALLEL_MIN = 100000
+
 # Region
 REGION_HALFSPACE = 0
 REGION_INTERSECTION = 1
@@ -42,6 +61,10 @@ BOOL_AND = -1
 BOOL_OR = -2
 BOOL_NOT = -3
 
+# Region program jump targets (non-negative targets are program nodes)
+REGION_FALSE = -1
+REGION_TRUE = -2
+
 # Universe
 UNIVERSE_ROOT = 0
 
@@ -108,6 +131,8 @@ SEED_SPLIT_SOURCE_PRECURSOR = nb.uint64(0x546F6464)
 SEED_SPLIT_BANK = nb.uint64(0x5279616E)
 SEED_SPLIT_PARTICLE = nb.uint64(0)
 SEED_SPLIT_UQ = nb.uint64(0x5368656261)
+SEED_SPLIT_VOLUME = nb.uint64(0x566F6C756D65)
+SEED_SPLIT_GEOMETRY_CHECK = nb.uint64(0x47656F6D)
 
 # Physics
 NEUTRON_MASS = 1.67492749804e-27  # kg
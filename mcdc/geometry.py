@@ -1,8 +1,7 @@
 import math
 
-from numba import njit, int64
+from numba import njit, int64, prange
 
-import mcdc.mesh as mesh
 import mcdc.physics as physics
 import mcdc.adapt as adapt
 import mcdc.type_ as type_
@@ -93,8 +92,8 @@ def inspect_geometry(particle_container, mcdc):
                 # Get lattice
                 lattice = mcdc["lattices"][cell["fill_ID"]]
 
-                # Distance to lattice grid
-                d_lattice = mesh.uniform.get_crossing_distance(
+                # Lattice element and distance to lattice grid
+                ix, iy, iz, d_lattice, outside = get_lattice_element(
                     particle_container, speed, lattice
                 )
 
@@ -111,14 +110,18 @@ def inspect_geometry(particle_container, mcdc):
                         event += EVENT_LATTICE_CROSSING
 
                 # Get universe
-                ix, iy, iz, it, outside = mesh.uniform.get_indices(
-                    particle_container, lattice
-                )
                 if outside:
                     event = EVENT_LOST
                     continue
                 universe_ID = lattice["universe_IDs"][ix, iy, iz]
 
+                # Single-material-cell element: the material is known, and
+                # there is no inner surface
+                material_ID = lattice["material_IDs"][ix, iy, iz]
+                if material_ID > -1:
+                    particle["material_ID"] = material_ID
+                    break
+
                 # Lattice-translate the particle
                 particle["x"] -= lattice["x0"] + (ix + 0.5) * lattice["dx"]
                 particle["y"] -= lattice["y0"] + (iy + 0.5) * lattice["dy"]
@@ -150,6 +153,78 @@ def inspect_geometry(particle_container, mcdc):
     return distance
 
 
+@njit
+def inspect_geometry_top_cell(particle_container, mcdc):
+    """
+    Geometry inspection of the particle top cell only (for delta tracking):
+        - Set particle top cell and material IDs (if not lost)
+        - Set surface ID (if surface hit)
+        - Set particle boundary event (surface crossing, or lost)
+        - Return distance to the top cell boundary
+    """
+    particle = particle_container[0]
+
+    # Locate the particle if the top cell or the material is unknown (e.g.,
+    # after a crossing), so that the flight speed is that of the material
+    # where the flight starts
+    if particle["cell_ID"] == -1 or particle["material_ID"] == -1:
+        if not locate_particle(particle_container, mcdc):
+            particle["event"] = EVENT_LOST
+            return INF
+
+    # Distance to nearest top cell surface
+    cell = mcdc["cells"][particle["cell_ID"]]
+    distance, surface_ID = distance_to_nearest_surface(particle_container, cell, mcdc)
+    if distance < INF - COINCIDENCE_TOLERANCE:
+        particle["event"] = EVENT_SURFACE_CROSSING
+        particle["surface_ID"] = surface_ID
+    else:
+        distance = INF
+        particle["event"] = EVENT_NONE
+
+    return distance
+
+
+@njit
+def inspect_geometry_cached(particle_container, mcdc):
+    """
+    Geometry inspection reusing the particle boundary cache
+
+    The cache holds the boundary event, surface ID, and distance of the last
+    full inspection, with the distance reduced by the distance travelled
+    since then. It stays valid while the particle keeps its top cell and
+    direction, as distances along a straight flight only shrink by the
+    distance travelled.
+    """
+    particle = particle_container[0]
+
+    if (
+        particle["boundary_cache_flag"]
+        and particle["boundary_cache_cell_ID"] == particle["cell_ID"]
+        and particle["boundary_cache_ux"] == particle["ux"]
+        and particle["boundary_cache_uy"] == particle["uy"]
+        and particle["boundary_cache_uz"] == particle["uz"]
+    ):
+        particle["event"] = particle["boundary_cache_event"]
+        particle["surface_ID"] = particle["boundary_cache_surface_ID"]
+        return particle["boundary_cache_distance"]
+
+    if mcdc["setting"]["delta_tracking"]:
+        distance = inspect_geometry_top_cell(particle_container, mcdc)
+    else:
+        distance = inspect_geometry(particle_container, mcdc)
+
+    particle["boundary_cache_flag"] = particle["event"] != EVENT_LOST
+    particle["boundary_cache_cell_ID"] = particle["cell_ID"]
+    particle["boundary_cache_ux"] = particle["ux"]
+    particle["boundary_cache_uy"] = particle["uy"]
+    particle["boundary_cache_uz"] = particle["uz"]
+    particle["boundary_cache_event"] = particle["event"]
+    particle["boundary_cache_surface_ID"] = particle["surface_ID"]
+    particle["boundary_cache_distance"] = distance
+    return distance
+
+
 @njit
 def locate_particle(particle_container, mcdc):
     """
@@ -159,6 +234,20 @@ def locate_particle(particle_container, mcdc):
     This is similar to inspect_geometry, except that distance to nearest surface
     or/and lattice grid and the respective boundary event are not determined.
     """
+    if try_locate_particle(particle_container, mcdc):
+        return True
+
+    # Report lost particle
+    report_lost(particle_container)
+    return False
+
+
+@njit
+def try_locate_particle(particle_container, mcdc):
+    """
+    Set particle cell and material IDs
+    Return False if particle is lost, without reporting it
+    """
     particle = particle_container[0]
 
     # Store particle global coordinate
@@ -206,14 +295,20 @@ def locate_particle(particle_container, mcdc):
                 lattice = mcdc["lattices"][cell["fill_ID"]]
 
                 # Get universe
-                ix, iy, iz, it, outside = mesh.uniform.get_indices(
-                    particle_container, lattice
+                ix, iy, iz, d_lattice, outside = get_lattice_element(
+                    particle_container, speed, lattice
                 )
                 if outside:
                     particle_is_lost = True
                     continue
                 universe_ID = lattice["universe_IDs"][ix, iy, iz]
 
+                # Single-material-cell element
+                material_ID = lattice["material_IDs"][ix, iy, iz]
+                if material_ID > -1:
+                    particle["material_ID"] = material_ID
+                    break
+
                 # Lattice-translate the particle
                 particle["x"] -= lattice["x0"] + (ix + 0.5) * lattice["dx"]
                 particle["y"] -= lattice["y0"] + (iy + 0.5) * lattice["dy"]
@@ -235,13 +330,263 @@ def locate_particle(particle_container, mcdc):
     particle["uy"] = uy_global
     particle["uz"] = uz_global
 
-    # Report lost particle
-    if particle_is_lost:
-        report_lost(particle_container)
-
     return not particle_is_lost
 
 
+@njit
+def set_point_particle(particle_container, x, y, z):
+    """
+    Set a dummy particle at the point: at time zero, moving in +x, with unit
+    weight, and with unknown cell and material and invalid caches
+    """
+    particle = particle_container[0]
+    particle["x"] = x
+    particle["y"] = y
+    particle["z"] = z
+    particle["t"] = 0.0
+    particle["ux"] = 1.0
+    particle["uy"] = 0.0
+    particle["uz"] = 0.0
+    particle["g"] = 0
+    particle["E"] = 1e6
+    particle["w"] = 1.0
+    particle["alive"] = True
+    particle["fresh"] = True
+    particle["rng_seed"] = 0
+    particle["material_ID"] = -1
+    particle["cell_ID"] = -1
+    particle["surface_ID"] = -1
+    particle["event"] = -1
+    particle["xs_cache_flag"] = 0
+    particle["boundary_cache_flag"] = False
+
+
+@njit(parallel=True)
+def locate_points(x, y, z, material_IDs, cell_IDs, mcdc_arr):
+    """
+    Set the material and root-universe cell IDs at the given points
+    (-1 if the point is outside the model)
+
+    The points are located in parallel with a dummy particle each.
+    """
+    for i in prange(len(x)):
+        mcdc = mcdc_arr[0]
+        particle_container = adapt.local_array(1, type_.particle)
+        particle = particle_container[0]
+        set_point_particle(particle_container, x[i], y[i], z[i])
+
+        if try_locate_particle(particle_container, mcdc):
+            material_IDs[i] = particle["material_ID"]
+            cell_IDs[i] = particle["cell_ID"]
+        else:
+            material_IDs[i] = -1
+            cell_IDs[i] = -1
+
+
+# ======================================================================================
+# Geometry check
+# ======================================================================================
+
+
+@njit
+def check_point(particle_container, result, mcdc):
+    """
+    Check the cells claiming the particle position, down the universe levels
+
+    Set result to [status, universe ID, cell ID, other cell ID]:
+        - GEOMETRY_CHECK_OVERLAP: both cells of the universe claim the position
+        - GEOMETRY_CHECK_UNDEFINED: no cell of the universe claims the position,
+          or the position is in the cell but outside of its lattice
+        - GEOMETRY_CHECK_OK: a single cell claims the position at each level
+    """
+    particle = particle_container[0]
+
+    # Surface senses evaluated in a universe
+    sense_cache_ID = adapt.local_array(type_.sense_cache_size(), type_.int64)
+    sense_cache = adapt.local_array(type_.sense_cache_size(), type_.bool_)
+
+    result[0] = GEOMETRY_CHECK_OK
+    result[1] = -1
+    result[2] = -1
+    result[3] = -1
+
+    universe_ID = UNIVERSE_ROOT
+    while True:
+        universe = mcdc["universes"][universe_ID]
+        reset_sense_cache(sense_cache_ID)
+
+        # Check all cells of the universe
+        cell_ID = -1
+        for i in range(universe["N_cell"]):
+            ID = universe["cell_IDs"][i]
+            cell = mcdc["cells"][ID]
+            if check_cell(particle_container, cell, sense_cache_ID, sense_cache, mcdc):
+                if cell_ID == -1:
+                    cell_ID = ID
+                else:
+                    result[0] = GEOMETRY_CHECK_OVERLAP
+                    result[1] = universe_ID
+                    result[2] = cell_ID
+                    result[3] = ID
+                    return
+        if cell_ID == -1:
+            result[0] = GEOMETRY_CHECK_UNDEFINED
+            result[1] = universe_ID
+            return
+
+        # Material cell?
+        cell = mcdc["cells"][cell_ID]
+        if cell["fill_type"] == FILL_MATERIAL:
+            return
+
+        # Apply translation
+        if cell["fill_translated"]:
+            particle["x"] -= cell["translation"][0]
+            particle["y"] -= cell["translation"][1]
+            particle["z"] -= cell["translation"][2]
+
+        if cell["fill_type"] == FILL_UNIVERSE:
+            universe_ID = cell["fill_ID"]
+        else:
+            # Get lattice element universe
+            lattice = mcdc["lattices"][cell["fill_ID"]]
+            ix, iy, iz, d_lattice, outside = get_lattice_element(
+                particle_container, 1.0, lattice
+            )
+            if outside:
+                result[0] = GEOMETRY_CHECK_UNDEFINED
+                result[1] = universe_ID
+                result[2] = cell_ID
+                return
+            universe_ID = lattice["universe_IDs"][ix, iy, iz]
+
+            # Lattice-translate the particle
+            particle["x"] -= lattice["x0"] + (ix + 0.5) * lattice["dx"]
+            particle["y"] -= lattice["y0"] + (iy + 0.5) * lattice["dy"]
+            particle["z"] -= lattice["z0"] + (iz + 0.5) * lattice["dz"]
+
+
+@njit
+def check_points(x, y, z, results, mcdc_arr):
+    """
+    Check the cells claiming the given points (see check_point)
+    """
+    for i in range(len(x)):
+        mcdc = mcdc_arr[0]
+        particle_container = adapt.local_array(1, type_.particle)
+        set_point_particle(particle_container, x[i], y[i], z[i])
+        check_point(particle_container, results[i], mcdc)
+
+
+@njit(parallel=True)
+def check_points_parallel(x, y, z, results, mcdc_arr):
+    """
+    Parallel counterpart of check_points
+    """
+    for i in prange(len(x)):
+        mcdc = mcdc_arr[0]
+        particle_container = adapt.local_array(1, type_.particle)
+        set_point_particle(particle_container, x[i], y[i], z[i])
+        check_point(particle_container, results[i], mcdc)
+
+
+# ======================================================================================
+# Lattice
+# ======================================================================================
+
+
+@njit
+def get_lattice_element(particle_container, speed, lattice):
+    """
+    Get the lattice element indices of the particle and its distance, moving
+    with the given speed, to the nearest lattice grid, in a single pass
+
+    Return ix, iy, iz, distance, and whether the particle is outside the
+    lattice (or on its outer boundary moving away).
+    """
+    particle = particle_container[0]
+
+    # Particle coordinate
+    x = particle["x"]
+    y = particle["y"]
+    z = particle["z"]
+    t = particle["t"]
+    ux = particle["ux"]
+    uy = particle["uy"]
+    uz = particle["uz"]
+
+    # Lattice parameters
+    x0 = lattice["x0"]
+    y0 = lattice["y0"]
+    z0 = lattice["z0"]
+    t0 = lattice["t0"]
+    dx = lattice["dx"]
+    dy = lattice["dy"]
+    dz = lattice["dz"]
+    dt = lattice["dt"]
+    x_last = x0 + lattice["Nx"] * dx
+    y_last = y0 + lattice["Ny"] * dy
+    z_last = z0 + lattice["Nz"] * dz
+    t_last = t0 + lattice["Nt"] * dt
+
+    # Check if particle is outside the lattice grid
+    if (
+        # Outside the lattice condition
+        x < x0 - COINCIDENCE_TOLERANCE
+        or x > x_last + COINCIDENCE_TOLERANCE
+        or y < y0 - COINCIDENCE_TOLERANCE
+        or y > y_last + COINCIDENCE_TOLERANCE
+        or z < z0 - COINCIDENCE_TOLERANCE
+        or z > z_last + COINCIDENCE_TOLERANCE
+        or t < t0 - COINCIDENCE_TOLERANCE
+        or t > t_last + COINCIDENCE_TOLERANCE
+        # At the outermost-grid but moving away
+        or (abs(x - x0) < COINCIDENCE_TOLERANCE and ux < 0.0)
+        or (abs(x - x_last) < COINCIDENCE_TOLERANCE and ux > 0.0)
+        or (abs(y - y0) < COINCIDENCE_TOLERANCE and uy < 0.0)
+        or (abs(y - y_last) < COINCIDENCE_TOLERANCE and uy > 0.0)
+        or (abs(z - z0) < COINCIDENCE_TOLERANCE and uz < 0.0)
+        or (abs(z - z_last) < COINCIDENCE_TOLERANCE and uz > 0.0)
+        or (abs(t - t_last) < COINCIDENCE_TOLERANCE)
+    ):
+        return -1, -1, -1, INF, True
+
+    ix, d_x = _lattice_grid(x, ux, x0, dx, lattice["inv_dx"])
+    iy, d_y = _lattice_grid(y, uy, y0, dy, lattice["inv_dy"])
+    iz, d_z = _lattice_grid(z, uz, z0, dz, lattice["inv_dz"])
+    it, d_t = _lattice_grid(t, 1.0 / speed, t0, dt, lattice["inv_dt"])
+
+    distance = min(INF, min(min(d_x, d_y), min(d_z, d_t)))
+    return ix, iy, iz, distance, False
+
+
+@njit
+def _lattice_grid(value, direction, start, width, inv_width):
+    """
+    Get the grid index and the distance to the nearest grid given a value and
+    direction
+
+    Direction is used to tiebreak when the value is at a grid point
+    (within tolerance).
+    Note: It assumes the value is inside the grid.
+    """
+    idx = int64(math.floor((value + COINCIDENCE_TOLERANCE - start) * inv_width))
+
+    # Coinciding cases
+    if abs(start + width * idx - value) < COINCIDENCE_TOLERANCE:
+        if direction < 0.0:
+            idx -= 1
+
+    if direction > 0.0:
+        dist = (start + width * (idx + 1) - value) / direction
+    elif direction < 0.0:
+        dist = (start + width * idx - value) / direction
+    else:
+        dist = INF
+
+    return idx, dist
+
+
 # ======================================================================================
 # Particle locator
 # ======================================================================================
@@ -253,13 +598,25 @@ def get_cell(particle_container, universe_ID, mcdc):
     Find and return particle cell ID in the given universe
     Return -1 if particle is lost
     """
-    particle = particle_container[0]
     universe = mcdc["universes"][universe_ID]
 
+    # Surface senses evaluated during the lookup
+    sense_cache_ID = adapt.local_array(type_.sense_cache_size(), type_.int64)
+    sense_cache = adapt.local_array(type_.sense_cache_size(), type_.bool_)
+    reset_sense_cache(sense_cache_ID)
+
+    # Check the cells overlapping the particle's grid bin, if indexed
+    if universe["grid_data_idx"] > -1:
+        cell_ID = get_cell_grid(
+            particle_container, universe, sense_cache_ID, sense_cache, mcdc
+        )
+        if cell_ID > -1:
+            return cell_ID
+
     # Check all cells in the universe
     for cell_ID in universe["cell_IDs"]:
         cell = mcdc["cells"][cell_ID]
-        if check_cell(particle_container, cell, mcdc):
+        if check_cell(particle_container, cell, sense_cache_ID, sense_cache, mcdc):
             return cell["ID"]
 
     # Particle is not found
@@ -267,45 +624,151 @@ def get_cell(particle_container, universe_ID, mcdc):
 
 
 @njit
-def check_cell(particle_container, cell, mcdc):
+def get_cell_grid(particle_container, universe, sense_cache_ID, sense_cache, mcdc):
     """
-    Check if the particle is inside the cell
+    Find and return particle cell ID among the universe cells overlapping the
+    particle's search grid bin
+    Return -1 if not found (the caller then checks all cells)
     """
     particle = particle_container[0]
+    position = (particle["x"], particle["y"], particle["z"])
+
+    # Grid bin index
+    idx_bin = 0
+    for i in range(3):
+        N = universe["grid_N"][i]
+        idx = int(
+            math.floor(
+                (position[i] - universe["grid_low"][i]) * universe["grid_factor"][i]
+            )
+        )
+        if idx < 0 or idx >= N:
+            return -1
+        idx_bin = idx_bin * N + idx
+
+    # Check the bin cells, bounding box first
+    idx = universe["grid_data_idx"] + idx_bin
+    start = mcdc["universe_grid_data"][idx]
+    end = mcdc["universe_grid_data"][idx + 1]
+    for j in range(start, end):
+        cell = mcdc["cells"][mcdc["universe_grid_data"][j]]
+        if not check_bounding_box(particle, cell):
+            continue
+        if check_cell(particle_container, cell, sense_cache_ID, sense_cache, mcdc):
+            return cell["ID"]
+    return -1
+
+
+@njit
+def check_bounding_box(particle, cell):
+    """
+    Check if the particle is inside the cell bounding box
+    """
+    bbox = cell["bbox"]
+    return (
+        bbox[0] <= particle["x"] <= bbox[1]
+        and bbox[2] <= particle["y"] <= bbox[3]
+        and bbox[4] <= particle["z"] <= bbox[5]
+    )
 
-    # Access RPN data
-    idx = cell["region_data_idx"]
-    N_token = mcdc["cell_region_data"][idx]
 
-    # Create local value array
-    value = adapt.local_array(type_.rpn_buffer_size(), type_.bool_)
-    N_value = 0
+@njit
+def get_cell_across_surface(particle_container, cell_ID, surface_ID, mcdc):
+    """
+    Find and return particle cell ID in the root universe, after the particle
+    crosses the surface out of the root universe cell `cell_ID`
+    Return -1 if particle is lost
+
+    The neighbors of the cell across the surface are checked first. Otherwise,
+    all cells in the root universe are checked, and the found cell is added to
+    the neighbors.
+    """
+    cell = mcdc["cells"][cell_ID]
+    N_neighbor = mcdc["setting"]["cell_neighbor_size"]
+
+    # Find the neighbor list of the surface
+    #   (the surface may belong to a cell in a lower universe)
+    idx = cell["surface_data_idx"]
+    N_surface = mcdc["cell_surface_data"][idx]
+    idx_neighbor = -1
+    for i in range(N_surface):
+        if mcdc["cell_surface_data"][idx + 1 + i] == surface_ID:
+            idx_neighbor = cell["neighbor_data_idx"] + i * N_neighbor
+            break
+    if idx_neighbor == -1:
+        return get_cell(particle_container, UNIVERSE_ROOT, mcdc)
+
+    # Check the neighbors
+    sense_cache_ID = adapt.local_array(type_.sense_cache_size(), type_.int64)
+    sense_cache = adapt.local_array(type_.sense_cache_size(), type_.bool_)
+    reset_sense_cache(sense_cache_ID)
+    N_found = N_neighbor
+    for i in range(N_neighbor):
+        neighbor_ID = mcdc["cell_neighbor_data"][idx_neighbor + i]
+        if neighbor_ID == -1:
+            N_found = i
+            break
+        neighbor = mcdc["cells"][neighbor_ID]
+        if check_cell(particle_container, neighbor, sense_cache_ID, sense_cache, mcdc):
+            return neighbor_ID
+
+    # Check all cells and learn the neighbor
+    #   (concurrent learners may overwrite each other, which is harmless)
+    new_cell_ID = get_cell(particle_container, UNIVERSE_ROOT, mcdc)
+    if new_cell_ID > -1 and N_found < N_neighbor:
+        mcdc["cell_neighbor_data"][idx_neighbor + N_found] = new_cell_ID
+    return new_cell_ID
 
-    # March forward through RPN tokens
+
+@njit
+def check_cell(particle_container, cell, sense_cache_ID, sense_cache, mcdc):
+    """
+    Check if the particle is inside the cell
+
+    The region program is followed from its entry node, jumping on each
+    surface sense until the region is decided.
+    """
+    # Access region program data
+    idx = cell["region_data_idx"] + 1
+    node = mcdc["cell_region_data"][idx]
     idx += 1
-    idx_end = idx + N_token
-    while idx < idx_end:
-        token = mcdc["cell_region_data"][idx]
 
-        if token >= 0:
-            surface = mcdc["surfaces"][token]
-            value[N_value] = check_surface_sense(particle_container, surface)
-            N_value += 1
+    while node >= 0:
+        idx_node = idx + 3 * node
+        surface_ID = mcdc["cell_region_data"][idx_node]
+        if get_surface_sense(
+            particle_container, surface_ID, sense_cache_ID, sense_cache, mcdc
+        ):
+            node = mcdc["cell_region_data"][idx_node + 1]
+        else:
+            node = mcdc["cell_region_data"][idx_node + 2]
 
-        elif token == BOOL_NOT:
-            value[N_value - 1] = not value[N_value - 1]
+    return node == REGION_TRUE
 
-        elif token == BOOL_AND:
-            value[N_value - 2] = value[N_value - 2] & value[N_value - 1]
-            N_value -= 1
 
-        elif token == BOOL_OR:
-            value[N_value - 2] = value[N_value - 2] | value[N_value - 1]
-            N_value -= 1
+@njit
+def reset_sense_cache(sense_cache_ID):
+    for i in range(sense_cache_ID.shape[0]):
+        sense_cache_ID[i] = -1
 
-        idx += 1
 
-    return value[0]
+@njit
+def get_surface_sense(
+    particle_container, surface_ID, sense_cache_ID, sense_cache, mcdc
+):
+    """
+    Surface sense of the particle, looked up in (or added to) the lookup's
+    direct-mapped sense cache
+    """
+    slot = surface_ID % sense_cache_ID.shape[0]
+    if sense_cache_ID[slot] == surface_ID:
+        return sense_cache[slot]
+
+    surface = mcdc["surfaces"][surface_ID]
+    sense = check_surface_sense(particle_container, surface)
+    sense_cache_ID[slot] = surface_ID
+    sense_cache[slot] = sense
+    return sense
 
 
 @njit
@@ -359,6 +822,24 @@ def distance_to_nearest_surface(particle_container, cell, mcdc):
     """
     # TODO: docs
     particle = particle_container[0]
+    return distance_to_nearest_surface_at(
+        particle["x"],
+        particle["y"],
+        particle["z"],
+        particle["ux"],
+        particle["uy"],
+        particle["uz"],
+        cell,
+        mcdc,
+    )
+
+
+@njit
+def distance_to_nearest_surface_at(x, y, z, ux, uy, uz, cell, mcdc):
+    """
+    Nearest cell surface and the distance to it from the given position and
+    direction (see distance_to_nearest_surface)
+    """
     distance = INF
     surface_ID = -1
 
@@ -372,7 +853,7 @@ def distance_to_nearest_surface(particle_container, cell, mcdc):
     while idx < idx_end:
         candidate_surface_ID = mcdc["cell_surface_data"][idx]
         surface = mcdc["surfaces"][candidate_surface_ID]
-        d = surface_distance(particle_container, surface, mcdc)
+        d = surface_distance_at(x, y, z, ux, uy, uz, surface)
         if d < distance:
             distance = d
             surface_ID = surface["ID"]
@@ -393,18 +874,39 @@ def surface_evaluate(particle_container, surface):
     Evaluate the surface equation wrt the particle coordinate
     """
     particle = particle_container[0]
-    # Particle coordinate
-    x = particle["x"]
-    y = particle["y"]
-    z = particle["z"]
-    t = particle["t"]
+    return surface_evaluate_at(particle["x"], particle["y"], particle["z"], surface)
+
 
+@njit
+def surface_evaluate_at(x, y, z, surface):
+    """
+    Evaluate the surface equation at the given position
+    """
     # Surface coefficient
     G = surface["G"]
     H = surface["H"]
     I = surface["I"]
     J = surface["J"]
 
+    # Specialized surface types
+    #   (same operations as the general quadric evaluation, without the
+    #   vanishing terms)
+    surface_type = surface["type"]
+    if surface_type == SURFACE_PLANE_X:
+        return x + J
+    elif surface_type == SURFACE_PLANE_Y:
+        return y + J
+    elif surface_type == SURFACE_PLANE_Z:
+        return z + J
+    elif surface_type == SURFACE_CYLINDER_X:
+        return H * y + I * z + J + y * y + z * z
+    elif surface_type == SURFACE_CYLINDER_Y:
+        return G * x + I * z + J + x * x + z * z
+    elif surface_type == SURFACE_CYLINDER_Z:
+        return G * x + H * y + J + x * x + y * y
+    elif surface_type == SURFACE_SPHERE:
+        return G * x + H * y + I * z + J + x * x + y * y + z * z
+
     # Linear surface evaluation
     result = G * x + H * y + I * z + J
     if surface["linear"]:
@@ -430,23 +932,30 @@ def surface_distance(particle_container, surface, mcdc):
     Return particle distance to surface
     """
     particle = particle_container[0]
-    # Particle coordinate
-    x = particle["x"]
-    y = particle["y"]
-    z = particle["z"]
-    t = particle["t"]
-    ux = particle["ux"]
-    uy = particle["uy"]
-    uz = particle["uz"]
+    return surface_distance_at(
+        particle["x"],
+        particle["y"],
+        particle["z"],
+        particle["ux"],
+        particle["uy"],
+        particle["uz"],
+        surface,
+    )
 
+
+@njit
+def surface_distance_at(x, y, z, ux, uy, uz, surface):
+    """
+    Return the distance to surface from the given position and direction
+    """
     # Check if coincident and leaving the surface
-    evaluation = surface_evaluate(particle_container, surface)
+    evaluation = surface_evaluate_at(x, y, z, surface)
     coincident = False
     if abs(evaluation) < COINCIDENCE_TOLERANCE:
         coincident = True
         if surface["linear"]:
             return INF
-        elif surface_normal_component(particle_container, surface) > 0.0:
+        elif surface_normal_component_at(x, y, z, ux, uy, uz, surface) > 0.0:
             return INF
 
     # Surface coefficients
@@ -457,7 +966,15 @@ def surface_distance(particle_container, surface, mcdc):
 
     # Distance to linear surface
     if surface["linear"]:
-        distance = -evaluation / (G * ux + H * uy + I * uz)
+        surface_type = surface["type"]
+        if surface_type == SURFACE_PLANE_X:
+            distance = -evaluation / ux
+        elif surface_type == SURFACE_PLANE_Y:
+            distance = -evaluation / uy
+        elif surface_type == SURFACE_PLANE_Z:
+            distance = -evaluation / uz
+        else:
+            distance = -evaluation / (G * ux + H * uy + I * uz)
 
         # Moving away from the surface
         if distance < 0.0:
@@ -465,32 +982,47 @@ def surface_distance(particle_container, surface, mcdc):
         else:
             return distance
 
-    # Surface coefficients
-    A = surface["A"]
-    B = surface["B"]
-    C = surface["C"]
-    D = surface["D"]
-    E = surface["E"]
-    F = surface["F"]
-
     # Quadratic equation constants
-    a = (
-        A * ux * ux
-        + B * uy * uy
-        + C * uz * uz
-        + D * ux * uy
-        + E * ux * uz
-        + F * uy * uz
-    )
-    b = (
-        2 * (A * x * ux + B * y * uy + C * z * uz)
-        + D * (x * uy + y * ux)
-        + E * (x * uz + z * ux)
-        + F * (y * uz + z * uy)
-        + G * ux
-        + H * uy
-        + I * uz
-    )
+    #   (specialized surface types skip the vanishing terms)
+    surface_type = surface["type"]
+    if surface_type == SURFACE_CYLINDER_X:
+        a = uy * uy + uz * uz
+        b = 2 * (y * uy + z * uz) + H * uy + I * uz
+    elif surface_type == SURFACE_CYLINDER_Y:
+        a = ux * ux + uz * uz
+        b = 2 * (x * ux + z * uz) + G * ux + I * uz
+    elif surface_type == SURFACE_CYLINDER_Z:
+        a = ux * ux + uy * uy
+        b = 2 * (x * ux + y * uy) + G * ux + H * uy
+    elif surface_type == SURFACE_SPHERE:
+        a = ux * ux + uy * uy + uz * uz
+        b = 2 * (x * ux + y * uy + z * uz) + G * ux + H * uy + I * uz
+    else:
+        # Surface coefficients
+        A = surface["A"]
+        B = surface["B"]
+        C = surface["C"]
+        D = surface["D"]
+        E = surface["E"]
+        F = surface["F"]
+
+        a = (
+            A * ux * ux
+            + B * uy * uy
+            + C * uz * uz
+            + D * ux * uy
+            + E * ux * uz
+            + F * uy * uz
+        )
+        b = (
+            2 * (A * x * ux + B * y * uy + C * z * uz)
+            + D * (x * uy + y * ux)
+            + E * (x * uz + z * ux)
+            + F * (y * uz + z * uy)
+            + G * ux
+            + H * uy
+            + I * uz
+        )
     c = evaluation
 
     determinant = b * b - 4.0 * a * c
@@ -559,28 +1091,52 @@ def surface_normal(particle_container, surface):
     Get the surface outward-normal vector at the particle coordinate
     """
     particle = particle_container[0]
+    return surface_normal_at(particle["x"], particle["y"], particle["z"], surface)
+
+
+@njit
+def surface_normal_at(x, y, z, surface):
+    """
+    Get the surface outward-normal vector at the given position
+    """
     if surface["linear"]:
         return surface["nx"], surface["ny"], surface["nz"]
 
-    # Particle coordinate
-    x = particle["x"]
-    y = particle["y"]
-    z = particle["z"]
-
     # Surface coefficients
-    A = surface["A"]
-    B = surface["B"]
-    C = surface["C"]
-    D = surface["D"]
-    E = surface["E"]
-    F = surface["F"]
     G = surface["G"]
     H = surface["H"]
     I = surface["I"]
 
-    dx = 2 * A * x + D * y + E * z + G
-    dy = 2 * B * y + D * x + F * z + H
-    dz = 2 * C * z + E * x + F * y + I
+    # Specialized surface types
+    surface_type = surface["type"]
+    if surface_type == SURFACE_CYLINDER_X:
+        dx = 0.0
+        dy = 2 * y + H
+        dz = 2 * z + I
+    elif surface_type == SURFACE_CYLINDER_Y:
+        dx = 2 * x + G
+        dy = 0.0
+        dz = 2 * z + I
+    elif surface_type == SURFACE_CYLINDER_Z:
+        dx = 2 * x + G
+        dy = 2 * y + H
+        dz = 0.0
+    elif surface_type == SURFACE_SPHERE:
+        dx = 2 * x + G
+        dy = 2 * y + H
+        dz = 2 * z + I
+    else:
+        # Surface coefficients
+        A = surface["A"]
+        B = surface["B"]
+        C = surface["C"]
+        D = surface["D"]
+        E = surface["E"]
+        F = surface["F"]
+
+        dx = 2 * A * x + D * y + E * z + G
+        dy = 2 * B * y + D * x + F * z + H
+        dz = 2 * C * z + E * x + F * y + I
 
     norm = (dx**2 + dy**2 + dz**2) ** 0.5
     return dx / norm, dy / norm, dz / norm
@@ -593,13 +1149,25 @@ def surface_normal_component(particle_container, surface):
     (dot product of the two directional vectors)
     """
     particle = particle_container[0]
-    # Surface outward-normal vector
-    nx, ny, nz = surface_normal(particle_container, surface)
+    return surface_normal_component_at(
+        particle["x"],
+        particle["y"],
+        particle["z"],
+        particle["ux"],
+        particle["uy"],
+        particle["uz"],
+        surface,
+    )
 
-    # Particle direction vector
-    ux = particle["ux"]
-    uy = particle["uy"]
-    uz = particle["uz"]
+
+@njit
+def surface_normal_component_at(x, y, z, ux, uy, uz, surface):
+    """
+    Get the surface outward-normal component of the given direction at the
+    given position
+    """
+    # Surface outward-normal vector
+    nx, ny, nz = surface_normal_at(x, y, z, surface)
 
     # The dot product
     return nx * ux + ny * uy + nz * uz
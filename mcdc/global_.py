@@ -35,6 +35,7 @@ class InputDeck:
         self.sources = []
         self.mesh_tallies = []
         self.surface_tallies = []
+        self.volume_calculations = []
 
         self.setting = {
             "tag": "Setting",
@@ -42,6 +43,7 @@ class InputDeck:
             "mode_CE": False,
             "N_particle": 0,
             "N_batch": 1,
+            "history_group_size": 1,
             "rng_seed": 1,
             "time_boundary": INF,
             "progress_bar": True,
@@ -63,9 +65,22 @@ class InputDeck:
             "IC_file": False,
             "IC_file_name": "",
             "N_precursor": 0,
+            "energy_hash_size": 0,
+            "xs_shared_memory": False,
+            "cell_neighbor_size": 0,
+            "cell_neighbor_prepopulate": False,
+            "universe_grid_size": 0,
+            "surface_distance_cache": False,
+            "delta_tracking": False,
+            "N_thread": 1,
+            "work_chunk_size": 0,
+            "cost_weighted_rebalance": False,
+            "event_batch_size": 0,
             # Below are parameters not copied to mcdc.setting
             "bank_active_buff": 100,
             "bank_census_buff": 1.0,
+            "bank_layout": "aos",
+            "geometry_check": 1000,
             # Portability
             "target": "cpu",
         }
@@ -19,6 +19,7 @@ from mcdc.card import (
     UniverseCard,
     LatticeCard,
     SourceCard,
+    VolumeCalculationCard,
 )
 from mcdc.constant import (
     GYRATION_RADIUS_ALL,
@@ -40,6 +41,7 @@ from mcdc.constant import (
 )
 from mcdc.print_ import print_error
 import mcdc.type_ as type_
+import mcdc.xslib as xslib
 
 
 def nuclide(
@@ -220,6 +222,7 @@ def material(
     chi_d=None,
     speed=None,
     decay=None,
+    precompute_xs=False,
 ):
     """
     Create a material
@@ -251,6 +254,10 @@ def material(
         Energy group speed [cm/s].
     decay : numpy.ndarray (1D), optional
         Precursor group decay constant [/s].
+    precompute_xs : bool, optional
+        [CE] Precompute the macroscopic total, scatter, capture, and fission
+        cross sections on the unionized energy grid, trading memory for faster
+        lookups (default False).
 
     Returns
     -------
@@ -294,6 +301,7 @@ def material(
 
         # Default values
         card.J = 6
+        card.precompute_xs = precompute_xs
 
         # Set the nuclides
         for i in range(N_nuclide):
@@ -311,20 +319,10 @@ def material(
                 # Default values
                 nuc_card.J = 6
 
-                # Check if the nuclide is available in the nuclear data library
-                dir_name = os.getenv("MCDC_XSLIB")
-                if dir_name == None:
-                    print_error(
-                        "Continuous energy data directory not configured \n       "
-                        "see https://cement-psaapgithubio.readthedocs.io/en/latest"
-                        "/install.html#configuring-continuous-energy-library \n"
-                    )
-
-                # Fissionable flag
-                with h5py.File(dir_name + "/" + nuc_name + ".h5", "r") as f:
-                    if max(f["fission"][:]) > 0.0:
-                        nuc_card.fissionable = True
-                        card.fissionable = True
+                # Fissionable flag (from the nuclear data library)
+                if xslib.nuclide_fissionable(nuc_name):
+                    nuc_card.fissionable = True
+                    card.fissionable = True
 
                 # Add to deck
                 global_.input_deck.nuclides.append(nuc_card)
@@ -943,6 +941,10 @@ def setting(**kw):
         Number of MC particle histories to run (for k-eigen and iQMC its /iteration).
     N_batch : int
         Number of batches to run.
+    history_group_size : int
+        Number of histories whose scores are grouped into a single sample of the
+        tally statistics in single-batch fixed-source runs; the group samples are
+        weighted by their history counts. Not supported on GPU (default 1).
     rng_seed : int
         Random number seed.
     time_boundary : float
@@ -966,6 +968,92 @@ def setting(**kw):
         Size of the activate particle bank buffer, for MPI runs.
     census_bank_buff : int
         Sets size of the census buffer particle bank.
+    bank_layout : {"aos", "soa"}
+        Memory layout of the census and source particle banks: an array of
+        particle records ("aos") or an array for each particle field ("soa").
+        The latter makes the bank-wide weight and position scans contiguous.
+        Not supported with iQMC and GPU (default "aos").
+    energy_hash_size : int
+        Number of bins of the hash tables that bound the continuous-energy grid
+        and fission spectrum searches (default 0, no hashing).
+    xs_shared_memory : bool
+        Whether to load the continuous-energy nuclide data once per compute node
+        into an MPI shared-memory window read by all of the node's ranks
+        (default False). This includes the index maps from the unionized energy
+        grid to the nuclide energy grids, which take 4 bytes per nuclide per
+        unionized grid point and usually dominate the memory of the
+        continuous-energy data; otherwise, every rank holds its own copy.
+    cell_neighbor_size : int
+        Number of neighbor cells stored per cell surface. After a surface
+        crossing, the new cell is first searched for among the neighbors of the
+        old cell across the surface, which are learned during the transport
+        (default 0, no neighbor lists).
+    cell_neighbor_prepopulate : bool
+        Whether to prepopulate the neighbor lists with the cells sharing the
+        surface (default False).
+    universe_grid_size : int
+        Number of bins per dimension of the uniform grids that index the cells
+        of each universe by their bounding boxes. A cell search only checks
+        the cells overlapping the particle's grid bin (default 0, no grids).
+    surface_distance_cache : bool
+        Whether to cache the particle distance to the nearest boundary (surface
+        or lattice crossing) over a flight. After an event that changes neither
+        the particle cell nor its direction, the cached distance is reduced by
+        the distance travelled instead of being recomputed (default False).
+    delta_tracking : bool
+        Whether to use Woodcock delta tracking within the root universe cells.
+        Flights are sampled with the majorant total cross-section of all
+        materials, and the particle is only located at the tentative collision
+        sites, skipping the lower-level (universe and lattice) boundaries. Mesh
+        tallies and the eigenvalue tallies use the collision estimator instead
+        of the track-length estimator. In MG mode, the particle time is advanced
+        with the speed of the material where the flight starts (default False).
+    geometry_check : int
+        Number of random points located by the pre-flight geometry check, which
+        reports points claimed by multiple cells of a universe and points in
+        undefined regions before the transport starts (default 1000, 0 to skip
+        the check).
+    N_thread : int
+        Number of numba threads sharing the source particles of each MPI rank.
+        The threads share the global data and the particle banks, except for
+        their own active banks, and score into thread-private tally copies that
+        are reduced after each source loop. The threads take the source
+        particles a history group at a time, and the census bank (including
+        the fission bank of eigenvalue problems) is sorted after each source
+        loop, so the history groups and the banked particles do not depend on
+        the thread scheduling. The results are only reproducible up to
+        round-off, as the tally summation order still depends on it. Not
+        supported with domain decomposition, uq, iQMC, and GPU (default 1).
+    work_chunk_size : int
+        Number of source particles an MPI rank takes at a time from a shared
+        one-sided MPI counter in fixed-source problems, so that the ranks
+        finishing early take more of the sampled source particles. The
+        particles are keyed on their global source indices, and the chunks
+        hold whole history groups (a multiple of `history_group_size`), so the
+        results do not depend on the distribution. Not supported with
+        shared-memory threads, domain decomposition, uq, iQMC, and GPU
+        (default 0, static distribution).
+    cost_weighted_rebalance : bool
+        Distribute the source bank of eigenvalue problems among the MPI ranks
+        in proportion to their speeds, the inverses of their times per history
+        measured in the previous cycle, instead of evenly (default False).
+    event_batch_size : int
+        Number of source particles transported together by the event-based
+        algorithm in multigroup fixed-source problems. The particles of a batch
+        and their secondaries are held in a structure-of-arrays particle pool
+        and advanced one event at a time, with each event kernel (geometry
+        inspection, cross-section lookup and flight sampling, move, collision,
+        and surface crossing) sweeping over all the pool particles awaiting it.
+        Each batch is closed out as one tally history group, so
+        `history_group_size` is set to the batch size (another value than 1
+        or the batch size is an error). Secondaries wait in the active bank
+        until the pool has room for them, so the active bank also holds
+        `event_batch_size` more particles. Not supported with
+        eigenvalue problems, continuous-energy physics, shared-memory threads,
+        dynamic work distribution, domain decomposition, uq, iQMC, IC
+        generation, branchless collision, weight windows and roulette, delta
+        tracking, the surface distance cache, and GPU (default 0,
+        history-based).
 
     Returns
     -------
@@ -981,6 +1069,7 @@ def setting(**kw):
             [
                 "N_particle",
                 "N_batch",
+                "history_group_size",
                 "rng_seed",
                 "time_boundary",
                 "progress_bar",
@@ -991,7 +1080,20 @@ def setting(**kw):
                 "IC_file",
                 "active_bank_buff",
                 "census_bank_buff",
+                "bank_layout",
                 "caching",
+                "energy_hash_size",
+                "xs_shared_memory",
+                "cell_neighbor_size",
+                "cell_neighbor_prepopulate",
+                "universe_grid_size",
+                "surface_distance_cache",
+                "delta_tracking",
+                "geometry_check",
+                "N_thread",
+                "work_chunk_size",
+                "cost_weighted_rebalance",
+                "event_batch_size",
             ],
             False,
         )
@@ -999,6 +1101,7 @@ def setting(**kw):
     # Get keyword arguments
     N_particle = kw.get("N_particle")
     N_batch = kw.get("N_batch")
+    history_group_size = kw.get("history_group_size")
     rng_seed = kw.get("rng_seed")
     time_boundary = kw.get("time_boundary")
     progress_bar = kw.get("progress_bar")
@@ -1009,7 +1112,20 @@ def setting(**kw):
     IC_file = kw.get("IC_file")
     bank_active_buff = kw.get("active_bank_buff")
     bank_census_buff = kw.get("census_bank_buff")
+    bank_layout = kw.get("bank_layout")
     caching = kw.get("caching")
+    energy_hash_size = kw.get("energy_hash_size")
+    xs_shared_memory = kw.get("xs_shared_memory")
+    cell_neighbor_size = kw.get("cell_neighbor_size")
+    cell_neighbor_prepopulate = kw.get("cell_neighbor_prepopulate")
+    universe_grid_size = kw.get("universe_grid_size")
+    surface_distance_cache = kw.get("surface_distance_cache")
+    delta_tracking = kw.get("delta_tracking")
+    geometry_check = kw.get("geometry_check")
+    N_thread = kw.get("N_thread")
+    work_chunk_size = kw.get("work_chunk_size")
+    cost_weighted_rebalance = kw.get("cost_weighted_rebalance")
+    event_batch_size = kw.get("event_batch_size")
 
     # Check if setting card has been initialized
     card = global_.input_deck.setting
@@ -1022,6 +1138,12 @@ def setting(**kw):
     if N_batch is not None:
         card["N_batch"] = int(N_batch)
 
+    # History group size for tally statistics
+    if history_group_size is not None:
+        if int(history_group_size) < 1:
+            print_error("history_group_size must be a positive integer")
+        card["history_group_size"] = int(history_group_size)
+
     # Time boundary
     if time_boundary is not None:
         card["time_boundary"] = time_boundary
@@ -1050,10 +1172,77 @@ def setting(**kw):
     if bank_census_buff is not None:
         card["bank_census_buff"] = int(bank_census_buff)
 
+    # Census and source bank layout
+    if bank_layout is not None:
+        bank_layout = bank_layout.lower()
+        if bank_layout not in ["aos", "soa"]:
+            print_error("bank_layout must be 'aos' or 'soa'")
+        card["bank_layout"] = bank_layout
+
     # caching is normally enabled
     if caching is not None:
         card["caching"] = caching
 
+    # Energy search hash tables
+    if energy_hash_size is not None:
+        if int(energy_hash_size) < 0:
+            print_error("energy_hash_size must be a non-negative integer")
+        card["energy_hash_size"] = int(energy_hash_size)
+
+    # Node-shared nuclide data
+    if xs_shared_memory is not None:
+        card["xs_shared_memory"] = xs_shared_memory
+
+    # Cell neighbor lists
+    if cell_neighbor_size is not None:
+        if int(cell_neighbor_size) < 0:
+            print_error("cell_neighbor_size must be a non-negative integer")
+        card["cell_neighbor_size"] = int(cell_neighbor_size)
+    if cell_neighbor_prepopulate is not None:
+        card["cell_neighbor_prepopulate"] = cell_neighbor_prepopulate
+
+    # Universe cell search grids
+    if universe_grid_size is not None:
+        if int(universe_grid_size) < 0:
+            print_error("universe_grid_size must be a non-negative integer")
+        card["universe_grid_size"] = int(universe_grid_size)
+
+    # Surface distance cache
+    if surface_distance_cache is not None:
+        card["surface_distance_cache"] = surface_distance_cache
+
+    # Delta tracking
+    if delta_tracking is not None:
+        card["delta_tracking"] = delta_tracking
+
+    # Pre-flight geometry check
+    if geometry_check is not None:
+        if int(geometry_check) < 0:
+            print_error("geometry_check must be a non-negative integer")
+        card["geometry_check"] = int(geometry_check)
+
+    # Shared-memory threads
+    if N_thread is not None:
+        if int(N_thread) < 1:
+            print_error("N_thread must be a positive integer")
+        card["N_thread"] = int(N_thread)
+
+    # Dynamic MPI work distribution
+    if work_chunk_size is not None:
+        if int(work_chunk_size) < 0:
+            print_error("work_chunk_size must be a non-negative integer")
+        card["work_chunk_size"] = int(work_chunk_size)
+
+    # Cost-weighted bank rebalance
+    if cost_weighted_rebalance is not None:
+        card["cost_weighted_rebalance"] = cost_weighted_rebalance
+
+    # Event-based transport
+    if event_batch_size is not None:
+        if int(event_batch_size) < 0:
+            print_error("event_batch_size must be a non-negative integer")
+        card["event_batch_size"] = int(event_batch_size)
+
     # Save input deck?
     if save_input_deck is not None:
         card["save_input_deck"] = save_input_deck
@@ -1698,6 +1887,64 @@ def uq(**kw):
     append_card(delta_card, global_tag)
 
 
+def volume_calculation(x, y, z, N_sample, method="random"):
+    """
+    Create a stochastic volume calculation card.
+
+    Points are sampled uniformly in the box and located in the model before
+    the transport simulation. The material and root-universe cell volumes in
+    the box, and the volume outside the model, are reported with their
+    standard deviations in the output file.
+
+    Parameters
+    ----------
+    x : array_like[float]
+        Lower and upper x-coordinates of the box.
+    y : array_like[float]
+        Lower and upper y-coordinates of the box.
+    z : array_like[float]
+        Lower and upper z-coordinates of the box.
+    N_sample : int
+        Number of sampled points.
+    method : {"random", "halton"}
+        Pseudo-random points, or a Halton sequence. For the latter, the reported
+        standard deviations are the pseudo-random ones, which usually
+        overestimate the error.
+
+    Returns
+    -------
+    VolumeCalculationCard
+        The volume calculation card.
+    """
+    card = VolumeCalculationCard()
+    card.ID = len(global_.input_deck.volume_calculations)
+
+    # Box
+    for axis, value in zip(["x", "y", "z"], [x, y, z]):
+        value = np.array(value, dtype=float)
+        if (
+            value.shape != (2,)
+            or not value[0] < value[1]
+            or np.any(np.abs(value) >= INF)
+        ):
+            print_error(
+                "Volume calculation %s-range must be a finite [lower, upper] pair"
+                % axis
+            )
+        setattr(card, axis, value)
+
+    # Samples
+    if int(N_sample) < 1:
+        print_error("Volume calculation requires N_sample >= 1")
+    card.N_sample = int(N_sample)
+    card.method = check_support(
+        "volume calculation method", method, ["random", "halton"]
+    )
+
+    global_.input_deck.volume_calculations.append(card)
+    return card
+
+
 # ==============================================================================
 # Util
 # ==============================================================================
@@ -6,6 +6,7 @@ from numba import objmode, literal_unroll
 
 import mcdc.type_ as type_
 import mcdc.adapt as adapt
+import mcdc.algorithm as algorithm
 import mcdc.geometry as geometry
 import mcdc.mesh as mesh_
 import mcdc.physics as physics
@@ -75,27 +76,7 @@ def rhalton(N, dim, seed=12345, skip=0):
 
 @toggle("iQMC")
 def halton(N, dim, skip=0):
-    # TODO: find more efficient implementation of Halton Sequence
-    primes = np.array((2, 3, 5, 7, 11, 13, 17, 19, 23, 29), dtype=np.int64)
-    halton = np.zeros((N, dim), dtype=np.float64)
-
-    for D in range(dim):
-        b = primes[D]
-        n, d = 0, 1
-        for i in range(skip + N):
-            x = d - n
-            if x == 1:
-                n = 1
-                d *= b
-            else:
-                y = d // b
-                while x <= y:
-                    y //= b
-                n = (b + 1) * y - x
-            if i >= skip:
-                halton[i - skip, D] = n / d
-
-    return halton
+    return algorithm.halton(N, dim, skip)
 
 
 @toggle("iQMC")
@@ -149,6 +130,11 @@ def iqmc_generate_material_idx(mcdc):
     P_temp = P_temp_arr[0]
     # set default attributes
     P_temp["alive"] = True
+    P_temp["g"] = 0
+    P_temp["E"] = 1.0
+    P_temp["ux"] = 1.0
+    P_temp["uy"] = 0.0
+    P_temp["uz"] = 0.0
 
     x_mid = 0.5 * (mesh["x"][1:] + mesh["x"][:-1])
     y_mid = 0.5 * (mesh["y"][1:] + mesh["y"][:-1])
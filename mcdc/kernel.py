@@ -16,10 +16,30 @@ import mcdc.physics as physics
 import mcdc.type_ as type_
 
 from mcdc.adapt import toggle, for_cpu, for_gpu
-from mcdc.algorithm import binary_search, binary_search_with_length
+from mcdc.algorithm import (
+    binary_search,
+    binary_search_with_length,
+    binary_search_window,
+)
 from mcdc.constant import *
 from mcdc.print_ import print_error, print_msg
 
+# Whether the census and source banks store an array for each particle record
+# field (set in `prepare` from setting bank_layout)
+BANK_SOA = False
+
+# Particle record fields stored by the structure-of-arrays banks
+BANK_SOA_FIELDS = ("x", "y", "z", "t", "ux", "uy", "uz", "g", "E", "w", "rng_seed")
+
+# Particle fields stored by the event-based particle pool
+POOL_FIELDS = BANK_SOA_FIELDS + (
+    "material_ID",
+    "cell_ID",
+    "surface_ID",
+    "event",
+    "alive",
+)
+
 
 @njit
 def round(float_val):
@@ -359,7 +379,7 @@ def dd_recv_particles(mcdc):
 
     # Set source bank from buffer
     for i in range(size):
-        add_particle(buff[i : i + 1], mcdc["bank_active"])
+        add_particle(buff[i : i + 1], mcdc["bank_active"][0])
 
     if (
         mcdc["domain_decomp"]["recv_count"] > 0
@@ -881,6 +901,18 @@ def rng_from_seed(seed):
     return rng_(seed) / RNG_MOD
 
 
+@njit
+def rng_stream(seed, start, size):
+    """
+    Random numbers from the seed split by the indices start, ..., start+size-1
+    """
+    xi = np.zeros(size)
+    for i in range(size):
+        xi_seed = split_seed(start + i, seed)
+        xi[i] = rng_from_seed(xi_seed)
+    return xi
+
+
 @njit
 def rng_array(seed, shape, size):
     xi = np.zeros(size)
@@ -1036,9 +1068,104 @@ def get_particle(P_arr, bank, mcdc):
     P["cell_ID"] = -1
     P["surface_ID"] = -1
     P["event"] = -1
+    P["xs_cache_flag"] = 0
+    P["boundary_cache_flag"] = False
     return True
 
 
+# Census and source banks are in the layout selected by setting bank_layout
+
+
+@njit
+def get_bank_record(P_rec_arr, bank, idx):
+    if BANK_SOA:
+        P_rec = P_rec_arr[0]
+        particles = bank["particles"]
+        for name in literal_unroll(BANK_SOA_FIELDS):
+            P_rec[name] = particles[name][idx]
+    else:
+        copy_recordlike(P_rec_arr, bank["particles"][idx : idx + 1])
+
+
+@njit
+def set_bank_record(bank, idx, P_rec_arr):
+    if BANK_SOA:
+        P_rec = P_rec_arr[0]
+        particles = bank["particles"]
+        for name in literal_unroll(BANK_SOA_FIELDS):
+            particles[name][idx] = P_rec[name]
+    else:
+        copy_recordlike(bank["particles"][idx : idx + 1], P_rec_arr)
+
+
+@njit
+def add_bank_record(P_arr, bank):
+    idx = add_bank_size(bank, 1)
+
+    # Check if bank is full
+    if idx >= bank["particles"]["w"].shape[0]:
+        full_bank_print(bank)
+
+    # Set particle
+    set_bank_record(bank, idx, P_arr)
+
+
+@njit
+def get_bank_records(bank, N):
+    """
+    Copy the first N bank particles into an array of particle records
+    """
+    if BANK_SOA:
+        records = np.zeros(N, type_.particle_record)
+        particles = bank["particles"]
+        for name in literal_unroll(BANK_SOA_FIELDS):
+            records[name][:] = particles[name][:N]
+        return records
+    else:
+        return bank["particles"][:N].copy()
+
+
+@njit
+def set_bank_records(bank, records, N):
+    """
+    Set the bank particles to the first N records of an array of particle records
+    """
+    set_bank_size(bank, N)
+    if BANK_SOA:
+        particles = bank["particles"]
+        for name in literal_unroll(BANK_SOA_FIELDS):
+            particles[name][:N] = records[name][:N]
+    else:
+        bank["particles"][:N] = records[:N]
+
+
+@njit
+def copy_bank(bank_dst, bank_src):
+    N = get_bank_size(bank_src)
+    set_bank_size(bank_dst, N)
+    if BANK_SOA:
+        particles_dst = bank_dst["particles"]
+        particles_src = bank_src["particles"]
+        for name in literal_unroll(BANK_SOA_FIELDS):
+            particles_dst[name][:N] = particles_src[name][:N]
+    else:
+        bank_dst["particles"][:N] = bank_src["particles"][:N]
+
+
+@njit
+def sort_bank(bank):
+    """
+    Sort the bank particles by their random number seeds
+
+    The seeds are set by the particle histories alone, so the order does not
+    depend on the order in which the particles were banked.
+    """
+    N = get_bank_size(bank)
+    records = get_bank_records(bank, N)
+    idx = np.argsort(records["rng_seed"])
+    set_bank_records(bank, records[idx], N)
+
+
 @njit
 def manage_particle_banks(seed, mcdc):
     # Record time
@@ -1055,11 +1182,7 @@ def manage_particle_banks(seed, mcdc):
         population_control(seed, mcdc)
     else:
         # Swap census and source bank
-        size = get_bank_size(mcdc["bank_census"])
-        set_bank_size(mcdc["bank_source"], size)
-        mcdc["bank_source"]["particles"][:size] = mcdc["bank_census"]["particles"][
-            :size
-        ]
+        copy_bank(mcdc["bank_source"], mcdc["bank_census"])
 
     # MPI rebalance
     if not mcdc["technique"]["domain_decomposition"]:
@@ -1141,10 +1264,11 @@ def bank_scanning(bank, mcdc):
         MPI.COMM_WORLD.Exscan(np.array([N_local]), buff, MPI.SUM)
     idx_start = buff[0]
 
-    # Global size
+    # Global size (from the last rank)
     buff[0] += N_local
+    root = mcdc["mpi_size"] - 1
     with objmode():
-        MPI.COMM_WORLD.Bcast(buff, mcdc["mpi_size"] - 1)
+        MPI.COMM_WORLD.Bcast(buff, root)
     N_global = buff[0]
 
     return idx_start, N_local, N_global
@@ -1155,8 +1279,7 @@ def bank_scanning_weight(bank, mcdc):
     # Local weight CDF
     N_local = get_bank_size(bank)
     w_cdf = np.zeros(N_local + 1)
-    for i in range(N_local):
-        w_cdf[i + 1] = w_cdf[i] + bank["particles"][i]["w"]
+    w_cdf[1:] = np.cumsum(bank["particles"]["w"][:N_local])
     W_local = w_cdf[-1]
 
     # Starting weight
@@ -1166,10 +1289,11 @@ def bank_scanning_weight(bank, mcdc):
     w_start = buff[0]
     w_cdf += w_start
 
-    # Global weight
+    # Global weight (from the last rank)
     buff[0] = w_cdf[-1]
+    root = mcdc["mpi_size"] - 1
     with objmode():
-        MPI.COMM_WORLD.Bcast(buff, mcdc["mpi_size"] - 1)
+        MPI.COMM_WORLD.Bcast(buff, root)
     W_global = buff[0]
 
     return w_start, w_cdf, W_global
@@ -1191,10 +1315,11 @@ def bank_scanning_DNP(bank, mcdc):
         MPI.COMM_WORLD.Exscan(np.array([N_local]), buff, MPI.SUM)
     idx_start = buff[0]
 
-    # Global size
+    # Global size (from the last rank)
     buff[0] += N_local
+    root = mcdc["mpi_size"] - 1
     with objmode():
-        MPI.COMM_WORLD.Bcast(buff, mcdc["mpi_size"] - 1)
+        MPI.COMM_WORLD.Bcast(buff, root)
     N_global = buff[0]
 
     return idx_start, N_local, N_global
@@ -1206,16 +1331,17 @@ def normalize_weight(bank, norm):
     W = total_weight(bank)
 
     # Normalize weight
-    for P in bank["particles"]:
-        P["w"] *= norm / W
+    N = get_bank_size(bank)
+    bank["particles"]["w"][:N] *= norm / W
 
 
 @njit
 def total_weight(bank):
     # Local total weight
     W_local = np.zeros(1)
+    w = bank["particles"]["w"]
     for i in range(get_bank_size(bank)):
-        W_local[0] += bank["particles"][i]["w"]
+        W_local[0] += w[i]
 
     # MPI Allreduce
     buff = np.zeros(1, np.float64)
@@ -1246,79 +1372,132 @@ def bank_rebalance(mcdc):
     idx_start, N_local, N = bank_scanning(mcdc["bank_source"], mcdc)
     idx_end = idx_start + N_local
 
-    distribute_work(N, mcdc)
+    if mcdc["setting"]["cost_weighted_rebalance"]:
+        distribute_work_cost(N, mcdc)
+    else:
+        distribute_work(N, mcdc)
 
     # Rebalance not needed if there is only one rank
     if mcdc["mpi_size"] <= 1:
         return
 
     # Some constants
+    size = mcdc["mpi_size"]
     work_start = mcdc["mpi_work_start"]
-    work_end = work_start + mcdc["mpi_work_size"]
-    left = mcdc["mpi_rank"] - 1
-    right = mcdc["mpi_rank"] + 1
+    work_size = mcdc["mpi_work_size"]
+    work_end = work_start + work_size
+
+    # Current and assigned particle index ranges of all ranks
+    ranges_local = np.zeros(4, np.int64)
+    ranges_local[0] = idx_start
+    ranges_local[1] = idx_end
+    ranges_local[2] = work_start
+    ranges_local[3] = work_end
+    ranges = np.zeros(4 * size, np.int64)
+    with objmode():
+        MPI.COMM_WORLD.Allgather(ranges_local, ranges)
 
-    # Need more or less?
-    more_left = idx_start < work_start
-    less_left = idx_start > work_start
-    more_right = idx_end > work_end
-    less_right = idx_end < work_end
+    # Particles sent to and received from each rank
+    send_counts, send_displs, recv_counts, recv_displs = rebalance_counts(
+        ranges, mcdc["mpi_rank"]
+    )
 
-    # Offside?
-    offside_left = idx_end <= work_start
-    offside_right = idx_start >= work_end
+    # MPI all-to-all exchange
+    records = get_bank_records(mcdc["bank_source"], N_local)
+    buff = np.zeros(work_size, dtype=type_.particle_record)
+    with objmode():
+        MPI.COMM_WORLD.Alltoallv(
+            [records, (send_counts, send_displs), type_.particle_record_mpi],
+            [buff, (recv_counts, recv_displs), type_.particle_record_mpi],
+        )
 
-    # MPI nearest-neighbor send/receive
-    buff = np.zeros(
-        mcdc["bank_source"]["particles"].shape[0], dtype=type_.particle_record
-    )
+    # Set source bank from buffer
+    set_bank_records(mcdc["bank_source"], buff, work_size)
 
-    with objmode(size="int64"):
-        # Create MPI-supported numpy object
-        size = get_bank_size(mcdc["bank_source"])
-        bank = np.array(mcdc["bank_source"]["particles"][:size])
-
-        # If offside, need to receive first
-        if offside_left:
-            # Receive from right
-            bank = np.append(bank, MPI.COMM_WORLD.recv(source=right))
-            less_right = False
-        if offside_right:
-            # Receive from left
-            bank = np.insert(bank, 0, MPI.COMM_WORLD.recv(source=left))
-            less_left = False
-
-        # Send
-        if more_left:
-            n = work_start - idx_start
-            request_left = MPI.COMM_WORLD.isend(bank[:n], dest=left)
-            bank = bank[n:]
-        if more_right:
-            n = idx_end - work_end
-            request_right = MPI.COMM_WORLD.isend(bank[-n:], dest=right)
-            bank = bank[:-n]
-
-        # Receive
-        if less_left:
-            bank = np.insert(bank, 0, MPI.COMM_WORLD.recv(source=left))
-        if less_right:
-            bank = np.append(bank, MPI.COMM_WORLD.recv(source=right))
-
-        # Wait until sent massage is received
-        if more_left:
-            request_left.Wait()
-        if more_right:
-            request_right.Wait()
-
-        # Set output buffer
-        size = bank.shape[0]
+
+@njit
+def rebalance_counts(ranges, rank):
+    """
+    Alltoallv counts and displacements of the bank rebalance of a rank
+
+    The ranges hold the current and the assigned particle index ranges of all
+    ranks, [start, end, work_start, work_end] for each. The particles sent to
+    and received from each rank are the overlaps of the ranges.
+    """
+    size = len(ranges) // 4
+    idx_start, idx_end, work_start, work_end = ranges[4 * rank : 4 * rank + 4]
+
+    send_counts = np.zeros(size, np.int64)
+    recv_counts = np.zeros(size, np.int64)
+    for i in range(size):
+        i_start, i_end, i_work_start, i_work_end = ranges[4 * i : 4 * i + 4]
+        send_counts[i] = max(0, min(idx_end, i_work_end) - max(idx_start, i_work_start))
+        recv_counts[i] = max(0, min(work_end, i_end) - max(work_start, i_start))
+    send_displs = np.zeros(size, np.int64)
+    recv_displs = np.zeros(size, np.int64)
+    send_displs[1:] = np.cumsum(send_counts)[:-1]
+    recv_displs[1:] = np.cumsum(recv_counts)[:-1]
+
+    return send_counts, send_displs, recv_counts, recv_displs
+
+
+@njit
+def distribute_work_cost(N, mcdc):
+    """
+    Distribute the work in proportion to the speeds of the ranks, the inverses
+    of their measured times per history
+    """
+    size = mcdc["mpi_size"]
+    rank = mcdc["mpi_rank"]
+
+    # Gather the measured costs
+    cost_local = np.zeros(1, np.float64)
+    cost_local[0] = mcdc["mpi_work_cost"]
+    cost = np.zeros(size, np.float64)
+    with objmode():
+        MPI.COMM_WORLD.Allgather(cost_local, cost)
+
+    capacity = mcdc["bank_source"]["particles"]["w"].shape[0]
+    bounds = work_bounds_cost(N, cost, capacity)
+
+    mcdc["mpi_work_start"] = bounds[rank]
+    mcdc["mpi_work_size"] = bounds[rank + 1] - bounds[rank]
+    mcdc["mpi_work_size_total"] = N
+
+
+@njit
+def work_bounds_cost(N, cost, capacity):
+    """
+    Work boundaries of the ranks in proportion to their speeds, the inverses
+    of the given costs
+
+    Ranks without a measured cost (zero) get the mean cost. Fall back to the
+    even distribution if no cost is measured or a share exceeds the source
+    bank capacity.
+    """
+    size = len(cost)
+    bounds = np.zeros(size + 1, np.int64)
+
+    measured = cost > 0.0
+    if np.any(measured):
+        cost = cost.copy()
+        cost[~measured] = np.mean(cost[measured])
+
+        # Work boundaries from the cumulative speeds
+        speed_cdf = np.cumsum(1.0 / cost)
         for i in range(size):
-            buff[i] = bank[i]
+            bounds[i + 1] = math.floor(N * speed_cdf[i] / speed_cdf[-1] + 0.5)
 
-    # Set source bank from buffer
-    set_bank_size(mcdc["bank_source"], size)
+        # Source bank capacity
+        if np.max(bounds[1:] - bounds[:-1]) <= capacity:
+            return bounds
+
+    # Even distribution (the remainder goes to the first ranks)
     for i in range(size):
-        mcdc["bank_source"]["particles"][i] = buff[i]
+        bounds[i + 1] = bounds[i] + N // size
+        if i < N % size:
+            bounds[i + 1] += 1
+    return bounds
 
 
 @njit
@@ -1533,13 +1712,20 @@ def pct_combing(seed, mcdc):
 
     P_rec_arr = adapt.local_array(1, type_.particle_record)
     P_rec = P_rec_arr[0]
+    P_census_arr = adapt.local_array(1, type_.particle_record)
+    idx_census = -1
 
     # Locally sample particles from census bank
     set_bank_size(bank_source, 0)
     for i in range(tooth_start, tooth_end):
         tooth = i * td + offset
         idx = math.floor(tooth) - idx_start
-        split_as_record(P_rec_arr, bank_census["particles"][idx : idx + 1])
+
+        # Get the census particle (teeth may hit the same particle)
+        if idx != idx_census:
+            get_bank_record(P_census_arr, bank_census, idx)
+            idx_census = idx
+        split_as_record(P_rec_arr, P_census_arr)
         # Set weight
         P_rec["w"] *= td
         adapt.add_source(P_rec_arr, mcdc)
@@ -1573,6 +1759,8 @@ def pct_combing_weight(seed, mcdc):
 
     P_rec_arr = adapt.local_array(1, type_.particle_record)
     P_rec = P_rec_arr[0]
+    P_census_arr = adapt.local_array(1, type_.particle_record)
+    idx_census = -1
 
     # Locally sample particles from census bank
     set_bank_size(bank_source, 0)
@@ -1580,7 +1768,12 @@ def pct_combing_weight(seed, mcdc):
     for i in range(tooth_start, tooth_end):
         tooth = i * td + offset
         idx += binary_search(tooth, w_cdf[idx:])
-        split_as_record(P_rec_arr, bank_census["particles"][idx : idx + 1])
+
+        # Get the census particle (teeth may hit the same particle)
+        if idx != idx_census:
+            get_bank_record(P_census_arr, bank_census, idx)
+            idx_census = idx
+        split_as_record(P_rec_arr, P_census_arr)
         # Set weight
         P_rec["w"] = td
         adapt.add_source(P_rec_arr, mcdc)
@@ -1607,25 +1800,29 @@ def pct_splitting_roulette(seed, mcdc):
 
     P_rec_arr = adapt.local_array(1, type_.particle_record)
     P_rec = P_rec_arr[0]
+    P_census_arr = adapt.local_array(1, type_.particle_record)
 
     # Perform split-roulette to all particles in local bank
     set_bank_size(bank_source, 0)
     for idx in range(N_local):
+        # Get the census particle
+        get_bank_record(P_census_arr, bank_census, idx)
+
         # Weight of the surviving particles
-        w = bank_census["particles"][idx]["w"]
+        w = P_census_arr[0]["w"]
         w_survive = w * ws
 
         # Determine number of guaranteed splits
         N_split = math.floor(sn)
 
         # Survive the russian roulette?
-        xi = rng(bank_census["particles"][idx : idx + 1])
+        xi = rng(P_census_arr)
         if xi < sn - N_split:
             N_split += 1
 
         # Split the particle
         for i in range(N_split):
-            split_as_record(P_rec_arr, bank_census["particles"][idx : idx + 1])
+            split_as_record(P_rec_arr, P_census_arr)
             # Set weight
             P_rec["w"] = w_survive
             adapt.add_source(P_rec_arr, mcdc)
@@ -1650,25 +1847,29 @@ def pct_splitting_roulette_weight(seed, mcdc):
 
     P_rec_arr = adapt.local_array(1, type_.particle_record)
     P_rec = P_rec_arr[0]
+    P_census_arr = adapt.local_array(1, type_.particle_record)
 
     # Perform split-roulette to all particles in local bank
     set_bank_size(bank_source, 0)
     for idx in range(N_local):
+        # Get the census particle
+        get_bank_record(P_census_arr, bank_census, idx)
+
         # Splitting number
-        w = bank_census["particles"][idx]["w"]
+        w = P_census_arr[0]["w"]
         sn = w / w_survive
 
         # Determine number of guaranteed splits
         N_split = math.floor(sn)
 
         # Survive the russian roulette?
-        xi = rng(bank_census["particles"][idx : idx + 1])
+        xi = rng(P_census_arr)
         if xi < sn - N_split:
             N_split += 1
 
         # Split the particle
         for i in range(N_split):
-            split_as_record(P_rec_arr, bank_census["particles"][idx : idx + 1])
+            split_as_record(P_rec_arr, P_census_arr)
             # Set weight
             P_rec["w"] = w_survive
             adapt.add_source(P_rec_arr, mcdc)
@@ -1728,19 +1929,28 @@ def copy_particle(P_new_arr, P_arr):
     P_new["event"] = P["event"]
     P_new["rng_seed"] = P["rng_seed"]
     P_new["iqmc"]["w"] = P["iqmc"]["w"]
+    P_new["xs_cache_flag"] = 0
+    P_new["boundary_cache_flag"] = False
 
 
 @njit
 def recordlike_to_particle(P_new_arr, P_rec_arr):
-    P_new = P_new_arr[0]
-    P_rec = P_rec_arr[0]
     copy_recordlike(P_new_arr, P_rec_arr)
-    P_new["fresh"] = True
-    P_new["alive"] = True
-    P_new["material_ID"] = -1
-    P_new["cell_ID"] = -1
-    P_new["surface_ID"] = -1
-    P_new["event"] = -1
+    init_particle_state(P_new_arr)
+
+
+@njit
+def init_particle_state(P_arr):
+    # Set the particle-only attributes of a new particle
+    P = P_arr[0]
+    P["fresh"] = True
+    P["alive"] = True
+    P["material_ID"] = -1
+    P["cell_ID"] = -1
+    P["surface_ID"] = -1
+    P["event"] = -1
+    P["xs_cache_flag"] = 0
+    P["boundary_cache_flag"] = False
 
 
 @njit
@@ -1798,7 +2008,6 @@ def mesh_get_energy_index(P_arr, mesh, mode_MG):
 @njit
 def score_mesh_tally(P_arr, distance, tally, data, mcdc):
     P = P_arr[0]
-    tally_bin = data[TALLY]
     material = mcdc["materials"][P["material_ID"]]
     mesh = tally["filter"]
     stride = tally["stride"]
@@ -1890,20 +2099,7 @@ def score_mesh_tally(P_arr, distance, tally, data, mcdc):
 
         # Score
         flux = distance_scored * P["w"]
-        for i in range(tally["N_score"]):
-            score_type = tally["scores"][i]
-            score = 0
-            if score_type == SCORE_FLUX:
-                score = flux
-            elif score_type == SCORE_DENSITY:
-                score = flux * ut
-            elif score_type == SCORE_TOTAL:
-                SigmaT = get_MacroXS(XS_TOTAL, material, P_arr, mcdc)
-                score = flux * SigmaT
-            elif score_type == SCORE_FISSION:
-                SigmaF = get_MacroXS(XS_FISSION, material, P_arr, mcdc)
-                score = flux * SigmaF
-            adapt.global_add(tally_bin, (TALLY_SCORE, idx + i), round(score))
+        score_mesh_tally_bin(P_arr, flux, ut, idx, material, tally, data, mcdc)
 
         # Accumulate distance swept
         distance_swept += distance_scored
@@ -1955,12 +2151,64 @@ def score_mesh_tally(P_arr, distance, tally, data, mcdc):
             idx += stride["t"]
 
 
+@njit
+def score_mesh_tally_collision(P_arr, distance, tally, data, mcdc):
+    # Collision estimator: score the flux `distance` * w at the particle bin
+    P = P_arr[0]
+    material = mcdc["materials"][P["material_ID"]]
+    mesh = tally["filter"]
+    stride = tally["stride"]
+
+    # Tally bin indices
+    mu, azi = mesh_get_angular_index(P_arr, mesh)
+    g, outside_energy = mesh_get_energy_index(P_arr, mesh, mcdc["setting"]["mode_MG"])
+    ix, iy, iz, it, outside = mesh_.structured.get_indices(P_arr, mesh)
+
+    # Outside grid?
+    if outside or outside_energy:
+        return
+
+    # The tally index
+    idx = (
+        stride["tally"]
+        + mu * stride["mu"]
+        + azi * stride["azi"]
+        + g * stride["g"]
+        + it * stride["t"]
+        + ix * stride["x"]
+        + iy * stride["y"]
+        + iz * stride["z"]
+    )
+
+    # Score
+    flux = distance * P["w"]
+    ut = 1.0 / physics.get_speed(P_arr, mcdc)
+    score_mesh_tally_bin(P_arr, flux, ut, idx, material, tally, data, mcdc)
+
+
+@njit
+def score_mesh_tally_bin(P_arr, flux, ut, idx, material, tally, data, mcdc):
+    for i in range(tally["N_score"]):
+        score_type = tally["scores"][i]
+        score = 0
+        if score_type == SCORE_FLUX:
+            score = flux
+        elif score_type == SCORE_DENSITY:
+            score = flux * ut
+        elif score_type == SCORE_TOTAL:
+            SigmaT = get_MacroXS(XS_TOTAL, material, P_arr, mcdc)
+            score = flux * SigmaT
+        elif score_type == SCORE_FISSION:
+            SigmaF = get_MacroXS(XS_FISSION, material, P_arr, mcdc)
+            score = flux * SigmaF
+        score_tally_bin(data, idx + i, score)
+
+
 @njit
 def score_surface_tally(P_arr, surface, tally, data, mcdc):
     # TODO: currently not supporting filters
     P = P_arr[0]
 
-    tally_bin = data[TALLY]
     stride = tally["stride"]
 
     # The tally index
@@ -1977,7 +2225,22 @@ def score_surface_tally(P_arr, surface, tally, data, mcdc):
             score = flux
         elif score_type == SCORE_NET_CURRENT:
             score = flux * mu
-        adapt.global_add(tally_bin, (TALLY_SCORE, idx + i), round(score))
+        score_tally_bin(data, idx + i, score)
+
+
+@njit
+def score_tally_bin(data, idx, score):
+    if score == 0.0:
+        return
+
+    tally_bin = data[TALLY]
+    score_old = adapt.global_add(tally_bin, (TALLY_SCORE, idx), round(score))
+
+    # Register the bin as dirty if it is freshly touched
+    if score_old == 0.0:
+        idx_dirty = adapt.global_add(data[TALLY_DIRTY_SIZE], 0, 1)
+        if idx_dirty < len(data[TALLY_DIRTY]):
+            data[TALLY_DIRTY][idx_dirty] = idx
 
 
 @njit
@@ -1985,6 +2248,10 @@ def tally_reduce(data, mcdc):
     tally_bin = data[TALLY]
     N_bin = tally_bin.shape[1]
 
+    # Reduced scores may come from bins not touched locally;
+    # force a full sweep in the next accumulation
+    data[TALLY_DIRTY_SIZE][0] = N_bin + 1
+
     # Normalize
     N_particle = mcdc["setting"]["N_particle"]
     for i in range(N_bin):
@@ -1998,49 +2265,114 @@ def tally_reduce(data, mcdc):
         tally_bin[TALLY_SCORE][:] = buff
 
 
+@njit
+def tally_reduce_threads(data_arr):
+    """
+    Reduce the thread-private tally copies into the first one, and reset them
+    """
+    tally_bin = data_arr[0][TALLY]
+    N_bin = tally_bin.shape[1]
+    for i in range(1, len(data_arr)):
+        tally_bin_thread = data_arr[i][TALLY]
+        for j in range(tally_bin.shape[0]):
+            for k in range(N_bin):
+                tally_bin[j, k] += tally_bin_thread[j, k]
+                tally_bin_thread[j, k] = 0.0
+        data_arr[i][TALLY_DIRTY_SIZE][0] = 0
+
+    # The reduced scores may come from bins not touched by the first thread;
+    # force a full sweep in the next accumulation
+    if len(data_arr) > 1:
+        data_arr[0][TALLY_DIRTY_SIZE][0] = N_bin + 1
+
+
 @njit
 def tally_accumulate(data, mcdc):
+    tally_accumulate_group(data, 1, mcdc)
+
+
+@njit
+def tally_accumulate_group(data, N_history, mcdc):
+    # Accumulate the scores of a group of N_history histories
     tally_bin = data[TALLY]
     N_bin = tally_bin.shape[1]
+    N_dirty = data[TALLY_DIRTY_SIZE][0]
 
-    for i in range(N_bin):
-        # Accumulate score and square of score into sum and sum_sq
-        score = tally_bin[TALLY_SCORE, i]
-        tally_bin[TALLY_SUM, i] += score
-        tally_bin[TALLY_SUM_SQ, i] += score * score
+    # Only sweep the touched bins, unless the dirty list overflowed
+    if N_dirty <= N_bin:
+        for j in range(N_dirty):
+            tally_accumulate_bin(tally_bin, data[TALLY_DIRTY][j], N_history)
+    else:
+        for i in range(N_bin):
+            tally_accumulate_bin(tally_bin, i, N_history)
 
-        # Reset score bin
-        tally_bin[TALLY_SCORE, i] = 0.0
+    # Reset dirty list
+    data[TALLY_DIRTY_SIZE][0] = 0
+
+
+@njit
+def tally_accumulate_bin(tally_bin, i, N_history):
+    # Accumulate score and square of score into sum and sum_sq
+    #   (the square is weighted by the inverse of the group history count,
+    #    which gives the size-weighted batch statistics at closeout)
+    score = tally_bin[TALLY_SCORE, i]
+    tally_bin[TALLY_SUM, i] += score
+    tally_bin[TALLY_SUM_SQ, i] += score * score / N_history
+
+    # Reset score bin
+    tally_bin[TALLY_SCORE, i] = 0.0
+
+
+@njit
+def tally_accumulate_history(idx_work, work_size, data, mcdc):
+    # Accumulate once every group of histories, and at the end of the work
+    N_work = idx_work + 1
+    group_size = mcdc["setting"]["history_group_size"]
+    if N_work % group_size == 0 or N_work >= work_size:
+        N_history = N_work - (N_work - 1) // group_size * group_size
+        tally_accumulate_group(data, N_history, mcdc)
+        mcdc["tally_N_group"] += 1
 
 
 @njit
 def tally_closeout(data, mcdc):
     tally = data[TALLY]
     N_history = mcdc["setting"]["N_particle"]
+    N_group = N_history
 
     if mcdc["setting"]["N_batch"] > 1:
         N_history = mcdc["setting"]["N_batch"]
+        N_group = N_history
 
     elif mcdc["setting"]["mode_eigenvalue"]:
         N_history = mcdc["setting"]["N_active"]
+        N_group = N_history
 
-    elif not mcdc["technique"]["domain_decomposition"]:
-        # MPI Reduce
-        buff = np.zeros_like(tally[TALLY_SUM])
-        buff_sq = np.zeros_like(tally[TALLY_SUM_SQ])
-        with objmode():
-            MPI.COMM_WORLD.Reduce(tally[TALLY_SUM], buff, MPI.SUM, 0)
-            MPI.COMM_WORLD.Reduce(tally[TALLY_SUM_SQ], buff_sq, MPI.SUM, 0)
-        tally[TALLY_SUM] = buff
-        tally[TALLY_SUM_SQ] = buff_sq
+    else:
+        if not mcdc["technique"]["domain_decomposition"]:
+            # MPI Reduce
+            buff = np.zeros_like(tally[TALLY_SUM])
+            buff_sq = np.zeros_like(tally[TALLY_SUM_SQ])
+            with objmode():
+                MPI.COMM_WORLD.Reduce(tally[TALLY_SUM], buff, MPI.SUM, 0)
+                MPI.COMM_WORLD.Reduce(tally[TALLY_SUM_SQ], buff_sq, MPI.SUM, 0)
+            tally[TALLY_SUM] = buff
+            tally[TALLY_SUM_SQ] = buff_sq
+
+        # Grouped histories: the samples are the group means, weighted by the
+        #   group history counts (the squared group scores are accumulated
+        #   divided by the counts)
+        if mcdc["setting"]["history_group_size"] > 1:
+            N_group = mcdc["tally_N_group"]
+            if not mcdc["technique"]["domain_decomposition"]:
+                N_group = allreduce(N_group)
 
     # Calculate and store statistics
     #   sum --> mean
     #   sum_sq --> standard deviation
     tally[TALLY_SUM] = tally[TALLY_SUM] / N_history
     tally[TALLY_SUM_SQ] = np.sqrt(
-        (tally[TALLY_SUM_SQ] / N_history - np.square(tally[TALLY_SUM]))
-        / (N_history - 1)
+        (tally[TALLY_SUM_SQ] / N_history - np.square(tally[TALLY_SUM])) / (N_group - 1)
     )
 
 
@@ -2069,8 +2401,7 @@ def eigenvalue_tally(P_arr, distance, mcdc):
         # mcdc["eigenvalue_tally_n"][0] += n_density
         adapt.global_add(mcdc["eigenvalue_tally_n"], 0, round(n_density))
         # Maximum neutron density
-        if mcdc["n_max"] < n_density:
-            mcdc["n_max"] = n_density
+        adapt.global_max(mcdc["n_max"], 0, n_density)
 
         # Precursor density
         J = material["J"]
@@ -2092,15 +2423,14 @@ def eigenvalue_tally(P_arr, distance, mcdc):
                 ID_nuclide = material["nuclide_IDs"][i]
                 nuclide = mcdc["nuclides"][ID_nuclide]
                 for j in range(J):
-                    nu_d = get_nu_group(NU_FISSION_DELAYED, nuclide, E, j)
+                    nu_d = get_nu_group(NU_FISSION_DELAYED, nuclide, E, j, mcdc)
                     decay = nuclide["ce_decay"][j]
                     total += nu_d / decay
         C_density = flux * total * SigmaF / mcdc["k_eff"]
         # mcdc["eigenvalue_tally_C"][0] += C_density
         adapt.global_add(mcdc["eigenvalue_tally_C"], 0, round(C_density))
         # Maximum precursor density
-        if mcdc["C_max"] < C_density:
-            mcdc["C_max"] = C_density
+        adapt.global_max(mcdc["C_max"], 0, C_density)
 
 
 @njit
@@ -2124,11 +2454,11 @@ def eigenvalue_tally_closeout_history(mcdc):
             MPI.COMM_WORLD.Allreduce(
                 np.array(mcdc["eigenvalue_tally_n"]), buff_n, MPI.SUM
             )
-            MPI.COMM_WORLD.Allreduce(np.array([mcdc["n_max"]]), buff_nmax, MPI.MAX)
+            MPI.COMM_WORLD.Allreduce(np.array(mcdc["n_max"]), buff_nmax, MPI.MAX)
             MPI.COMM_WORLD.Allreduce(
                 np.array(mcdc["eigenvalue_tally_C"]), buff_C, MPI.SUM
             )
-            MPI.COMM_WORLD.Allreduce(np.array([mcdc["C_max"]]), buff_Cmax, MPI.MAX)
+            MPI.COMM_WORLD.Allreduce(np.array(mcdc["C_max"]), buff_Cmax, MPI.MAX)
             if mcdc["technique"]["IC_generator"]:
                 MPI.COMM_WORLD.Allreduce(
                     np.array(mcdc["technique"]["IC_fission_score"]),
@@ -2146,8 +2476,8 @@ def eigenvalue_tally_closeout_history(mcdc):
     tally_IC_fission = buff_IC_fission[0]
 
     # Maximum densities
-    mcdc["n_max"] = buff_nmax[0]
-    mcdc["C_max"] = buff_Cmax[0]
+    mcdc["n_max"][0] = buff_nmax[0]
+    mcdc["C_max"][0] = buff_Cmax[0]
 
     # Accumulate running average
     if mcdc["cycle_active"]:
@@ -2183,14 +2513,18 @@ def eigenvalue_tally_closeout_history(mcdc):
     if mcdc["setting"]["gyration_radius"]:
         # Center of mass
         N_local = get_bank_size(mcdc["bank_census"])
+        particles = mcdc["bank_census"]["particles"]
+        x = particles["x"]
+        y = particles["y"]
+        z = particles["z"]
+        w = particles["w"]
         total_local = np.zeros(4, np.float64)  # [x,y,z,W]
         total = np.zeros(4, np.float64)
         for i in range(N_local):
-            P = mcdc["bank_census"]["particles"][i]
-            total_local[0] += P["x"] * P["w"]
-            total_local[1] += P["y"] * P["w"]
-            total_local[2] += P["z"] * P["w"]
-            total_local[3] += P["w"]
+            total_local[0] += x[i] * w[i]
+            total_local[1] += y[i] * w[i]
+            total_local[2] += z[i] * w[i]
+            total_local[3] += w[i]
         # MPI Allreduce
         with objmode():
             MPI.COMM_WORLD.Allreduce(total_local, total, MPI.SUM)
@@ -2206,36 +2540,27 @@ def eigenvalue_tally_closeout_history(mcdc):
         gr_type = mcdc["setting"]["gyration_radius_type"]
         if gr_type == GYRATION_RADIUS_ALL:
             for i in range(N_local):
-                P = mcdc["bank_census"]["particles"][i]
                 rms_local[0] += (
-                    (P["x"] - com_x) ** 2
-                    + (P["y"] - com_y) ** 2
-                    + (P["z"] - com_z) ** 2
-                ) * P["w"]
+                    (x[i] - com_x) ** 2 + (y[i] - com_y) ** 2 + (z[i] - com_z) ** 2
+                ) * w[i]
         elif gr_type == GYRATION_RADIUS_INFINITE_X:
             for i in range(N_local):
-                P = mcdc["bank_census"]["particles"][i]
-                rms_local[0] += ((P["y"] - com_y) ** 2 + (P["z"] - com_z) ** 2) * P["w"]
+                rms_local[0] += ((y[i] - com_y) ** 2 + (z[i] - com_z) ** 2) * w[i]
         elif gr_type == GYRATION_RADIUS_INFINITE_Y:
             for i in range(N_local):
-                P = mcdc["bank_census"]["particles"][i]
-                rms_local[0] += ((P["x"] - com_x) ** 2 + (P["z"] - com_z) ** 2) * P["w"]
+                rms_local[0] += ((x[i] - com_x) ** 2 + (z[i] - com_z) ** 2) * w[i]
         elif gr_type == GYRATION_RADIUS_INFINITE_Z:
             for i in range(N_local):
-                P = mcdc["bank_census"]["particles"][i]
-                rms_local[0] += ((P["x"] - com_x) ** 2 + (P["y"] - com_y) ** 2) * P["w"]
+                rms_local[0] += ((x[i] - com_x) ** 2 + (y[i] - com_y) ** 2) * w[i]
         elif gr_type == GYRATION_RADIUS_ONLY_X:
             for i in range(N_local):
-                P = mcdc["bank_census"]["particles"][i]
-                rms_local[0] += ((P["x"] - com_x) ** 2) * P["w"]
+                rms_local[0] += ((x[i] - com_x) ** 2) * w[i]
         elif gr_type == GYRATION_RADIUS_ONLY_Y:
             for i in range(N_local):
-                P = mcdc["bank_census"]["particles"][i]
-                rms_local[0] += ((P["y"] - com_y) ** 2) * P["w"]
+                rms_local[0] += ((y[i] - com_y) ** 2) * w[i]
         elif gr_type == GYRATION_RADIUS_ONLY_Z:
             for i in range(N_local):
-                P = mcdc["bank_census"]["particles"][i]
-                rms_local[0] += ((P["z"] - com_z) ** 2) * P["w"]
+                rms_local[0] += ((z[i] - com_z) ** 2) * w[i]
 
         # MPI Allreduce
         with objmode():
@@ -2288,8 +2613,14 @@ def move_to_event(P_arr, data, mcdc):
     #   - Set surface ID (if surface hit)
     #   - Set particle boundary event (surface or lattice crossing, or lost)
     #   - Return distance to boundary (surface or lattice)
+    #   (Delta tracking only inspects the top cell boundary)
 
-    d_boundary = geometry.inspect_geometry(P_arr, mcdc)
+    if mcdc["setting"]["surface_distance_cache"]:
+        d_boundary = geometry.inspect_geometry_cached(P_arr, mcdc)
+    elif mcdc["setting"]["delta_tracking"]:
+        d_boundary = geometry.inspect_geometry_top_cell(P_arr, mcdc)
+    else:
+        d_boundary = geometry.inspect_geometry(P_arr, mcdc)
 
     # Particle is lost?
     if P["event"] == EVENT_LOST:
@@ -2314,7 +2645,7 @@ def move_to_event(P_arr, data, mcdc):
     idx = mcdc["idx_census"]
     d_time_census = speed * (mcdc["setting"]["census_time"][idx] - P["t"])
 
-    # Distance to next collision
+    # Distance to next collision (tentative, if delta tracking)
     d_collision = distance_to_collision(P_arr, mcdc)
 
     # =========================================================================
@@ -2361,22 +2692,40 @@ def move_to_event(P_arr, data, mcdc):
     # =========================================================================
 
     # Score tracklength tallies
-    if mcdc["cycle_active"]:
-        for tally in mcdc["mesh_tallies"]:
-            score_mesh_tally(P_arr, distance, tally, data, mcdc)
-    if mcdc["setting"]["mode_eigenvalue"]:
-        eigenvalue_tally(P_arr, distance, mcdc)
+    #   (Delta tracking scores collision estimators at the tentative collisions)
+    if not mcdc["setting"]["delta_tracking"]:
+        if mcdc["cycle_active"]:
+            for tally in mcdc["mesh_tallies"]:
+                score_mesh_tally(P_arr, distance, tally, data, mcdc)
+        if mcdc["setting"]["mode_eigenvalue"]:
+            eigenvalue_tally(P_arr, distance, mcdc)
+
+    # Update boundary distance cache (invalid once a boundary is crossed)
+    if mcdc["setting"]["surface_distance_cache"]:
+        if P["event"] & (
+            EVENT_SURFACE_CROSSING | EVENT_LATTICE_CROSSING | EVENT_DOMAIN_CROSSING
+        ):
+            P["boundary_cache_flag"] = False
+        else:
+            P["boundary_cache_distance"] -= distance
 
     # Move particle
     move_particle(P_arr, distance, mcdc)
 
+    # Delta tracking: real or virtual collision?
+    if mcdc["setting"]["delta_tracking"] and P["event"] & EVENT_COLLISION:
+        delta_tracking_collision(P_arr, data, mcdc)
+
 
 @njit
 def distance_to_collision(P_arr, mcdc):
     P = P_arr[0]
-    # Get total cross-section
-    material = mcdc["materials"][P["material_ID"]]
-    SigmaT = get_MacroXS(XS_TOTAL, material, P_arr, mcdc)
+    # Get total cross-section (majorant if delta tracking)
+    if mcdc["setting"]["delta_tracking"]:
+        SigmaT = get_majorant_xs(P_arr, mcdc)
+    else:
+        material = mcdc["materials"][P["material_ID"]]
+        SigmaT = get_MacroXS(XS_TOTAL, material, P_arr, mcdc)
 
     # Vacuum material?
     if SigmaT == 0.0:
@@ -2388,6 +2737,61 @@ def distance_to_collision(P_arr, mcdc):
     return distance
 
 
+# =============================================================================
+# Delta tracking
+# =============================================================================
+
+
+@njit
+def get_majorant_xs(P_arr, mcdc):
+    P = P_arr[0]
+
+    # Multigroup
+    if mcdc["setting"]["mode_MG"]:
+        return mcdc["majorant_xs"][P["g"]]
+
+    # Continuous energy: bound over the unionized energy grid bin
+    idx = get_union_index(P["E"], mcdc)
+    if idx >= 0 and idx < mcdc["NE_union"] - 1:
+        return mcdc["majorant_xs"][idx]
+
+    # Outside the grid (extrapolated XS): maximum over the materials
+    SigmaM = 0.0
+    for material in mcdc["materials"]:
+        SigmaM = max(SigmaM, get_MacroXS(XS_TOTAL, material, P_arr, mcdc))
+    return SigmaM
+
+
+@njit
+def delta_tracking_collision(P_arr, data, mcdc):
+    """
+    Locate the tentative collision, score the collision estimators, and
+    reject the collision (virtual) with probability 1 - SigmaT / SigmaM
+    """
+    P = P_arr[0]
+
+    # Locate the particle (within the known top cell)
+    if not geometry.locate_particle(P_arr, mcdc):
+        P["event"] = EVENT_LOST
+        return
+    material = mcdc["materials"][P["material_ID"]]
+    SigmaM = get_majorant_xs(P_arr, mcdc)
+    SigmaT = get_MacroXS(XS_TOTAL, material, P_arr, mcdc)
+
+    # Score collision estimators (flux w / SigmaM at all tentative collisions)
+    if mcdc["cycle_active"]:
+        for tally in mcdc["mesh_tallies"]:
+            score_mesh_tally_collision(P_arr, 1.0 / SigmaM, tally, data, mcdc)
+    if mcdc["setting"]["mode_eigenvalue"]:
+        eigenvalue_tally(P_arr, 1.0 / SigmaM, mcdc)
+
+    # Virtual collision
+    if rng(P_arr) * SigmaM >= SigmaT:
+        P["event"] -= EVENT_COLLISION
+        if P["event"] == 0:
+            P["event"] = EVENT_NONE
+
+
 # =============================================================================
 # Surface crossing
 # =============================================================================
@@ -2410,7 +2814,17 @@ def surface_crossing(P_arr, data, prog):
 
     # Need to check new cell later?
     if P["alive"] and not surface["BC"] == BC_REFLECTIVE:
-        P["cell_ID"] = -1
+        if mcdc["setting"]["cell_neighbor_size"] > 0 and P["cell_ID"] > -1:
+            # Find the new cell, starting from the neighbors across the surface
+            P["cell_ID"] = geometry.get_cell_across_surface(
+                P_arr, P["cell_ID"], P["surface_ID"], mcdc
+            )
+        else:
+            P["cell_ID"] = -1
+
+        # Delta tracking: the material is located at the next flight
+        if mcdc["setting"]["delta_tracking"]:
+            P["material_ID"] = -1
 
 
 # =============================================================================
@@ -2574,12 +2988,14 @@ def scattering_CE(P_arr, material, P_new_arr, mcdc):
     # Sample nuclide
     nuclide = sample_nuclide(material, P_arr, XS_SCATTER, mcdc)
     xi = rng(P_arr) * get_MacroXS(XS_SCATTER, material, P_arr, mcdc)
+    idx_union = get_union_index(P["E"], mcdc)
     tot = 0.0
     for i in range(material["N_nuclide"]):
         ID_nuclide = material["nuclide_IDs"][i]
         nuclide = mcdc["nuclides"][ID_nuclide]
         N = material["nuclide_densities"][i]
-        tot += N * get_microXS(XS_SCATTER, nuclide, P["E"])
+        idx = get_nuclide_index(nuclide, idx_union, mcdc)
+        tot += N * get_microXS_at(XS_SCATTER, nuclide, P["E"], idx, mcdc)
         if tot > xi:
             break
 
@@ -2752,7 +3168,7 @@ def fission(P_arr, prog):
     else:
         nuclide = sample_nuclide(material, P_arr, XS_FISSION, mcdc)
         E = P["E"]
-        nu = get_nu(NU_FISSION, nuclide, E)
+        nu = get_nu(NU_FISSION, nuclide, E, mcdc)
     N = int(math.floor(weight_eff * nu / mcdc["k_eff"] + rng(P_arr)))
 
     P_new_arr = adapt.local_array(1, type_.particle_record)
@@ -2883,7 +3299,7 @@ def sample_phasespace_fission_nuclide(P_arr, nuclide, P_new_arr, mcdc):
     if mcdc["setting"]["mode_MG"]:
         fission_MG(P_arr, nuclide, P_new_arr)
     else:
-        fission_CE(P_arr, nuclide, P_new_arr)
+        fission_CE(P_arr, nuclide, P_new_arr, mcdc)
 
 
 @njit
@@ -2932,17 +3348,17 @@ def fission_MG(P_arr, nuclide, P_new_arr):
 
 
 @njit
-def fission_CE(P_arr, nuclide, P_new_arr):
+def fission_CE(P_arr, nuclide, P_new_arr, mcdc):
     P_new = P_new_arr[0]
     P = P_arr[0]
     # Get constants
     E = P["E"]
     J = 6
-    nu = get_nu(NU_FISSION, nuclide, E)
-    nu_p = get_nu(NU_FISSION_PROMPT, nuclide, E)
+    nu = get_nu(NU_FISSION, nuclide, E, mcdc)
+    nu_p = get_nu(NU_FISSION_PROMPT, nuclide, E, mcdc)
     nu_d = adapt.local_array(J, type_.float64)
     for j in range(J):
-        nu_d[j] = get_nu_group(NU_FISSION_DELAYED, nuclide, E, j)
+        nu_d[j] = get_nu_group(NU_FISSION_DELAYED, nuclide, E, j, mcdc)
 
     # Delayed?
     prompt = True
@@ -2961,54 +3377,68 @@ def fission_CE(P_arr, nuclide, P_new_arr):
 
     # Sample outgoing energy
     if prompt:
-        E_chi = nuclide["E_chi_p"]
-        NE_chi = nuclide["NE_chi_p"]
-        chi = nuclide["ce_chi_p"]
         P_new["E"] = sample_Eout(
-            P_new_arr, nuclide["E_chi_p"], nuclide["NE_chi_p"], nuclide["ce_chi_p"]
+            P_new_arr,
+            nuclide["E_chi_p_data_idx"],
+            nuclide["ce_chi_p_data_idx"],
+            nuclide["NE_chi_p"],
+            nuclide["chi_hash"][0],
+            mcdc,
         )
     else:
         if delayed_group == 0:
             P_new["E"] = sample_Eout(
                 P_new_arr,
-                nuclide["E_chi_d1"],
+                nuclide["E_chi_d1_data_idx"],
+                nuclide["ce_chi_d1_data_idx"],
                 nuclide["NE_chi_d1"],
-                nuclide["ce_chi_d1"],
+                nuclide["chi_hash"][1],
+                mcdc,
             )
         elif delayed_group == 1:
             P_new["E"] = sample_Eout(
                 P_new_arr,
-                nuclide["E_chi_d2"],
+                nuclide["E_chi_d2_data_idx"],
+                nuclide["ce_chi_d2_data_idx"],
                 nuclide["NE_chi_d2"],
-                nuclide["ce_chi_d2"],
+                nuclide["chi_hash"][2],
+                mcdc,
             )
         elif delayed_group == 2:
             P_new["E"] = sample_Eout(
                 P_new_arr,
-                nuclide["E_chi_d3"],
+                nuclide["E_chi_d3_data_idx"],
+                nuclide["ce_chi_d3_data_idx"],
                 nuclide["NE_chi_d3"],
-                nuclide["ce_chi_d3"],
+                nuclide["chi_hash"][3],
+                mcdc,
             )
         elif delayed_group == 3:
             P_new["E"] = sample_Eout(
                 P_new_arr,
-                nuclide["E_chi_d4"],
+                nuclide["E_chi_d4_data_idx"],
+                nuclide["ce_chi_d4_data_idx"],
                 nuclide["NE_chi_d4"],
-                nuclide["ce_chi_d4"],
+                nuclide["chi_hash"][4],
+                mcdc,
             )
         elif delayed_group == 4:
             P_new["E"] = sample_Eout(
                 P_new_arr,
-                nuclide["E_chi_d5"],
+                nuclide["E_chi_d5_data_idx"],
+                nuclide["ce_chi_d5_data_idx"],
                 nuclide["NE_chi_d5"],
-                nuclide["ce_chi_d5"],
+                nuclide["chi_hash"][5],
+                mcdc,
             )
         else:
             P_new["E"] = sample_Eout(
                 P_new_arr,
-                nuclide["E_chi_d6"],
+                nuclide["E_chi_d6_data_idx"],
+                nuclide["ce_chi_d6_data_idx"],
                 nuclide["NE_chi_d6"],
-                nuclide["ce_chi_d6"],
+                nuclide["chi_hash"][6],
+                mcdc,
             )
 
     # Sample emission time
@@ -3133,6 +3563,339 @@ def weight_roulette(P_arr, mcdc):
         P["alive"] = False
 
 
+# =============================================================================
+# Event-based transport
+# =============================================================================
+# The in-flight particles are held in a structure-of-arrays pool, and each
+# event kernel sweeps over the pool particles awaiting the event. The kernels
+# draw the random numbers of each particle in the order of `step_particle`,
+# and the physics kernels that create secondaries (scattering and fission) and
+# the tallies work on a particle copied out of the pool, so the particle
+# histories are those of the history-based algorithm.
+
+
+@njit
+def pool_add_particle(pool, P_arr):
+    P = P_arr[0]
+    idx = pool["size"][0]
+    pool["size"][0] += 1
+    for name in literal_unroll(POOL_FIELDS):
+        pool[name][idx] = P[name]
+
+
+@njit
+def pool_get_particle(P_arr, pool, idx):
+    P = P_arr[0]
+    for name in literal_unroll(POOL_FIELDS):
+        P[name] = pool[name][idx]
+    P["xs_cache_flag"] = 0
+    P["boundary_cache_flag"] = False
+
+
+@njit
+def pool_set_particle(pool, idx, P_arr):
+    P = P_arr[0]
+    for name in literal_unroll(POOL_FIELDS):
+        pool[name][idx] = P[name]
+
+
+@njit
+def pool_rng(pool, idx):
+    seed = rng_(pool["rng_seed"][idx])
+    pool["rng_seed"][idx] = seed
+    return seed / RNG_MOD
+
+
+@njit
+def pool_refill(pool, P_arr, mcdc):
+    """
+    Move particles from the active bank into the pool until it is full
+    """
+    bank_active = mcdc["bank_active"][0]
+    N_max = pool["w"].shape[0]
+    while pool["size"][0] < N_max and get_bank_size(bank_active) > 0:
+        get_particle(P_arr, bank_active, mcdc)
+        pool_add_particle(pool, P_arr)
+
+
+@njit
+def pool_compact(pool):
+    """
+    Remove the terminated particles, keeping the order of the others
+    """
+    N = pool["size"][0]
+    alive = pool["alive"]
+    N_alive = 0
+    for i in range(N):
+        if alive[i]:
+            if N_alive < i:
+                for name in literal_unroll(POOL_FIELDS):
+                    pool[name][N_alive] = pool[name][i]
+            N_alive += 1
+    pool["size"][0] = N_alive
+
+
+@njit
+def pool_inspect_geometry(pool, P_arr, mcdc):
+    """
+    Locate the pool particles and set their boundary events and distances
+    (see move_to_event and geometry.inspect_geometry)
+
+    The boundary distances in material-filled top cells are computed on the
+    pool arrays. Particles to be located, and those in cells filled with
+    universes or lattices, are inspected on a particle copy.
+    """
+    P = P_arr[0]
+    cells = mcdc["cells"]
+    x = pool["x"]
+    y = pool["y"]
+    z = pool["z"]
+    ux = pool["ux"]
+    uy = pool["uy"]
+    uz = pool["uz"]
+    for i in range(pool["size"][0]):
+        # Locate the particle if the material is not identified yet
+        if pool["material_ID"][i] == -1:
+            pool_get_particle(P_arr, pool, i)
+            if not geometry.locate_particle(P_arr, mcdc):
+                pool["event"][i] = EVENT_LOST
+                pool["alive"][i] = False
+                continue
+            pool["material_ID"][i] = P["material_ID"]
+            pool["cell_ID"][i] = P["cell_ID"]
+
+        # Find the top cell if unknown (e.g., after a surface crossing)
+        if pool["cell_ID"][i] == -1:
+            pool_get_particle(P_arr, pool, i)
+            cell_ID = geometry.get_cell(P_arr, UNIVERSE_ROOT, mcdc)
+            if cell_ID == -1:
+                geometry.report_lost(P_arr)
+                pool["event"][i] = EVENT_LOST
+                pool["alive"][i] = False
+                continue
+            pool["cell_ID"][i] = cell_ID
+        cell = cells[pool["cell_ID"][i]]
+
+        # Cells filled with universes or lattices
+        if cell["fill_type"] != FILL_MATERIAL:
+            pool_get_particle(P_arr, pool, i)
+            pool["distance"][i] = geometry.inspect_geometry(P_arr, mcdc)
+            pool_set_particle(pool, i, P_arr)
+            continue
+
+        # Material cell
+        d_surface, surface_ID = geometry.distance_to_nearest_surface_at(
+            x[i], y[i], z[i], ux[i], uy[i], uz[i], cell, mcdc
+        )
+        if d_surface < INF - COINCIDENCE_TOLERANCE:
+            pool["distance"][i] = d_surface
+            pool["event"][i] = EVENT_SURFACE_CROSSING
+            pool["surface_ID"][i] = surface_ID
+        else:
+            pool["distance"][i] = INF
+            pool["event"][i] = EVENT_NONE
+        pool["material_ID"][i] = cell["fill_ID"]
+
+
+@njit
+def pool_sample_flight(pool, mcdc):
+    """
+    Look up the total cross-sections and speeds of the pool particles, sample
+    their collision distances, and set their next events and flight distances
+    (see move_to_event)
+    """
+    materials = mcdc["materials"]
+    time_boundary = mcdc["setting"]["time_boundary"]
+    census_time = mcdc["setting"]["census_time"][mcdc["idx_census"]]
+    for i in range(pool["size"][0]):
+        event = pool["event"][i]
+        if event == EVENT_LOST:
+            continue
+
+        # Cross-section and speed
+        material = materials[pool["material_ID"][i]]
+        g = pool["g"][i]
+        SigmaT = material["total"][g]
+        speed = material["speed"][g]
+        pool["speed"][i] = speed
+
+        # Distances to the time boundary, census time, and collision
+        t = pool["t"][i]
+        d_time_boundary = speed * (time_boundary - t)
+        d_time_census = speed * (census_time - t)
+        if SigmaT == 0.0:
+            d_collision = INF
+        else:
+            d_collision = -math.log(pool_rng(pool, i)) / SigmaT
+
+        # Determine event(s)
+        distance = pool["distance"][i]
+
+        if d_collision < distance - COINCIDENCE_TOLERANCE:
+            distance = d_collision
+            event = EVENT_COLLISION
+            pool["surface_ID"][i] = -1
+        elif geometry.check_coincidence(d_collision, distance):
+            event += EVENT_COLLISION
+
+        if d_time_boundary < distance - COINCIDENCE_TOLERANCE:
+            distance = d_time_boundary
+            event = EVENT_TIME_BOUNDARY
+            pool["surface_ID"][i] = -1
+        elif geometry.check_coincidence(d_time_boundary, distance):
+            event += EVENT_TIME_BOUNDARY
+
+        if d_time_census < distance - COINCIDENCE_TOLERANCE:
+            distance = d_time_census
+            event = EVENT_TIME_CENSUS
+            pool["surface_ID"][i] = -1
+        elif geometry.check_coincidence(d_time_census, distance):
+            event += EVENT_TIME_CENSUS
+
+        pool["distance"][i] = distance
+        pool["event"][i] = event
+
+
+@njit
+def pool_score_tracklength(pool, P_arr, data, mcdc):
+    """
+    Score the track-length mesh tallies of the pool particle flights
+    """
+    if not mcdc["cycle_active"] or mcdc["mesh_tallies"].shape[0] == 0:
+        return
+    for i in range(pool["size"][0]):
+        if pool["event"][i] == EVENT_LOST:
+            continue
+        pool_get_particle(P_arr, pool, i)
+        for tally in mcdc["mesh_tallies"]:
+            score_mesh_tally(P_arr, pool["distance"][i], tally, data, mcdc)
+
+
+@njit
+def pool_move(pool):
+    N = pool["size"][0]
+    x = pool["x"]
+    y = pool["y"]
+    z = pool["z"]
+    t = pool["t"]
+    ux = pool["ux"]
+    uy = pool["uy"]
+    uz = pool["uz"]
+    distance = pool["distance"]
+    speed = pool["speed"]
+    event = pool["event"]
+    for i in range(N):
+        if event[i] == EVENT_LOST:
+            continue
+        x[i] += ux[i] * distance[i]
+        y[i] += uy[i] * distance[i]
+        z[i] += uz[i] * distance[i]
+        t[i] += distance[i] / speed[i]
+
+
+@njit
+def pool_collision(pool, P_arr, mcdc):
+    """
+    Sample the collision types of the colliding pool particles and perform the
+    collisions (see collision)
+    """
+    materials = mcdc["materials"]
+    implicit_capture = mcdc["technique"]["implicit_capture"]
+    for i in range(pool["size"][0]):
+        if not pool["event"][i] & EVENT_COLLISION:
+            continue
+
+        # Get the reaction cross-sections
+        material = materials[pool["material_ID"][i]]
+        g = pool["g"][i]
+        SigmaT = material["total"][g]
+        SigmaS = material["scatter"][g]
+        SigmaC = material["capture"][g]
+        SigmaF = material["fission"][g]
+
+        # Implicit capture
+        if implicit_capture:
+            pool["w"][i] *= (SigmaT - SigmaC) / SigmaT
+            SigmaT -= SigmaC
+
+        # Sample collision type and perform the collision
+        xi = pool_rng(pool, i) * SigmaT
+        tot = SigmaS
+        if tot > xi:
+            pool["event"][i] += EVENT_SCATTERING
+            pool_get_particle(P_arr, pool, i)
+            scattering(P_arr, mcdc)
+            pool_set_particle(pool, i, P_arr)
+        else:
+            tot += SigmaF
+            if tot > xi:
+                pool["event"][i] += EVENT_FISSION
+                pool_get_particle(P_arr, pool, i)
+                fission(P_arr, mcdc)
+                pool_set_particle(pool, i, P_arr)
+            else:
+                pool["event"][i] += EVENT_CAPTURE
+                pool["alive"][i] = False
+
+
+@njit
+def pool_surface_crossing(pool, P_arr, data, mcdc):
+    """
+    Apply the boundary conditions of the crossed surfaces to the pool particles
+    (see surface_crossing)
+
+    The particles crossing surfaces with tallies, or looking up their next
+    cells in the neighbor lists, cross on a particle copy.
+    """
+    surfaces = mcdc["surfaces"]
+    cell_neighbor = mcdc["setting"]["cell_neighbor_size"] > 0
+    for i in range(pool["size"][0]):
+        if not pool["event"][i] & EVENT_SURFACE_CROSSING:
+            continue
+        surface = surfaces[pool["surface_ID"][i]]
+
+        if surface["N_tally"] > 0 or cell_neighbor:
+            pool_get_particle(P_arr, pool, i)
+            surface_crossing(P_arr, data, mcdc)
+            pool_set_particle(pool, i, P_arr)
+            continue
+
+        # Implement BC
+        if surface["BC"] == BC_VACUUM:
+            pool["alive"][i] = False
+        elif surface["BC"] == BC_REFLECTIVE:
+            ux = pool["ux"][i]
+            uy = pool["uy"][i]
+            uz = pool["uz"][i]
+            nx, ny, nz = geometry.surface_normal_at(
+                pool["x"][i], pool["y"][i], pool["z"][i], surface
+            )
+            c = 2.0 * (nx * ux + ny * uy + nz * uz)
+            pool["ux"][i] = ux - c * nx
+            pool["uy"][i] = uy - c * ny
+            pool["uz"][i] = uz - c * nz
+
+        # Need to check new cell later?
+        if pool["alive"][i] and not surface["BC"] == BC_REFLECTIVE:
+            pool["cell_ID"][i] = -1
+
+
+@njit
+def pool_time_events(pool, P_arr, mcdc):
+    """
+    Bank the pool particles reaching the census time, and terminate them and
+    those reaching the time boundary
+    """
+    for i in range(pool["size"][0]):
+        event = pool["event"][i]
+        if event & EVENT_TIME_CENSUS:
+            pool_get_particle(P_arr, pool, i)
+            adapt.add_census(P_arr, mcdc)
+            pool["alive"][i] = False
+        if event & EVENT_TIME_BOUNDARY:
+            pool["alive"][i] = False
+
+
 # =============================================================================
 # Continuous Energy Physics
 # =============================================================================
@@ -3175,9 +3938,51 @@ def get_MacroXS(type_, material, P_arr, mcdc):
             return nu_d * fission
 
     # Continuous-energy XS
+    if type_ <= XS_NU_FISSION:
+        return get_MacroXS_cached(type_, material, P_arr, mcdc)
+    return get_MacroXS_CE(type_, material, P_arr, mcdc)
+
+
+@njit
+def get_MacroXS_cached(type_, material, P_arr, mcdc):
+    P = P_arr[0]
+
+    # Invalidate the cache if material, group, or energy has changed
+    if (
+        P["xs_cache_material_ID"] != material["ID"]
+        or P["xs_cache_g"] != P["g"]
+        or P["xs_cache_E"] != P["E"]
+    ):
+        P["xs_cache_material_ID"] = material["ID"]
+        P["xs_cache_g"] = P["g"]
+        P["xs_cache_E"] = P["E"]
+        P["xs_cache_flag"] = 0
+
+    # Cache hit
+    flag = 1 << type_
+    if P["xs_cache_flag"] & flag:
+        return P["xs_cache"][type_]
+
+    # Cache miss
+    MacroXS = get_MacroXS_CE(type_, material, P_arr, mcdc)
+    P["xs_cache"][type_] = MacroXS
+    P["xs_cache_flag"] |= flag
+    return MacroXS
+
+
+@njit
+def get_MacroXS_CE(type_, material, P_arr, mcdc):
+    P = P_arr[0]
     MacroXS = 0.0
     E = P["E"]
 
+    # Precomputed material XS
+    if material["precompute_xs"] and type_ <= XS_FISSION:
+        return get_MacroXS_precomputed(type_, material, E, mcdc)
+
+    # One search on the unionized grid serves all nuclides
+    idx_union = get_union_index(E, mcdc)
+
     # Sum over all nuclides
     for i in range(material["N_nuclide"]):
         ID_nuclide = material["nuclide_IDs"][i]
@@ -3187,7 +3992,8 @@ def get_MacroXS(type_, material, P_arr, mcdc):
         N = material["nuclide_densities"][i]
 
         # Get microscopic cross-section
-        microXS = get_microXS(type_, nuclide, E)
+        idx = get_nuclide_index(nuclide, idx_union, mcdc)
+        microXS = get_microXS_at(type_, nuclide, E, idx, mcdc)
 
         # Accumulate
         MacroXS += N * microXS
@@ -3196,57 +4002,102 @@ def get_MacroXS(type_, material, P_arr, mcdc):
 
 
 @njit
-def get_microXS(type_, nuclide, E):
+def get_MacroXS_precomputed(type_, material, E, mcdc):
+    idx = get_union_index(E, mcdc)
+    E_grid = mcdc["E_union"]
+    NE = mcdc["NE_union"]
+    if type_ == XS_TOTAL:
+        data_idx = material["ce_total_data_idx"]
+    elif type_ == XS_SCATTER:
+        data_idx = material["ce_scatter_data_idx"]
+    elif type_ == XS_CAPTURE:
+        data_idx = material["ce_capture_data_idx"]
+    else:
+        data_idx = material["ce_fission_data_idx"]
+    data = mcdc["material_data"][data_idx : data_idx + NE]
+    return interpolate_XS(data, E, E_grid, NE, idx)
+
+
+@njit
+def get_microXS(type_, nuclide, E, mcdc):
+    NE = nuclide["NE_xs"]
+    E_grid = get_nuclide_data(nuclide["E_xs_data_idx"], NE, mcdc)
+    idx = binary_search_with_length(E, E_grid, NE)
+    return get_microXS_at(type_, nuclide, E, idx, mcdc)
+
+
+@njit
+def get_microXS_at(type_, nuclide, E, idx, mcdc):
+    NE = nuclide["NE_xs"]
+    E_grid = get_nuclide_data(nuclide["E_xs_data_idx"], NE, mcdc)
+
     # Cross sections
     if type_ == XS_TOTAL:
-        data = nuclide["ce_total"]
-        return get_XS(data, E, nuclide["E_xs"], nuclide["NE_xs"])
+        data = get_nuclide_data(nuclide["ce_total_data_idx"], NE, mcdc)
+        return interpolate_XS(data, E, E_grid, NE, idx)
     elif type_ == XS_SCATTER:
-        data = nuclide["ce_scatter"]
-        return get_XS(data, E, nuclide["E_xs"], nuclide["NE_xs"])
+        data = get_nuclide_data(nuclide["ce_scatter_data_idx"], NE, mcdc)
+        return interpolate_XS(data, E, E_grid, NE, idx)
     elif type_ == XS_CAPTURE:
-        data = nuclide["ce_capture"]
-        return get_XS(data, E, nuclide["E_xs"], nuclide["NE_xs"])
+        data = get_nuclide_data(nuclide["ce_capture_data_idx"], NE, mcdc)
+        return interpolate_XS(data, E, E_grid, NE, idx)
     elif type_ == XS_FISSION:
         if not nuclide["fissionable"]:
             return 0.0
-        data = nuclide["ce_fission"]
-        return get_XS(data, E, nuclide["E_xs"], nuclide["NE_xs"])
+        data = get_nuclide_data(nuclide["ce_fission_data_idx"], NE, mcdc)
+        return interpolate_XS(data, E, E_grid, NE, idx)
 
     # Binary Multiplicities
     elif type_ == XS_NU_SCATTER:
-        data = nuclide["ce_scatter"]
-        xs = get_XS(data, E, nuclide["E_xs"], nuclide["NE_xs"])
+        data = get_nuclide_data(nuclide["ce_scatter_data_idx"], NE, mcdc)
+        xs = interpolate_XS(data, E, E_grid, NE, idx)
         nu = 1.0
         return nu * xs
     elif type_ == XS_NU_FISSION:
         if not nuclide["fissionable"]:
             return 0.0
-        data = nuclide["ce_fission"]
-        xs = get_XS(data, E, nuclide["E_xs"], nuclide["NE_xs"])
-        nu = get_nu(NU_FISSION, nuclide, E)
+        data = get_nuclide_data(nuclide["ce_fission_data_idx"], NE, mcdc)
+        xs = interpolate_XS(data, E, E_grid, NE, idx)
+        nu = get_nu(NU_FISSION, nuclide, E, mcdc)
         return nu * xs
     elif type_ == XS_NU_FISSION_PROMPT:
         if not nuclide["fissionable"]:
             return 0.0
-        data = nuclide["ce_fission"]
-        xs = get_XS(data, E, nuclide["E_xs"], nuclide["NE_xs"])
-        nu = get_nu(NU_FISSION_PROMPT, nuclide, E)
+        data = get_nuclide_data(nuclide["ce_fission_data_idx"], NE, mcdc)
+        xs = interpolate_XS(data, E, E_grid, NE, idx)
+        nu = get_nu(NU_FISSION_PROMPT, nuclide, E, mcdc)
         return nu * xs
     elif type_ == XS_NU_FISSION_DELAYED:
         if not nuclide["fissionable"]:
             return 0.0
-        data = nuclide["ce_fission"]
-        xs = get_XS(data, E, nuclide["E_xs"], nuclide["NE_xs"])
-        nu = get_nu(NU_FISSION_DELAYED, nuclide, E)
+        data = get_nuclide_data(nuclide["ce_fission_data_idx"], NE, mcdc)
+        xs = interpolate_XS(data, E, E_grid, NE, idx)
+        nu = get_nu(NU_FISSION_DELAYED, nuclide, E, mcdc)
         return nu * xs
 
 
+@njit
+def get_nuclide_data(data_idx, length, mcdc):
+    # View of nuclide CE data in the data pool
+    if mcdc["setting"]["xs_shared_memory"]:
+        # The pool lives in the node-shared memory window
+        nuclide_data = adapt.float64_array_at(
+            mcdc["nuclide_data_address"], mcdc["nuclide_data_size"]
+        )
+        return nuclide_data[data_idx : data_idx + length]
+    return mcdc["nuclide_data"][data_idx : data_idx + length]
+
+
 @njit
 def get_XS(data, E, E_grid, NE):
     # Search XS energy bin index
     idx = binary_search_with_length(E, E_grid, NE)
 
+    return interpolate_XS(data, E, E_grid, NE, idx)
+
+
+@njit
+def interpolate_XS(data, E, E_grid, NE, idx):
     # Extrapolate if E is outside the given data
     if idx == -1:
         idx = 0
@@ -3263,48 +4114,98 @@ def get_XS(data, E, E_grid, NE):
 
 
 @njit
-def get_nu_group(type_, nuclide, E, group):
+def get_union_index(E, mcdc):
+    # Bin index of E in the unionized energy grid
+    E_grid = mcdc["E_union"]
+    NE = mcdc["NE_union"]
+    N_hash = mcdc["setting"]["energy_hash_size"]
+    if N_hash == 0:
+        return binary_search_with_length(E, E_grid, NE)
+
+    # Bound the search with the logarithmic hash table
+    if E <= E_grid[0]:
+        return -1
+    k = int((math.log(E) - mcdc["E_union_log_min"]) * mcdc["E_union_hash_factor"])
+    k = min(max(k, 0), N_hash - 1)
+    return hash_search(E, E_grid, NE, mcdc["E_union_hash"], k)
+
+
+@njit
+def hash_search(val, grid, length, hash_table, k):
+    # Search in the window of hash bin k, padded by one grid point on each side
+    #   to be robust against round-off in the hash bin index
+    left = max(hash_table[k] - 1, 0)
+    right = min(hash_table[k + 1], length - 1)
+    return binary_search_window(val, grid, left, right)
+
+
+@njit
+def get_nuclide_index(nuclide, idx_union, mcdc):
+    # Map the unionized grid bin index into the nuclide grid bin index
+    if idx_union == -1:
+        return -1
+    NE_union = mcdc["NE_union"]
+    idx = nuclide["ID"] * NE_union + idx_union
+    if mcdc["setting"]["xs_shared_memory"]:
+        # The maps live in the node-shared memory window
+        E_union_idx = adapt.int32_array_at(
+            mcdc["E_union_idx_address"], len(mcdc["nuclides"]) * NE_union
+        )
+        return int(E_union_idx[idx])
+    return int(mcdc["E_union_idx"][idx])
+
+
+@njit
+def get_nu_group(type_, nuclide, E, group, mcdc):
+    NE_p = nuclide["NE_nu_p"]
+    NE_d = nuclide["NE_nu_d"]
+    E_grid_p = get_nuclide_data(nuclide["E_nu_p_data_idx"], NE_p, mcdc)
+    E_grid_d = get_nuclide_data(nuclide["E_nu_d_data_idx"], NE_d, mcdc)
+    nu_p = get_nuclide_data(nuclide["ce_nu_p_data_idx"], NE_p, mcdc)
+
+    # The delayed groups are stored contiguously, row by row
+    idx_d = nuclide["ce_nu_d_data_idx"]
+
     if type_ == NU_FISSION:
-        nu = get_XS(nuclide["ce_nu_p"], E, nuclide["E_nu_p"], nuclide["NE_nu_p"])
+        nu = get_XS(nu_p, E, E_grid_p, NE_p)
         for i in range(6):
-            nu += get_XS(
-                nuclide["ce_nu_d"][i], E, nuclide["E_nu_d"], nuclide["NE_nu_d"]
-            )
+            nu_d = get_nuclide_data(idx_d + i * NE_d, NE_d, mcdc)
+            nu += get_XS(nu_d, E, E_grid_d, NE_d)
         return nu
 
     if type_ == NU_FISSION_PROMPT:
-        return get_XS(nuclide["ce_nu_p"], E, nuclide["E_nu_p"], nuclide["NE_nu_p"])
+        return get_XS(nu_p, E, E_grid_p, NE_p)
 
     if type_ == NU_FISSION_DELAYED and group == -1:
         tot = 0.0
         for i in range(6):
-            tot += get_XS(
-                nuclide["ce_nu_d"][i], E, nuclide["E_nu_d"], nuclide["NE_nu_d"]
-            )
+            nu_d = get_nuclide_data(idx_d + i * NE_d, NE_d, mcdc)
+            tot += get_XS(nu_d, E, E_grid_d, NE_d)
         return tot
 
     if type_ == NU_FISSION_DELAYED and group != -1:
-        return get_XS(
-            nuclide["ce_nu_d"][group], E, nuclide["E_nu_d"], nuclide["NE_nu_d"]
-        )
+        nu_d = get_nuclide_data(idx_d + group * NE_d, NE_d, mcdc)
+        return get_XS(nu_d, E, E_grid_d, NE_d)
 
 
 @njit
-def get_nu(type_, nuclide, E):
-    return get_nu_group(type_, nuclide, E, -1)
+def get_nu(type_, nuclide, E, mcdc):
+    return get_nu_group(type_, nuclide, E, -1, mcdc)
 
 
 @njit
 def sample_nuclide(material, P_arr, type_, mcdc):
     P = P_arr[0]
     xi = rng(P_arr) * get_MacroXS(type_, material, P_arr, mcdc)
+    idx_union = get_union_index(P["E"], mcdc)
     tot = 0.0
     for i in range(material["N_nuclide"]):
         ID_nuclide = material["nuclide_IDs"][i]
         nuclide = mcdc["nuclides"][ID_nuclide]
 
         N = material["nuclide_densities"][i]
-        tot += N * get_microXS(type_, nuclide, P["E"])
+        idx = get_nuclide_index(nuclide, idx_union, mcdc)
+        tot += N * get_microXS_at(type_, nuclide, P["E"], idx, mcdc)
         if tot > xi:
             break
 
@@ -3312,12 +4213,19 @@ def sample_nuclide(material, P_arr, type_, mcdc):
 
 
 @njit
-def sample_Eout(P_new_arr, E_grid, NE, chi):
+def sample_Eout(P_new_arr, E_data_idx, chi_data_idx, NE, chi_hash, mcdc):
     P_new = P_new_arr[0]
     xi = rng(P_new_arr)
+    E_grid = get_nuclide_data(E_data_idx, NE, mcdc)
+    chi = get_nuclide_data(chi_data_idx, NE, mcdc)
 
-    # Determine bin index
-    idx = binary_search_with_length(xi, chi, NE)
+    # Determine bin index (bounded by the CDF hash table, if available)
+    N_hash = len(chi_hash) - 1
+    if N_hash == 0:
+        idx = binary_search_with_length(xi, chi, NE)
+    else:
+        k = min(int(xi * N_hash), N_hash - 1)
+        idx = hash_search(xi, chi, NE, chi_hash, k)
 
     # Linear interpolation
     E1 = E_grid[idx]
@@ -1,5 +1,5 @@
 from mpi4py import MPI
-from numba import njit, objmode
+from numba import get_thread_id, njit, objmode, prange
 
 import shutil
 
@@ -23,6 +23,14 @@ from mcdc.print_ import (
 
 caching = config.caching
 
+# Whether the source particles are shared by numba threads (set in `prepare`
+# from setting N_thread); the threaded source loop is only compiled if so
+THREADED = False
+
+# The one-sided MPI work counter of the dynamic source distribution (allocated
+# in `prepare` if setting work_chunk_size is positive)
+work_window = None
+
 
 # =============================================================================
 # Functions for GPU Interop
@@ -94,7 +102,17 @@ def loop_fixed_source(data_arr, mcdc_arr):
 
             # Loop over source particles
             seed_source = kernel.split_seed(seed_census, SEED_SPLIT_SOURCE)
-            loop_source(seed_source, data, mcdc)
+            if THREADED:
+                loop_source_threaded(seed_source, data_arr, mcdc_arr)
+            elif (
+                mcdc["setting"]["work_chunk_size"] > 0
+                and kernel.get_bank_size(mcdc["bank_source"]) == 0
+            ):
+                loop_source_dynamic(seed_source, data, mcdc)
+            elif mcdc["setting"]["event_batch_size"] > 0:
+                loop_source_event(seed_source, data, mcdc)
+            else:
+                loop_source(seed_source, data, mcdc)
 
             # Loop over source precursors
             if kernel.get_bank_size(mcdc["bank_precursor"]) > 0:
@@ -115,7 +133,8 @@ def loop_fixed_source(data_arr, mcdc_arr):
             # Reset banks
             kernel.set_bank_size(mcdc["bank_source"], 0)
             kernel.set_bank_size(mcdc["bank_census"], 0)
-            kernel.set_bank_size(mcdc["bank_active"], 0)
+            for i in range(mcdc["setting"]["N_thread"]):
+                kernel.set_bank_size(mcdc["bank_active"][i], 0)
 
             # Tally history closeout
             kernel.tally_reduce(data, mcdc)
@@ -149,9 +168,23 @@ def loop_eigenvalue(data_arr, mcdc_arr):
     for idx_cycle in range(mcdc["setting"]["N_cycle"]):
         seed_cycle = kernel.split_seed(idx_cycle, mcdc["setting"]["rng_seed"])
 
+        # Time the source loop for the cost-weighted bank rebalance
+        with objmode(time_start="float64"):
+            time_start = MPI.Wtime()
+
         # Loop over source particles
         seed_source = kernel.split_seed(seed_cycle, SEED_SPLIT_SOURCE)
-        loop_source(seed_source, data, mcdc)
+        if THREADED:
+            loop_source_threaded(seed_source, data_arr, mcdc_arr)
+        else:
+            loop_source(seed_source, data, mcdc)
+
+        # Measured time per history
+        with objmode(time_end="float64"):
+            time_end = MPI.Wtime()
+        mcdc["mpi_work_cost"] = 0.0
+        if mcdc["mpi_work_size"] > 0:
+            mcdc["mpi_work_cost"] = (time_end - time_start) / mcdc["mpi_work_size"]
 
         # Tally "history" closeout
         kernel.eigenvalue_tally_closeout_history(mcdc)
@@ -184,16 +217,24 @@ def loop_eigenvalue(data_arr, mcdc_arr):
 
 @njit()
 def generate_source_particle(work_start, idx_work, seed, prog):
-    mcdc = adapt.mcdc_global(prog)
+    # Put the source particle into the active bank
+    P_arr = adapt.local_array(1, type_.particle)
+    if init_source_particle(P_arr, work_start, idx_work, seed, prog):
+        adapt.add_active(P_arr, prog)
 
-    seed_work = kernel.split_seed(work_start + idx_work, seed)
 
-    # =====================================================================
-    # Get a source particle and put into active bank
-    # =====================================================================
+@njit()
+def init_source_particle(P_arr, work_start, idx_work, seed, prog):
+    """
+    Initialize the local particle as the source particle `idx_work`
 
-    P_arr = adapt.local_array(1, type_.particle_record)
+    Return whether the particle is to be run; it is not if it is put into the
+    census bank or is outside of the domain.
+    """
     P = P_arr[0]
+    mcdc = adapt.mcdc_global(prog)
+
+    seed_work = kernel.split_seed(work_start + idx_work, seed)
 
     # Get from fixed-source?
     if kernel.get_bank_size(mcdc["bank_source"]) == 0:
@@ -202,32 +243,23 @@ def generate_source_particle(work_start, idx_work, seed, prog):
 
     # Get from source bank
     else:
-        P_arr = mcdc["bank_source"]["particles"][idx_work : (idx_work + 1)]
-        P = P_arr[0]
+        kernel.get_bank_record(P_arr, mcdc["bank_source"], idx_work)
+
+    # Domain decomposition: scale the weight and skip if outside of the domain
+    if mcdc["technique"]["domain_decomposition"]:
+        if mcdc["technique"]["dd_work_ratio"][mcdc["dd_idx"]] > 0:
+            P["w"] /= mcdc["technique"]["dd_work_ratio"][mcdc["dd_idx"]]
+        if not kernel.particle_in_domain(P_arr, mcdc):
+            return False
 
     # Check if it is beyond current census index
     idx_census = mcdc["idx_census"]
     if P["t"] > mcdc["setting"]["census_time"][idx_census]:
-        if mcdc["technique"]["domain_decomposition"]:
-            if mcdc["technique"]["dd_work_ratio"][mcdc["dd_idx"]] > 0:
-                P["w"] /= mcdc["technique"]["dd_work_ratio"][mcdc["dd_idx"]]
-            if kernel.particle_in_domain(P_arr, mcdc):
-                adapt.add_census(P_arr, prog)
-        else:
-            adapt.add_census(P_arr, prog)
-    else:
-        P_new_arr = adapt.local_array(1, type_.particle)
-        P_new = P_new_arr[0]
-        # Add the source particle into the active bank
-        if mcdc["technique"]["domain_decomposition"]:
-            if mcdc["technique"]["dd_work_ratio"][mcdc["dd_idx"]] > 0:
-                P["w"] /= mcdc["technique"]["dd_work_ratio"][mcdc["dd_idx"]]
-            if kernel.particle_in_domain(P_arr, mcdc):
-                kernel.recordlike_to_particle(P_new_arr, P_arr)
-                adapt.add_active(P_new_arr, prog)
-        else:
-            kernel.recordlike_to_particle(P_new_arr, P_arr)
-            adapt.add_active(P_new_arr, prog)
+        adapt.add_census(P_arr, prog)
+        return False
+
+    kernel.init_particle_state(P_arr)
+    return True
 
 
 @njit(cache=caching)
@@ -246,10 +278,13 @@ def exhaust_active_bank(data, prog):
     P_arr = adapt.local_array(1, type_.particle)
     P = P_arr[0]
 
+    # The active bank of the running thread
+    bank_active = mcdc["bank_active"][get_thread_id()]
+
     # Loop until active bank is exhausted
-    while kernel.get_bank_size(mcdc["bank_active"]) > 0:
+    while kernel.get_bank_size(bank_active) > 0:
         # Get particle from active bank
-        kernel.get_particle(P_arr, mcdc["bank_active"], mcdc)
+        kernel.get_particle(P_arr, bank_active, mcdc)
 
         prep_particle(P_arr, prog)
 
@@ -263,7 +298,7 @@ def source_closeout(prog, idx_work, N_prog, data):
 
     # Tally history closeout for one-batch fixed-source simulation
     if not mcdc["setting"]["mode_eigenvalue"] and mcdc["setting"]["N_batch"] == 1:
-        kernel.tally_accumulate(data, mcdc)
+        kernel.tally_accumulate_history(idx_work, mcdc["mpi_work_size"], data, mcdc)
 
     # Tally history closeout for multi-batch uq simulation
     if mcdc["technique"]["uq"]:
@@ -291,12 +326,15 @@ def source_dd_resolution(data, prog):
     P_arr = adapt.local_array(1, type_.particle)
     P = P_arr[0]
 
+    # Histories pending tally accumulation
+    N_pending = 0
+
     while not terminated:
-        if kernel.get_bank_size(mcdc["bank_active"]) > 0:
+        if kernel.get_bank_size(mcdc["bank_active"][0]) > 0:
             # Loop until active bank is exhausted
-            while kernel.get_bank_size(mcdc["bank_active"]) > 0:
+            while kernel.get_bank_size(mcdc["bank_active"][0]) > 0:
 
-                kernel.get_particle(P_arr, mcdc["bank_active"], mcdc)
+                kernel.get_particle(P_arr, mcdc["bank_active"][0], mcdc)
                 if not kernel.particle_in_domain(P_arr, mcdc) and P["alive"] == True:
                     print(f"recieved particle not in domain")
 
@@ -312,7 +350,11 @@ def source_dd_resolution(data, prog):
                     not mcdc["setting"]["mode_eigenvalue"]
                     and mcdc["setting"]["N_batch"] == 1
                 ):
-                    kernel.tally_accumulate(data, mcdc)
+                    N_pending += 1
+                    if N_pending == mcdc["setting"]["history_group_size"]:
+                        kernel.tally_accumulate_group(data, N_pending, mcdc)
+                        mcdc["tally_N_group"] += 1
+                        N_pending = 0
 
         # Send all domain particle banks
         kernel.dd_particle_send(mcdc)
@@ -331,6 +373,11 @@ def source_dd_resolution(data, prog):
             kernel.dd_check_out(mcdc)
             terminated = True
 
+    # Accumulate the remaining histories
+    if N_pending > 0:
+        kernel.tally_accumulate_group(data, N_pending, mcdc)
+        mcdc["tally_N_group"] += 1
+
 
 @njit
 def loop_source(seed, data, mcdc):
@@ -345,18 +392,24 @@ def loop_source(seed, data, mcdc):
     work_size = mcdc["mpi_work_size"]
     work_end = work_start + work_size
 
+    # The source particles are run directly; the active bank holds secondaries
+    P_arr = adapt.local_array(1, type_.particle)
+
     for idx_work in range(work_size):
 
         # =====================================================================
         # Generate a source particle
         # =====================================================================
 
-        generate_source_particle(work_start, idx_work, seed, mcdc)
+        run_source = init_source_particle(P_arr, work_start, idx_work, seed, mcdc)
 
         # =====================================================================
         # Run the source particle and its secondaries
         # =====================================================================
 
+        if run_source:
+            prep_particle(P_arr, mcdc)
+            loop_particle(P_arr, data, mcdc)
         exhaust_active_bank(data, mcdc)
 
         # =====================================================================
@@ -369,6 +422,236 @@ def loop_source(seed, data, mcdc):
         source_dd_resolution(data, mcdc)
 
 
+@njit(parallel=True)
+def loop_source_threaded(seed, data_arr, mcdc_arr):
+    """
+    Shared-memory threaded counterpart of `loop_source`
+
+    The threads draw the source particles from a shared work counter, a
+    history group at a time. Each thread runs its particles with its own
+    active bank and tally copy; the tally copies are reduced into the first one
+    at the end. The census bank, filled in the order the threads finish their
+    particles, is then sorted into an order independent of the scheduling.
+    """
+    mcdc = mcdc_arr[0]
+    mcdc["mpi_work_iter"][0] = 0
+
+    # Loop over threads
+    N_group = 0
+    for i in prange(mcdc["setting"]["N_thread"]):
+        N_group += loop_source_thread(seed, data_arr, mcdc_arr)
+    mcdc["tally_N_group"] += N_group
+
+    # Thread tally reduction
+    kernel.tally_reduce_threads(data_arr)
+
+    # Scheduling-independent census bank order
+    kernel.sort_bank(mcdc["bank_census"])
+
+    # Progress printout
+    if mcdc["setting"]["progress_bar"]:
+        with objmode():
+            print_progress(1.0, mcdc)
+
+
+@njit
+def loop_source_thread(seed, data_arr, mcdc_arr):
+    mcdc = mcdc_arr[0]
+    thread_ID = get_thread_id()
+    data = data_arr[thread_ID]
+
+    # Progress bar indicator
+    N_prog = 0
+
+    work_start = mcdc["mpi_work_start"]
+    work_size = mcdc["mpi_work_size"]
+
+    # History groups (taken whole, so that they do not depend on the
+    #   scheduling) and their count
+    group_size = mcdc["setting"]["history_group_size"]
+    history_closeout = (
+        not mcdc["setting"]["mode_eigenvalue"] and mcdc["setting"]["N_batch"] == 1
+    )
+    N_group = 0
+
+    P_arr = adapt.local_array(1, type_.particle)
+
+    while True:
+        idx_start = adapt.global_add(mcdc["mpi_work_iter"], 0, group_size)
+        if idx_start >= work_size:
+            break
+        idx_end = min(idx_start + group_size, work_size)
+
+        # Run the source particles and their secondaries
+        for idx_work in range(idx_start, idx_end):
+            if init_source_particle(P_arr, work_start, idx_work, seed, mcdc):
+                prep_particle(P_arr, mcdc)
+                loop_particle(P_arr, data, mcdc)
+            exhaust_active_bank(data, mcdc)
+
+        # Tally history closeout for one-batch fixed-source simulation
+        if history_closeout:
+            kernel.tally_accumulate_group(data, idx_end - idx_start, mcdc)
+            N_group += 1
+
+        # Progress printout
+        percent = idx_end / work_size
+        if (
+            thread_ID == 0
+            and mcdc["setting"]["progress_bar"]
+            and int(percent * 100.0) > N_prog
+        ):
+            N_prog = int(percent * 100.0)
+            with objmode():
+                print_progress(percent, mcdc)
+
+    return N_group
+
+
+@njit
+def loop_source_dynamic(seed, data, mcdc):
+    """
+    Dynamically distributed counterpart of `loop_source`
+
+    The MPI ranks take chunks of the source particles from a one-sided work
+    counter as they finish their previous chunks. The particles are keyed on
+    their global source indices, as in the static distribution. The chunk size
+    is a multiple of the history group size, and the groups are closed at the
+    chunk ends, so that the groups do not depend on the distribution either.
+    """
+    # Progress bar indicator
+    N_prog = 0
+
+    N_source = mcdc["mpi_work_size_total"]
+    chunk_size = mcdc["setting"]["work_chunk_size"]
+
+    # Histories pending tally accumulation
+    group_size = mcdc["setting"]["history_group_size"]
+    history_closeout = mcdc["setting"]["N_batch"] == 1
+    N_pending = 0
+
+    with objmode():
+        reset_work_counter()
+
+    # The source particles are run directly; the active bank holds secondaries
+    P_arr = adapt.local_array(1, type_.particle)
+
+    while True:
+        # Take a chunk of source particles
+        with objmode(idx_start="int64"):
+            idx_start = fetch_work_chunk(chunk_size)
+        if idx_start >= N_source:
+            break
+        idx_end = min(idx_start + chunk_size, N_source)
+
+        for idx_source in range(idx_start, idx_end):
+            # Run the source particle and its secondaries
+            if init_source_particle(P_arr, 0, idx_source, seed, mcdc):
+                prep_particle(P_arr, mcdc)
+                loop_particle(P_arr, data, mcdc)
+            exhaust_active_bank(data, mcdc)
+
+            # Tally history closeout for one-batch fixed-source simulation
+            if history_closeout:
+                N_pending += 1
+                if N_pending == group_size:
+                    kernel.tally_accumulate_group(data, N_pending, mcdc)
+                    mcdc["tally_N_group"] += 1
+                    N_pending = 0
+
+        # Accumulate the remaining histories (the last, partial group)
+        if N_pending > 0:
+            kernel.tally_accumulate_group(data, N_pending, mcdc)
+            mcdc["tally_N_group"] += 1
+            N_pending = 0
+
+        # Progress printout
+        percent = idx_end / N_source
+        if mcdc["setting"]["progress_bar"] and int(percent * 100.0) > N_prog:
+            N_prog = int(percent * 100.0)
+            with objmode():
+                print_progress(percent, mcdc)
+
+    # The last chunks may have been taken by the other ranks
+    if mcdc["setting"]["progress_bar"]:
+        with objmode():
+            print_progress(1.0, mcdc)
+
+
+@njit
+def loop_source_event(seed, data, mcdc):
+    """
+    Event-based counterpart of `loop_source`
+
+    The source particles are run in batches. The particles of a batch, and
+    their secondaries as the active bank supplies them, are held in the
+    particle pool and advanced together, one event kernel at a time. Each batch
+    is one tally history group.
+    """
+    # Progress bar indicator
+    N_prog = 0
+
+    work_start = mcdc["mpi_work_start"]
+    work_size = mcdc["mpi_work_size"]
+    batch_size = mcdc["setting"]["event_batch_size"]
+    history_closeout = mcdc["setting"]["N_batch"] == 1
+
+    pool = mcdc["event_pool"]
+    P_arr = adapt.local_array(1, type_.particle)
+
+    for idx_start in range(0, work_size, batch_size):
+        idx_end = min(idx_start + batch_size, work_size)
+
+        # Fill the pool with the source particles of the batch
+        kernel.set_bank_size(pool, 0)
+        for idx_work in range(idx_start, idx_end):
+            if init_source_particle(P_arr, work_start, idx_work, seed, mcdc):
+                kernel.pool_add_particle(pool, P_arr)
+
+        # Run the batch particles and their secondaries
+        while kernel.get_bank_size(pool) > 0:
+            kernel.pool_inspect_geometry(pool, P_arr, mcdc)
+            kernel.pool_sample_flight(pool, mcdc)
+            kernel.pool_score_tracklength(pool, P_arr, data, mcdc)
+            kernel.pool_move(pool)
+            kernel.pool_collision(pool, P_arr, mcdc)
+            kernel.pool_surface_crossing(pool, P_arr, data, mcdc)
+            kernel.pool_time_events(pool, P_arr, mcdc)
+            kernel.pool_compact(pool)
+            kernel.pool_refill(pool, P_arr, mcdc)
+
+        # Tally history closeout for one-batch fixed-source simulation
+        if history_closeout:
+            kernel.tally_accumulate_group(data, idx_end - idx_start, mcdc)
+            mcdc["tally_N_group"] += 1
+
+        # Progress printout
+        percent = idx_end / work_size
+        if mcdc["setting"]["progress_bar"] and int(percent * 100.0) > N_prog:
+            N_prog = int(percent * 100.0)
+            with objmode():
+                print_progress(percent, mcdc)
+
+
+def reset_work_counter():
+    # Make sure that all ranks are done with the previous source loop
+    MPI.COMM_WORLD.Barrier()
+    if MPI.COMM_WORLD.Get_rank() == 0:
+        work_window.Lock(0)
+        work_window.Put(np.zeros(1, np.int64), 0)
+        work_window.Unlock(0)
+    MPI.COMM_WORLD.Barrier()
+
+
+def fetch_work_chunk(chunk_size):
+    # Atomically take the next chunk, returning its starting source index
+    idx_start = np.zeros(1, np.int64)
+    work_window.Lock(0, MPI.LOCK_SHARED)
+    work_window.Fetch_and_op(np.array([chunk_size], np.int64), idx_start, 0)
+    work_window.Unlock(0)
+    return idx_start[0]
+
+
 def gpu_sources_spec():
     def make_work(prog: nb.uintp) -> nb.boolean:
         mcdc = adapt.mcdc_global(prog)
@@ -471,13 +754,13 @@ def gpu_loop_source(seed, data, mcdc):
 
     mcdc["mpi_work_size"] = full_work_size
 
-    kernel.set_bank_size(mcdc["bank_active"], 0)
+    kernel.set_bank_size(mcdc["bank_active"][0], 0)
 
     # =====================================================================
     # Closeout (Moved out of the typical particle loop)
     # =====================================================================
 
-    source_closeout(mcdc, 1, 1, data)
+    source_closeout(mcdc, mcdc["mpi_work_size"] - 1, 1, data)
 
     if mcdc["technique"]["domain_decomposition"]:
         source_dd_resolution(data, mcdc)
@@ -664,7 +947,9 @@ def source_precursor_closeout(prog, idx_work, N_prog, data):
 
     # Tally history closeout for fixed-source simulation
     if not mcdc["setting"]["mode_eigenvalue"]:
-        kernel.tally_accumulate(data, mcdc)
+        kernel.tally_accumulate_history(
+            idx_work, mcdc["mpi_work_size_precursor"], data, mcdc
+        )
 
     # Progress printout
     percent = (idx_work + 1.0) / mcdc["mpi_work_size_precursor"]
@@ -836,14 +1121,14 @@ def gpu_loop_source_precursor(seed, data, mcdc):
     pre_load_data(data, mcdc["gpu_state_pointer"])
     pre_clear_flags(mcdc["source_program_pointer"])
 
-    kernel.set_bank_size(mcdc["bank_active"], 0)
+    kernel.set_bank_size(mcdc["bank_active"][0], 0)
 
     print(kernel.get_bank_size(mcdc["bank_census"]))
     # =====================================================================
     # Closeout (moved out of loop)
     # =====================================================================
 
-    source_precursor_closeout(mcdc, 1, 1, data)
+    source_precursor_closeout(mcdc, mcdc["mpi_work_size_precursor"] - 1, 1, data)
 
 
 def build_gpu_progs(input_deck, args):
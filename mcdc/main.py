@@ -1,4 +1,4 @@
-import argparse, os, sys
+import argparse, math, os, sys
 import importlib.metadata
 import mcdc.config as config
 
@@ -25,6 +25,7 @@ from mpi4py import MPI
 
 import mcdc.kernel as kernel
 import mcdc.type_ as type_
+import mcdc.xslib as xslib
 
 import mcdc.adapt as adapt
 from mcdc.constant import *
@@ -34,6 +35,7 @@ from mcdc.loop import (
     build_gpu_progs,
 )
 import mcdc.geometry as geometry
+import mcdc.algorithm as algorithm
 from mcdc.iqmc.iqmc_loop import iqmc_simulation, iqmc_validate_inputs
 
 import mcdc.loop as loop
@@ -72,6 +74,12 @@ def run():
     # Print banner, hardware configuration, and header
     print_banner(mcdc)
 
+    # Pre-flight geometry check and volume calculations
+    volume_start = MPI.Wtime()
+    check_geometry(mcdc_arr)
+    volumes = calculate_volumes(mcdc_arr)
+    mcdc["runtime_preparation"] += MPI.Wtime() - volume_start
+
     print_msg(" Now running TNT...")
     if mcdc["setting"]["mode_eigenvalue"]:
         print_header_eigenvalue(mcdc)
@@ -88,7 +96,7 @@ def run():
 
     # Output: generate hdf5 output files
     output_start = MPI.Wtime()
-    generate_hdf5(data, mcdc)
+    generate_hdf5(data, mcdc, volumes)
     mcdc["runtime_output"] = MPI.Wtime() - output_start
 
     # Stop timer
@@ -137,6 +145,67 @@ def copy_field(dst, src, name):
     dst[name] = data
 
 
+def nuclide_data_view(nuclide, name, length, nuclide_data):
+    """
+    View of nuclide CE data `name` in the data pool
+    """
+    data_idx = nuclide[name + "_data_idx"]
+    return nuclide_data[data_idx : data_idx + length]
+
+
+def get_material_xs_union(material, name, nuclide_data, E_union_idx, mcdc):
+    """
+    CE macroscopic XS `name` of the material on the unionized energy grid
+    """
+    NE_union = mcdc["NE_union"]
+    E_union = mcdc["E_union"][:NE_union]
+    result = np.zeros(NE_union)
+    for j in range(material["N_nuclide"]):
+        nuclide = mcdc["nuclides"][material["nuclide_IDs"][j]]
+        if name == "fission" and not nuclide["fissionable"]:
+            continue
+        N = material["nuclide_densities"][j]
+        NE_xs = nuclide["NE_xs"]
+        E_xs = nuclide_data_view(nuclide, "E_xs", NE_xs, nuclide_data)
+        start = nuclide["ID"] * NE_union
+        idx = E_union_idx[start : start + NE_union]
+        idx = np.clip(idx.astype(np.int64), 0, NE_xs - 2)
+        E1 = E_xs[idx]
+        E2 = E_xs[idx + 1]
+        XS_nuclide = nuclide_data_view(nuclide, "ce_" + name, NE_xs, nuclide_data)
+        XS1 = XS_nuclide[idx]
+        XS2 = XS_nuclide[idx + 1]
+        result += N * (XS1 + (E_union - E1) * (XS2 - XS1) / (E2 - E1))
+    return result
+
+
+def allocate_shared_nuclide_data(size, size_idx):
+    """
+    Allocate the nuclide data pool (`size` float64) and the unionized energy
+    grid index maps (`size_idx` int32) in an MPI shared-memory window owned by
+    the master rank of each compute node
+
+    Returns the pool and the maps, which all ranks on the node map, and the
+    node communicator.
+    """
+    global nuclide_data_window
+
+    comm = MPI.COMM_WORLD.Split_type(MPI.COMM_TYPE_SHARED)
+    itemsize = MPI.DOUBLE.Get_size()
+    size_bytes = size * itemsize + size_idx * MPI.INT32_T.Get_size()
+    local_size = size_bytes if comm.Get_rank() == 0 else 0
+    nuclide_data_window = MPI.Win.Allocate_shared(local_size, itemsize, comm=comm)
+    buffer, _ = nuclide_data_window.Shared_query(0)
+    nuclide_data = np.ndarray(buffer=buffer, dtype=np.float64, shape=(size,))
+    E_union_idx = np.ndarray(
+        buffer=buffer, dtype=np.int32, shape=(size_idx,), offset=size * itemsize
+    )
+    return nuclide_data, E_union_idx, comm
+
+
+nuclide_data_window = None
+
+
 # =============================================================================
 # prepare domain decomposition
 # =============================================================================
@@ -297,6 +366,236 @@ def dd_mesh_bounds(idx):
     return mesh_xn, mesh_xp, mesh_yn, mesh_yp, mesh_zn, mesh_zp
 
 
+# =============================================================================
+# Cell region programs
+# =============================================================================
+
+# Region program compilation tasks
+EMIT_TREE = 0
+EMIT_LEFT = 1
+
+
+def compile_region_program(RPN):
+    """
+    Compile the region RPN into a short-circuit program
+
+    The program is [entry node, (surface ID, target if positive, target if
+    negative) for each node], with one node per surface token. Evaluation
+    starts at the entry node and follows the targets until reaching
+    REGION_TRUE or REGION_FALSE, so that it stops at the first decisive
+    halfspace. An empty RPN (region "all") gives REGION_TRUE.
+    """
+    # Build the expression tree
+    stack = []
+    for token in RPN:
+        if token >= 0:
+            stack.append(token)
+        elif token == BOOL_NOT:
+            stack.append((BOOL_NOT, stack.pop()))
+        else:
+            right = stack.pop()
+            left = stack.pop()
+            stack.append((token, left, right))
+    if len(stack) == 0:
+        return [REGION_TRUE]
+
+    # Emit the nodes, each operand only knowing its jump targets. The right
+    # operand is emitted first, as the left one jumps to its entry node.
+    program = [0]
+    entries = []
+    work = [(EMIT_TREE, stack[0], REGION_TRUE, REGION_FALSE)]
+    while len(work) > 0:
+        task, tree, target_true, target_false = work.pop()
+        if task == EMIT_LEFT:
+            entry_right = entries.pop()
+            if tree[0] == BOOL_AND:
+                work.append((EMIT_TREE, tree[1], entry_right, target_false))
+            else:
+                work.append((EMIT_TREE, tree[1], target_true, entry_right))
+        elif not isinstance(tree, tuple):
+            program.extend([tree, target_true, target_false])
+            entries.append(len(program) // 3 - 1)
+        elif tree[0] == BOOL_NOT:
+            work.append((EMIT_TREE, tree[1], target_false, target_true))
+        else:
+            work.append((EMIT_LEFT, tree, target_true, target_false))
+            work.append((EMIT_TREE, tree[2], target_true, target_false))
+
+    program[0] = entries.pop()
+    return program
+
+
+# =============================================================================
+# Cell bounding boxes and universe cell search grids
+# =============================================================================
+
+
+def surface_bounding_boxes(surface):
+    """
+    Axis-aligned bounding boxes [x_min, x_max, y_min, y_max, z_min, z_max] of
+    the positive and the negative sides of the surface
+
+    Only derived for axis-aligned planes and for quadrics without cross terms
+    that enclose a bounded or axis-aligned region (e.g., spheres, cylinders);
+    otherwise, the boxes are infinite.
+    """
+    box_positive = np.array([-INF, INF, -INF, INF, -INF, INF])
+    box_negative = np.array([-INF, INF, -INF, INF, -INF, INF])
+
+    a = np.array([surface.A, surface.B, surface.C])
+    g = np.array([surface.G, surface.H, surface.I])
+    J = surface.J
+    if surface.D != 0.0 or surface.E != 0.0 or surface.F != 0.0:
+        return box_positive, box_negative
+
+    # Plane
+    if np.all(a == 0.0):
+        axes = np.nonzero(g)[0]
+        if len(axes) == 1:
+            i = axes[0]
+            bound = -J / g[i]
+            if g[i] > 0.0:
+                box_positive[2 * i] = bound
+                box_negative[2 * i + 1] = bound
+            else:
+                box_positive[2 * i + 1] = bound
+                box_negative[2 * i] = bound
+        return box_positive, box_negative
+
+    # Quadric: sum_i a_i (x_i - c_i)^2 + K
+    active = a != 0.0
+    if np.any(g[~active] != 0.0):
+        return box_positive, box_negative
+    if np.all(a[active] > 0.0):
+        box_inside = box_negative
+    elif np.all(a[active] < 0.0):
+        box_inside = box_positive
+        a, g, J = -a, -g, -J
+    else:
+        return box_positive, box_negative
+    K = J - np.sum(g[active] ** 2 / (4.0 * a[active]))
+    if K >= 0.0:
+        return box_positive, box_negative
+    for i in np.nonzero(active)[0]:
+        center = -g[i] / (2.0 * a[i])
+        half_width = math.sqrt(-K / a[i])
+        box_inside[2 * i] = center - half_width
+        box_inside[2 * i + 1] = center + half_width
+    return box_positive, box_negative
+
+
+def cell_bounding_box(cell, surfaces):
+    """
+    Axis-aligned bounding box of the cell region
+
+    The RPN tokens are evaluated on pairs of boxes bounding a region and its
+    complement, so that complements need no special treatment.
+    """
+    stack = []
+    for token in cell._region_RPN:
+        if token >= 0:
+            stack.append(surface_bounding_boxes(surfaces[token]))
+        elif token == BOOL_NOT:
+            box, box_complement = stack.pop()
+            stack.append((box_complement, box))
+        else:
+            box_1, box_complement_1 = stack.pop()
+            box_2, box_complement_2 = stack.pop()
+            if token == BOOL_AND:
+                stack.append(
+                    (
+                        box_intersection(box_1, box_2),
+                        box_union(box_complement_1, box_complement_2),
+                    )
+                )
+            else:
+                stack.append(
+                    (
+                        box_union(box_1, box_2),
+                        box_intersection(box_complement_1, box_complement_2),
+                    )
+                )
+
+    if len(stack) == 0:
+        return np.array([-INF, INF, -INF, INF, -INF, INF])
+    box = stack[0][0]
+
+    # Pad the finite bounds for the surface coincidence tolerance
+    padding = 1e-9 * (1.0 + np.abs(box))
+    padding[np.abs(box) >= INF] = 0.0
+    box[0::2] -= padding[0::2]
+    box[1::2] += padding[1::2]
+    return box
+
+
+def box_intersection(box_1, box_2):
+    box = np.zeros(6)
+    box[0::2] = np.maximum(box_1[0::2], box_2[0::2])
+    box[1::2] = np.minimum(box_1[1::2], box_2[1::2])
+    return box
+
+
+def box_union(box_1, box_2):
+    box = np.zeros(6)
+    box[0::2] = np.minimum(box_1[0::2], box_2[0::2])
+    box[1::2] = np.maximum(box_1[1::2], box_2[1::2])
+    return box
+
+
+def make_universe_grid(universe, cells, N_bin):
+    """
+    Uniform grid over the finite extent of the universe cell bounding boxes,
+    listing (in the universe order) the cells whose boxes overlap each grid bin
+
+    Axes without finite extent get a single bin. Return the grid lower
+    corner, index factors (number of bins per unit length), number of bins,
+    and bin cell lists in compressed form (bin offsets and cell IDs).
+    """
+    boxes = [cells[ID]._bbox for ID in universe.cell_IDs]
+    low = np.zeros(3)
+    factor = np.zeros(3)
+    N = np.ones(3, dtype=int)
+    for i in range(3):
+        bounds = np.array([box[2 * i : 2 * i + 2] for box in boxes]).flatten()
+        bounds = bounds[np.abs(bounds) < INF]
+        if len(bounds) > 0 and bounds.max() > bounds.min():
+            low[i] = bounds.min()
+            factor[i] = N_bin / (bounds.max() - bounds.min())
+            N[i] = N_bin
+
+    # Bin index ranges of the cell boxes, and the number of cells per bin
+    ranges = []
+    counts = np.zeros(N, dtype=int)
+    for cell_ID, box in zip(universe.cell_IDs, boxes):
+        if np.any(box[0::2] > box[1::2]):
+            continue
+        idx_low = np.zeros(3, dtype=int)
+        idx_high = np.zeros(3, dtype=int)
+        for i in range(3):
+            if factor[i] > 0.0:
+                for j, bound in enumerate(box[2 * i : 2 * i + 2]):
+                    idx = (bound - low[i]) * factor[i]
+                    idx = min(max(idx, 0), N[i] - 1)
+                    if j == 0:
+                        idx_low[i] = int(idx)
+                    else:
+                        idx_high[i] = int(idx)
+        bins = tuple(slice(idx_low[i], idx_high[i] + 1) for i in range(3))
+        counts[bins] += 1
+        ranges.append((cell_ID, bins))
+
+    # Fill the preallocated bin cell lists (bin index is (ix * Ny + iy) * Nz + iz)
+    offsets = np.zeros(counts.size + 1, dtype=int)
+    offsets[1:] = np.cumsum(counts.flatten())
+    cell_IDs = np.zeros(offsets[-1], dtype=int)
+    fill = offsets[:-1].reshape(N).copy()
+    for cell_ID, bins in ranges:
+        cell_IDs[fill[bins]] = cell_ID
+        fill[bins] += 1
+
+    return low, factor, N, offsets, cell_IDs
+
+
 def prepare():
     """
     Preparing the MC transport simulation:
@@ -337,6 +636,170 @@ def prepare():
                     cell._region_RPN.insert(i + 1, BOOL_NOT)
             i += 1
 
+    # =========================================================================
+    # Compile cell region RPN into short-circuit programs
+    # =========================================================================
+
+    for cell in input_deck.cells:
+        cell._region_program = compile_region_program(cell._region_RPN)
+
+    # =========================================================================
+    # Cell bounding boxes and universe cell search grids
+    # =========================================================================
+
+    for cell in input_deck.cells:
+        cell._bbox = cell_bounding_box(cell, input_deck.surfaces)
+
+    N_bin = input_deck.setting["universe_grid_size"]
+    for universe in input_deck.universes:
+        universe._grid_N = None
+        if N_bin > 0 and universe.N_cell > 1:
+            (
+                universe._grid_low,
+                universe._grid_factor,
+                universe._grid_N,
+                universe._grid_offsets,
+                universe._grid_cell_IDs,
+            ) = make_universe_grid(universe, input_deck.cells, N_bin)
+
+    # =========================================================================
+    # Check delta tracking support
+    #   - Only the root universe cell boundaries are crossed as events
+    #   - Flights span materials, so the time is advanced with the MG speed of
+    #     the material where the flight starts
+    # =========================================================================
+
+    if input_deck.setting["delta_tracking"]:
+        root_surface_IDs = set()
+        for cell_ID in input_deck.universes[UNIVERSE_ROOT].cell_IDs:
+            root_surface_IDs.update(input_deck.cells[cell_ID].surface_IDs)
+        for tally in input_deck.surface_tallies:
+            if tally.surface_ID not in root_surface_IDs:
+                print_error(
+                    "Delta tracking only supports surface tallies on surfaces of "
+                    "the root universe cells"
+                )
+        if input_deck.setting["mode_MG"] and any(
+            [
+                not np.array_equal(material.speed, input_deck.materials[0].speed)
+                for material in input_deck.materials
+            ]
+        ):
+            print_warning(
+                "MG speeds differ across materials; delta tracking advances the "
+                "particle time with the speed of the material where the flight "
+                "starts"
+            )
+
+    # =========================================================================
+    # Grouped-history tally statistics
+    #   - The GPU source loop closes out the histories all at once
+    # =========================================================================
+
+    if input_deck.setting["history_group_size"] > 1 and config.target == "gpu":
+        print_error("Grouped-history tally statistics are not supported on GPU")
+
+    # =========================================================================
+    # Shared-memory threads
+    #   - Source particles are run by numba threads, each with its own active
+    #     bank and tally copy
+    #   - The other particle banks and the eigenvalue tallies are shared and
+    #     updated atomically
+    # =========================================================================
+
+    N_thread = input_deck.setting["N_thread"]
+    if N_thread > 1:
+        if config.target == "gpu":
+            print_error("Shared-memory threads are not supported on GPU")
+        for name in ["domain_decomposition", "uq", "iQMC"]:
+            if input_deck.technique[name]:
+                print_error("Shared-memory threads are not supported with %s" % name)
+        if N_thread > nb.config.NUMBA_NUM_THREADS:
+            print_error(
+                "N_thread (%i) exceeds the number of Numba threads available (%i); "
+                "set NUMBA_NUM_THREADS" % (N_thread, nb.config.NUMBA_NUM_THREADS)
+            )
+        nb.set_num_threads(N_thread)
+    loop.THREADED = N_thread > 1
+
+    # =========================================================================
+    # Census and source bank layout
+    # =========================================================================
+
+    bank_soa = input_deck.setting["bank_layout"] == "soa"
+    if bank_soa:
+        if config.target == "gpu":
+            print_error("The SoA bank layout is not supported on GPU")
+        if input_deck.technique["iQMC"]:
+            print_error("The SoA bank layout is not supported with iQMC")
+    kernel.BANK_SOA = bank_soa
+
+    # =========================================================================
+    # Dynamic MPI work distribution
+    #   - The ranks take chunks of the sampled source particles from a counter
+    #     in a one-sided MPI window of the master rank
+    #   - Chunks hold whole history groups, so that the groups do not depend
+    #     on which rank takes which chunk
+    # =========================================================================
+
+    work_chunk_size = input_deck.setting["work_chunk_size"]
+    if work_chunk_size > 0:
+        if input_deck.setting["mode_eigenvalue"]:
+            print_error("Dynamic work distribution is only for fixed-source problems")
+        if config.target == "gpu":
+            print_error("Dynamic work distribution is not supported on GPU")
+        if N_thread > 1:
+            print_error("Dynamic work distribution is not supported with N_thread > 1")
+        for name in ["domain_decomposition", "uq", "iQMC"]:
+            if input_deck.technique[name]:
+                print_error("Dynamic work distribution is not supported with %s" % name)
+        if work_chunk_size % input_deck.setting["history_group_size"] != 0:
+            print_error("work_chunk_size must be a multiple of history_group_size")
+        if loop.work_window is None:
+            size = 8 if MPI.COMM_WORLD.Get_rank() == 0 else 0
+            loop.work_window = MPI.Win.Allocate(size, 8, comm=MPI.COMM_WORLD)
+
+    # =========================================================================
+    # Event-based transport
+    #   - The source particles are run in batches held in a structure-of-arrays
+    #     particle pool, and advanced by event kernels over the pool
+    #   - Each batch is one tally history group
+    # =========================================================================
+
+    event_batch_size = input_deck.setting["event_batch_size"]
+    if event_batch_size > 0:
+        if input_deck.setting["mode_eigenvalue"]:
+            print_error("Event-based transport is only for fixed-source problems")
+        if input_deck.setting["mode_CE"]:
+            print_error("Event-based transport is only for multigroup problems")
+        if config.target == "gpu":
+            print_error("Event-based transport is not supported on GPU")
+        if N_thread > 1:
+            print_error("Event-based transport is not supported with N_thread > 1")
+        if work_chunk_size > 0:
+            print_error(
+                "Event-based transport is not supported with dynamic work "
+                "distribution"
+            )
+        for name in ["delta_tracking", "surface_distance_cache"]:
+            if input_deck.setting[name]:
+                print_error("Event-based transport is not supported with %s" % name)
+        for name in [
+            "domain_decomposition",
+            "uq",
+            "iQMC",
+            "IC_generator",
+            "branchless_collision",
+            "weight_window",
+            "weight_roulette",
+        ]:
+            if input_deck.technique[name]:
+                print_error("Event-based transport is not supported with %s" % name)
+        if input_deck.setting["history_group_size"] == 1:
+            input_deck.setting["history_group_size"] = event_batch_size
+        elif input_deck.setting["history_group_size"] != event_batch_size:
+            print_error("history_group_size must be event_batch_size")
+
     # =========================================================================
     # Adapt kernels
     # =========================================================================
@@ -363,7 +826,7 @@ def prepare():
     type_.make_type_dd_turnstile_event(input_deck)
     type_.make_type_technique(input_deck)
     type_.make_type_global(input_deck)
-    type_.make_size_rpn(input_deck)
+    type_.make_size_sense_cache(input_deck)
     kernel.adapt_rng(nb.config.DISABLE_JIT)
 
     input_deck.setting["target"] = config.target
@@ -386,6 +849,25 @@ def prepare():
     # Nuclides
     # =========================================================================
 
+    # Nuclide CE data pool
+    #   If node-shared, only the node master loads the data
+    #   (together with the unionized energy grid index maps)
+    nuclide_data = mcdc["nuclide_data"]
+    nuclide_data_load = nuclide_data
+    E_union_idx = mcdc["E_union_idx"]
+    E_union_idx_load = E_union_idx
+    if mode_CE and input_deck.setting["xs_shared_memory"]:
+        if config.target == "gpu":
+            print_error("Node-shared nuclide data is not supported on GPU")
+        nuclide_data, E_union_idx, node_comm = allocate_shared_nuclide_data(
+            type_.nuclide_data_size, len(input_deck.nuclides) * type_.E_union_size
+        )
+        nuclide_data_load = nuclide_data if node_comm.Get_rank() == 0 else None
+        E_union_idx_load = E_union_idx if node_comm.Get_rank() == 0 else None
+        mcdc["nuclide_data_address"] = nuclide_data.ctypes.data
+        mcdc["E_union_idx_address"] = E_union_idx.ctypes.data
+    mcdc["nuclide_data_size"] = type_.nuclide_data_size
+
     N_nuclide = len(input_deck.nuclides)
     for i in range(N_nuclide):
         # General data
@@ -413,67 +895,125 @@ def prepare():
             ]:
                 copy_field(mcdc["nuclides"][i], input_deck.nuclides[i], name)
 
-        # CE data (load data from XS library)
-        dir_name = os.getenv("MCDC_XSLIB")
-        if mode_CE:
-            nuc_name = input_deck.nuclides[i].name
-            with h5py.File(dir_name + "/" + nuc_name + ".h5", "r") as f:
-                # Atomic weight ratio
-                mcdc["nuclides"][i]["A"] = f["A"][()]
-                # Energy grids
-                for name in [
-                    "E_xs",
-                    "E_nu_p",
-                    "E_nu_d",
-                    "E_chi_p",
-                    "E_chi_d1",
-                    "E_chi_d2",
-                    "E_chi_d3",
-                    "E_chi_d4",
-                    "E_chi_d5",
-                    "E_chi_d6",
-                ]:
-                    mcdc["nuclides"][i]["N" + name] = len(f[name][:])
-                    mcdc["nuclides"][i][name][: len(f[name][:])] = f[name][:]
-
-                # XS
-                for name in ["capture", "scatter", "fission"]:
-                    mcdc["nuclides"][i]["ce_" + name][: len(f[name][:])] = f[name][:]
-                    mcdc["nuclides"][i]["ce_total"][: len(f[name][:])] += f[name][:]
-
-                # Fission production
-                mcdc["nuclides"][i]["ce_nu_p"][: len(f["nu_p"][:])] = f["nu_p"][:]
-                for j in range(6):
-                    mcdc["nuclides"][i]["ce_nu_d"][j][: len(f["nu_d"][j, :])] = f[
-                        "nu_d"
-                    ][j, :]
-
-                # Fission spectrum
-                mcdc["nuclides"][i]["ce_chi_p"][: len(f["chi_p"][:])] = f["chi_p"][:]
-                for j in range(6):
-                    mcdc["nuclides"][i]["ce_chi_d%i" % (j + 1)][
-                        : len(f["chi_d%i" % (j + 1)][:])
-                    ] = f["chi_d%i" % (j + 1)][:]
-
-                # Decay
-                mcdc["nuclides"][i]["ce_decay"][: len(f["decay_rate"][:])] = f[
-                    "decay_rate"
-                ][:]
+    # CE data (load data from XS library into the data pool)
+    if mode_CE:
+        nuclide_names = [nuclide.name for nuclide in input_deck.nuclides]
+        library = xslib.load_nuclides(nuclide_names, nuclide_data_load)
+        data_idx = 0
+        for i in range(N_nuclide):
+            nuclide = mcdc["nuclides"][i]
+            sizes, A, decay_rate = library[i]
+            nuclide["A"] = A
+            nuclide["ce_decay"][:] = decay_rate
+            for name in xslib.GRID_NAMES:
+                nuclide["N" + name] = sizes["N" + name]
+
+            # Locations in the data pool
+            for name, grid, N_row in xslib.DATA_LAYOUT:
+                nuclide[name + "_data_idx"] = data_idx
+                data_idx += N_row * sizes["N" + grid]
+
+    # Make the node-shared nuclide data visible to all ranks on the node
+    if mode_CE and input_deck.setting["xs_shared_memory"]:
+        node_comm.Barrier()
+
+    # Unionized XS energy grid and the per-nuclide index maps
+    if mode_CE:
+        E_union = np.zeros(0)
+        for nuclide in mcdc["nuclides"]:
+            E_xs = nuclide_data_view(nuclide, "E_xs", nuclide["NE_xs"], nuclide_data)
+            E_union = np.union1d(E_union, E_xs)
+        NE_union = len(E_union)
+        mcdc["NE_union"] = NE_union
+        mcdc["E_union"][:NE_union] = E_union
+        if E_union_idx_load is not None:
+            for i, nuclide in enumerate(mcdc["nuclides"]):
+                E_xs = nuclide_data_view(
+                    nuclide, "E_xs", nuclide["NE_xs"], nuclide_data_load
+                )
+                E_union_idx_load[i * NE_union : (i + 1) * NE_union] = (
+                    np.searchsorted(E_xs, E_union, side="right") - 1
+                )
+
+        # Make the node-shared maps visible to all ranks on the node
+        if input_deck.setting["xs_shared_memory"]:
+            node_comm.Barrier()
+
+    # Hash tables bounding the energy grid and fission spectrum searches
+    N_hash = input_deck.setting["energy_hash_size"]
+    if mode_CE and N_hash > 0:
+        # Logarithmic hash over the unionized energy grid
+        #   (starting from the lowest positive energy)
+        log_min = np.log(E_union[E_union > 0.0][0])
+        log_max = np.log(E_union[-1])
+        mcdc["E_union_log_min"] = log_min
+        mcdc["E_union_hash_factor"] = N_hash / (log_max - log_min)
+        E_bound = np.exp(np.linspace(log_min, log_max, N_hash + 1))
+        mcdc["E_union_hash"][:] = np.searchsorted(E_union, E_bound, side="left")
+        mcdc["E_union_hash"][0] = 0
+
+        # Uniform hash over the fission spectrum CDFs
+        cdf_bound = np.linspace(0.0, 1.0, N_hash + 1)
+        for nuclide in mcdc["nuclides"]:
+            for j, name in enumerate(
+                ["chi_p", "chi_d1", "chi_d2", "chi_d3", "chi_d4", "chi_d5", "chi_d6"]
+            ):
+                chi = nuclide_data_view(
+                    nuclide, "ce_" + name, nuclide["NE_" + name], nuclide_data
+                )
+                nuclide["chi_hash"][j] = np.searchsorted(chi, cdf_bound, side="left")
 
     # =========================================================================
     # Materials
     # =========================================================================
 
     N_material = len(input_deck.materials)
+    material_data_idx = 0
     for i in range(N_material):
         for name in type_.material.names:
-            if name in ["nuclide_IDs", "nuclide_densities"]:
+            if name[:3] == "ce_":
+                continue
+            elif name in ["nuclide_IDs", "nuclide_densities"]:
                 mcdc["materials"][i][name][: mcdc["materials"][i]["N_nuclide"]] = (
                     getattr(input_deck.materials[i], name)
                 )
             else:
                 copy_field(mcdc["materials"][i], input_deck.materials[i], name)
 
+        # Precomputed CE macroscopic XS on the unionized energy grid
+        #   (in the material data pool)
+        material = mcdc["materials"][i]
+        if mode_CE and material["precompute_xs"]:
+            NE_union = mcdc["NE_union"]
+            for name in ["total", "capture", "scatter", "fission"]:
+                material["ce_" + name + "_data_idx"] = material_data_idx
+                mcdc["material_data"][
+                    material_data_idx : material_data_idx + NE_union
+                ] = get_material_xs_union(
+                    material, name, nuclide_data, E_union_idx, mcdc
+                )
+                material_data_idx += NE_union
+
+    # =========================================================================
+    # Delta tracking majorant XS
+    #   MG: per group
+    #   CE: per unionized energy grid bin, bounding the materials' total XS,
+    #       which are linear within each bin
+    # =========================================================================
+
+    if input_deck.setting["delta_tracking"]:
+        majorant = 0.0
+        for material in mcdc["materials"]:
+            if mode_MG:
+                total = material["total"][: material["G"]]
+            else:
+                total = get_material_xs_union(
+                    material, "total", nuclide_data, E_union_idx, mcdc
+                )
+                total = np.maximum(total[:-1], total[1:])
+            majorant = np.maximum(majorant, total)
+        mcdc["majorant_xs"][: len(majorant)] = majorant
+
     # =========================================================================
     # Surfaces
     # =========================================================================
@@ -482,9 +1022,22 @@ def prepare():
     for i in range(N_surface):
         # Direct assignment
         for name in type_.surface.names:
-            if name not in ["BC", "tally_IDs"]:
+            if name not in ["type", "BC", "tally_IDs"]:
                 copy_field(mcdc["surfaces"][i], input_deck.surfaces[i], name)
 
+        # Surface type
+        mcdc["surfaces"][i]["type"] = {
+            "quadric": SURFACE_QUADRIC,
+            "plane": SURFACE_PLANE,
+            "plane-x": SURFACE_PLANE_X,
+            "plane-y": SURFACE_PLANE_Y,
+            "plane-z": SURFACE_PLANE_Z,
+            "cylinder-x": SURFACE_CYLINDER_X,
+            "cylinder-y": SURFACE_CYLINDER_Y,
+            "cylinder-z": SURFACE_CYLINDER_Z,
+            "sphere": SURFACE_SPHERE,
+        }[input_deck.surfaces[i].type]
+
         # Boundary condition
         if input_deck.surfaces[i].boundary_type == "interface":
             mcdc["surfaces"][i]["BC"] = BC_NONE
@@ -505,6 +1058,7 @@ def prepare():
     N_cell = len(input_deck.cells)
     surface_data_idx = 0
     region_data_idx = 0
+    neighbor_data_idx = 0
     for i in range(N_cell):
         for name in ["ID", "fill_ID", "translation"]:
             copy_field(mcdc["cells"][i], input_deck.cells[i], name)
@@ -532,21 +1086,35 @@ def prepare():
 
         # Region data
         mcdc["cells"][i]["region_data_idx"] = region_data_idx
-        N_RPN = len(input_deck.cells[i]._region_RPN)
-        mcdc["cell_region_data"][region_data_idx] = N_RPN
-        mcdc["cell_region_data"][region_data_idx + 1 : region_data_idx + N_RPN + 1] = (
-            input_deck.cells[i]._region_RPN
-        )
-        region_data_idx += N_RPN + 1
+        N_program = len(input_deck.cells[i]._region_program)
+        mcdc["cell_region_data"][region_data_idx] = N_program
+        mcdc["cell_region_data"][
+            region_data_idx + 1 : region_data_idx + N_program + 1
+        ] = input_deck.cells[i]._region_program
+        region_data_idx += N_program + 1
+
+        # Bounding box
+        mcdc["cells"][i]["bbox"] = input_deck.cells[i]._bbox
+
+        # Neighbor data (a list for each cell surface)
+        mcdc["cells"][i]["neighbor_data_idx"] = neighbor_data_idx
+        neighbor_data_idx += N_surface * input_deck.setting["cell_neighbor_size"]
 
     # =========================================================================
     # Universes
     # =========================================================================
 
     N_universe = len(input_deck.universes)
+    grid_data_idx = 0
     for i in range(N_universe):
         for name in type_.universe.names:
-            if name not in ["cell_IDs"]:
+            if name not in [
+                "cell_IDs",
+                "grid_data_idx",
+                "grid_low",
+                "grid_factor",
+                "grid_N",
+            ]:
                 mcdc["universes"][i][name] = getattr(input_deck.universes[i], name)
 
         # Variables with possible different sizes
@@ -554,14 +1122,75 @@ def prepare():
             N = mcdc["universes"][i]["N_cell"]
             mcdc["universes"][i][name][:N] = getattr(input_deck.universes[i], name)
 
+        # Cell search grid: bin offsets (absolute) followed by bin cell lists
+        universe = input_deck.universes[i]
+        mcdc["universes"][i]["grid_data_idx"] = -1
+        if universe._grid_N is not None:
+            mcdc["universes"][i]["grid_data_idx"] = grid_data_idx
+            mcdc["universes"][i]["grid_low"] = universe._grid_low
+            mcdc["universes"][i]["grid_factor"] = universe._grid_factor
+            mcdc["universes"][i]["grid_N"] = universe._grid_N
+            N_offset = len(universe._grid_offsets)
+            N = len(universe._grid_cell_IDs)
+            start = grid_data_idx + N_offset
+            mcdc["universe_grid_data"][grid_data_idx:start] = (
+                start + universe._grid_offsets
+            )
+            mcdc["universe_grid_data"][start : start + N] = universe._grid_cell_IDs
+            grid_data_idx = start + N
+
+    # =========================================================================
+    # Cell neighbor lists
+    # =========================================================================
+
+    N_neighbor = input_deck.setting["cell_neighbor_size"]
+    mcdc["cell_neighbor_data"][:] = -1
+
+    # Prepopulate with the root universe cells sharing the surface
+    if N_neighbor > 0 and input_deck.setting["cell_neighbor_prepopulate"]:
+        root_cell_IDs = input_deck.universes[UNIVERSE_ROOT].cell_IDs
+        surface_cell_IDs = {}
+        for cell_ID in root_cell_IDs:
+            for surface_ID in input_deck.cells[cell_ID].surface_IDs:
+                surface_cell_IDs.setdefault(surface_ID, []).append(cell_ID)
+
+        for cell_ID in root_cell_IDs:
+            idx = mcdc["cells"][cell_ID]["neighbor_data_idx"]
+            for surface_ID in input_deck.cells[cell_ID].surface_IDs:
+                neighbors = [ID for ID in surface_cell_IDs[surface_ID] if ID != cell_ID]
+                neighbors = neighbors[:N_neighbor]
+                mcdc["cell_neighbor_data"][idx : idx + len(neighbors)] = neighbors
+                idx += N_neighbor
+
     # =========================================================================
     # Lattices
     # =========================================================================
 
+    # Material of the universes made of a single material cell with no
+    # surfaces (-1 otherwise)
+    universe_material_IDs = []
+    for universe in input_deck.universes:
+        material_ID = -1
+        if len(universe.cell_IDs) == 1:
+            cell = input_deck.cells[universe.cell_IDs[0]]
+            if cell.fill_type == "material" and len(cell.surface_IDs) == 0:
+                material_ID = cell.fill_ID
+        universe_material_IDs.append(material_ID)
+
     N_lattice = len(input_deck.lattices)
     for i in range(N_lattice):
         for name in type_.lattice.names:
-            if name not in ["universe_IDs", "t0", "dt", "Nt"]:
+            if name not in [
+                "universe_IDs",
+                "material_IDs",
+                "t0",
+                "dt",
+                "Nt",
+                "inv_dx",
+                "inv_dy",
+                "inv_dz",
+                "inv_dt",
+            ]:
                 mcdc["lattices"][i][name] = getattr(input_deck.lattices[i], name)
 
         # Universe IDs
@@ -572,11 +1201,24 @@ def prepare():
             i
         ].universe_IDs
 
+        # Single-material-cell shortcuts
+        for ix in range(Nx):
+            for iy in range(Ny):
+                for iz in range(Nz):
+                    universe_ID = mcdc["lattices"][i]["universe_IDs"][ix, iy, iz]
+                    mcdc["lattices"][i]["material_IDs"][ix, iy, iz] = (
+                        universe_material_IDs[universe_ID]
+                    )
+
         # Default for time grid
         mcdc["lattices"][i]["t0"] = 0.0
         mcdc["lattices"][i]["dt"] = INF
         mcdc["lattices"][i]["Nt"] = 1
 
+        # Reciprocal pitches
+        for axis in ["x", "y", "z", "t"]:
+            mcdc["lattices"][i]["inv_d" + axis] = 1.0 / mcdc["lattices"][i]["d" + axis]
+
     # =========================================================================
     # Source
     # =========================================================================
@@ -751,7 +1393,9 @@ def prepare():
     # =========================================================================
 
     type_.make_type_tally(input_deck, tally_size)
-    data_arr = np.zeros(1, dtype=type_.tally)
+
+    # Thread-private tally copies, reduced into the first one
+    data_arr = np.zeros(input_deck.setting["N_thread"], dtype=type_.tally)
 
     # =========================================================================
     # Platform Targeting, Adapters, Toggles, etc
@@ -1065,10 +1709,12 @@ def prepare():
                     end = start + N_local
 
                     # Add particles to source bank
-                    mcdc["bank_source"]["particles"][:N_local] = f["particles"][
-                        start:end
-                    ]
-                    mcdc["bank_source"]["size"] = N_local
+                    particles = f["particles"][start:end]
+                    kernel.set_bank_records(
+                        mcdc["bank_source"],
+                        particles.astype(type_.particle_record),
+                        N_local,
+                    )
         MPI.COMM_WORLD.Barrier()
 
     # =========================================================================
@@ -1091,8 +1737,10 @@ def prepare():
             end = start + N_local
 
             # Add particles to source bank
-            mcdc["bank_source"]["particles"][:N_local] = f["IC/neutrons"][start:end]
-            mcdc["bank_source"]["size"] = N_local
+            particles = f["IC/neutrons"][start:end]
+            kernel.set_bank_records(
+                mcdc["bank_source"], particles.astype(type_.particle_record), N_local
+            )
 
             # =================================================================
             # Set precursor source
@@ -1221,7 +1869,7 @@ def dd_mergetally(mcdc, data):
     return dd_tally
 
 
-def generate_hdf5(data, mcdc):
+def generate_hdf5(data, mcdc, volumes):
 
     if mcdc["technique"]["domain_decomposition"]:
         dd_tally = dd_mergetally(mcdc, data)
@@ -1250,6 +1898,9 @@ def generate_hdf5(data, mcdc):
                 cardlist_to_h5group(
                     input_deck.surface_tallies, input_group, "surface_tally"
                 )
+                cardlist_to_h5group(
+                    input_deck.volume_calculations, input_group, "volume_calculation"
+                )
                 dict_to_h5group(input_deck.setting, input_group.create_group("setting"))
                 dict_to_h5group(
                     input_deck.technique, input_group.create_group("technique")
@@ -1373,6 +2024,13 @@ def generate_hdf5(data, mcdc):
                         uq_var = tot_var - mc_var
                         f.create_dataset(group_name + "uq_var", data=uq_var)
 
+            # Volume calculations
+            for ID, result in enumerate(volumes):
+                group_name = "volume_calculations/volume_calculation_%i/" % ID
+                for name, (mean, sdev) in result.items():
+                    f.create_dataset(group_name + name + "/mean", data=mean)
+                    f.create_dataset(group_name + name + "/sdev", data=sdev)
+
             # Eigenvalues
             if mcdc["setting"]["mode_eigenvalue"]:
                 if mcdc["technique"]["iQMC"]:
@@ -1389,10 +2047,12 @@ def generate_hdf5(data, mcdc):
                     f.create_dataset("k_sdev", data=mcdc["k_sdv_running"])
                     f.create_dataset("global_tally/neutron/mean", data=mcdc["n_avg"])
                     f.create_dataset("global_tally/neutron/sdev", data=mcdc["n_sdv"])
-                    f.create_dataset("global_tally/neutron/max", data=mcdc["n_max"])
+                    f.create_dataset("global_tally/neutron/max", data=mcdc["n_max"][0])
                     f.create_dataset("global_tally/precursor/mean", data=mcdc["C_avg"])
                     f.create_dataset("global_tally/precursor/sdev", data=mcdc["C_sdv"])
-                    f.create_dataset("global_tally/precursor/max", data=mcdc["C_max"])
+                    f.create_dataset(
+                        "global_tally/precursor/max", data=mcdc["C_max"][0]
+                    )
                     if mcdc["setting"]["gyration_radius"]:
                         f.create_dataset(
                             "gyration_radius", data=mcdc["gyration_radius"][:N_cycle]
@@ -1458,8 +2118,10 @@ def generate_hdf5(data, mcdc):
     if mcdc["setting"]["save_particle"]:
         # Gather source bank
         # TODO: Parallel HDF5 and mitigation of large data passing
-        N = mcdc["bank_source"]["size"]
-        neutrons = MPI.COMM_WORLD.gather(mcdc["bank_source"]["particles"][:N])
+        N = kernel.get_bank_size(mcdc["bank_source"])
+        neutrons = MPI.COMM_WORLD.gather(
+            kernel.get_bank_records(mcdc["bank_source"], N)
+        )
 
         # Master saves the particle
         if mcdc["mpi_master"]:
@@ -1476,6 +2138,17 @@ def closeout(mcdc):
 
     loop.teardown_gpu(mcdc)
 
+    # Release the node-shared nuclide data
+    global nuclide_data_window
+    if nuclide_data_window is not None:
+        nuclide_data_window.Free()
+        nuclide_data_window = None
+
+    # Release the dynamic work counter
+    if loop.work_window is not None:
+        loop.work_window.Free()
+        loop.work_window = None
+
     # Runtime
     if mcdc["mpi_master"]:
         with h5py.File(mcdc["setting"]["output_name"] + ".h5", "a") as f:
@@ -1499,6 +2172,245 @@ def closeout(mcdc):
 # ======================================================================================
 
 
+def locate_points(x, y, z, mcdc_arr=None):
+    """
+    Locate points in the created model
+
+    Parameters
+    ----------
+    x, y, z : array_like
+        Coordinates of the points (broadcast to a common shape)
+    mcdc_arr : numpy.ndarray, optional
+        Global state container from `prepare` (`prepare` is called if not
+        given)
+
+    Returns
+    -------
+    material_IDs, cell_IDs : numpy.ndarray
+        Material and root-universe cell IDs at the points, in the broadcast
+        shape (-1 for points outside the model)
+    """
+    if mcdc_arr is None:
+        _, mcdc_arr = prepare()
+
+    x, y, z = np.broadcast_arrays(
+        np.asarray(x, dtype=np.float64),
+        np.asarray(y, dtype=np.float64),
+        np.asarray(z, dtype=np.float64),
+    )
+    shape = x.shape
+    x = x.flatten()
+    y = y.flatten()
+    z = z.flatten()
+
+    material_IDs = np.zeros(len(x), dtype=np.int64)
+    cell_IDs = np.zeros(len(x), dtype=np.int64)
+    geometry.locate_points(x, y, z, material_IDs, cell_IDs, mcdc_arr)
+    return material_IDs.reshape(shape), cell_IDs.reshape(shape)
+
+
+def get_sample_share(N_sample, mcdc):
+    """
+    Start and end indices of the samples of this MPI rank
+    """
+    size = mcdc["mpi_size"]
+    rank = mcdc["mpi_rank"]
+    start = rank * (N_sample // size) + min(rank, N_sample % size)
+    end = start + N_sample // size + (rank < N_sample % size)
+    return start, end
+
+
+def check_geometry(mcdc_arr):
+    """
+    Pre-flight geometry check
+
+    Random points in the bounding box of the root-universe cells are checked
+    for overlapping cells and undefined regions (see geometry.check_point).
+    The box over-approximates the model, so points outside all root-universe
+    cells are only reported if no surface with a vacuum or reflective boundary
+    condition separates them from a point in the model. Along the axes where
+    the box is unbounded, points are sampled at zero.
+
+    Problems are reported as warnings, with the locations of a few of them.
+    """
+    mcdc = mcdc_arr[0]
+    N_sample = input_deck.setting["geometry_check"]
+    if N_sample == 0:
+        return
+    N_example = 5
+
+    # Sampling box
+    root = mcdc["universes"][UNIVERSE_ROOT]
+    low = np.full(3, INF)
+    high = np.full(3, -INF)
+    for ID in root["cell_IDs"][: root["N_cell"]]:
+        bbox = mcdc["cells"][ID]["bbox"]
+        low = np.minimum(low, bbox[0::2])
+        high = np.maximum(high, bbox[1::2])
+    bounded = (low > -INF) & (high < INF)
+    low = np.where(bounded, low, 0.0)
+    high = np.where(bounded, high, 0.0)
+
+    # Check the points of this rank
+    start, end = get_sample_share(N_sample, mcdc)
+    seed = kernel.split_seed(mcdc["setting"]["rng_seed"], SEED_SPLIT_GEOMETRY_CHECK)
+    xi = kernel.rng_stream(seed, 3 * start, 3 * (end - start)).reshape(-1, 3)
+    points = low + (high - low) * xi
+    x = np.ascontiguousarray(points[:, 0])
+    y = np.ascontiguousarray(points[:, 1])
+    z = np.ascontiguousarray(points[:, 2])
+    results = np.zeros((end - start, 4), dtype=np.int64)
+    # The default small checks skip the compilation of the parallel loop
+    if end - start < GEOMETRY_CHECK_PARALLEL_MIN:
+        geometry.check_points(x, y, z, results, mcdc_arr)
+    else:
+        geometry.check_points_parallel(x, y, z, results, mcdc_arr)
+
+    # A point in the model (the first one found over all ranks)
+    outside = (results[:, 0] == GEOMETRY_CHECK_UNDEFINED) & (
+        results[:, 1] == UNIVERSE_ROOT
+    )
+    inside_idx = np.flatnonzero(~outside)
+    candidate = None
+    if len(inside_idx) > 0:
+        candidate = (start + inside_idx[0], points[inside_idx[0]])
+    candidates = [c for c in MPI.COMM_WORLD.allgather(candidate) if c is not None]
+
+    # Keep the points outside the root-universe cells that are not separated
+    # from the model by a boundary-condition surface
+    if len(candidates) > 0:
+        reference = min(candidates, key=lambda c: c[0])[1]
+        P_arr = np.zeros(1, dtype=type_.particle)
+        P = P_arr[0]
+        for i in np.flatnonzero(outside):
+            separated = False
+            for surface in mcdc["surfaces"]:
+                if surface["BC"] == BC_NONE:
+                    continue
+                senses = []
+                for point in [points[i], reference]:
+                    P["x"], P["y"], P["z"] = point
+                    senses.append(geometry.surface_evaluate(P_arr, surface) > 0.0)
+                if senses[0] != senses[1]:
+                    separated = True
+                    break
+            if separated:
+                results[i, 0] = GEOMETRY_CHECK_OK
+
+    # Gather the problems
+    problems = [
+        (start + i, results[i], points[i])
+        for i in np.flatnonzero(results[:, 0] != GEOMETRY_CHECK_OK)
+    ]
+    problems = sorted(sum(MPI.COMM_WORLD.allgather(problems), []), key=lambda p: p[0])
+
+    # Report
+    for status, description in [
+        (GEOMETRY_CHECK_OVERLAP, "claimed by multiple cells of a universe"),
+        (GEOMETRY_CHECK_UNDEFINED, "in undefined regions"),
+    ]:
+        found = [p for p in problems if p[1][0] == status]
+        if len(found) == 0:
+            continue
+        msg = "Geometry check: %i of %i points are %s, e.g.:" % (
+            len(found),
+            N_sample,
+            description,
+        )
+        for _, result, point in found[:N_example]:
+            _, universe_ID, cell_ID, other_ID = result
+            msg += "\n  (%g, %g, %g): " % tuple(point)
+            if status == GEOMETRY_CHECK_OVERLAP:
+                msg += "cells %i and %i of universe %i" % (
+                    cell_ID,
+                    other_ID,
+                    universe_ID,
+                )
+            elif cell_ID > -1:
+                msg += "outside of the lattice filling cell %i" % cell_ID
+            else:
+                msg += "no cell of universe %i" % universe_ID
+        print_warning(msg)
+
+
+def binomial_volume(count, N_sample, volume_box):
+    """
+    Volume means and standard deviations from the sample counts in the box
+    """
+    p = count / N_sample
+    mean = volume_box * p
+    sdev = volume_box * np.sqrt(p * (1.0 - p) / N_sample)
+    return mean, sdev
+
+
+def calculate_volumes(mcdc_arr):
+    """
+    Run the volume calculations of the input deck
+
+    The samples are split evenly over the MPI ranks, and located in batches.
+    Random samples are keyed on their index, so results do not depend on the
+    number of ranks.
+
+    Returns
+    -------
+    list of dict
+        For each volume calculation, the volume means and standard deviations
+        of the materials ("material"), root-universe cells ("cell"), and the
+        space outside the model ("outside") in the box.
+    """
+    mcdc = mcdc_arr[0]
+    N_material = len(mcdc["materials"])
+    N_cell = len(mcdc["cells"])
+    N_batch_sample = 1000000
+    seed_volume = kernel.split_seed(mcdc["setting"]["rng_seed"], SEED_SPLIT_VOLUME)
+
+    results = []
+    for card in input_deck.volume_calculations:
+        print_msg(" Running volume calculation %i..." % card.ID)
+        volume_box = (
+            (card.x[1] - card.x[0]) * (card.y[1] - card.y[0]) * (card.z[1] - card.z[0])
+        )
+        seed = kernel.split_seed(card.ID, seed_volume)
+
+        # Samples of this rank
+        N_sample = card.N_sample
+        start, end = get_sample_share(N_sample, mcdc)
+
+        # Sample counts (the last bin is for the outside of the model)
+        count_material = np.zeros(N_material + 1, dtype=np.int64)
+        count_cell = np.zeros(N_cell + 1, dtype=np.int64)
+        for batch_start in range(start, end, N_batch_sample):
+            N = min(N_batch_sample, end - batch_start)
+            if card.method == "halton":
+                xi = algorithm.halton(N, 3, skip=batch_start)
+            else:
+                xi = kernel.rng_stream(seed, 3 * batch_start, 3 * N).reshape(N, 3)
+            x = card.x[0] + (card.x[1] - card.x[0]) * xi[:, 0]
+            y = card.y[0] + (card.y[1] - card.y[0]) * xi[:, 1]
+            z = card.z[0] + (card.z[1] - card.z[0]) * xi[:, 2]
+
+            material_IDs, cell_IDs = locate_points(x, y, z, mcdc_arr)
+            count_material += np.bincount(
+                material_IDs % (N_material + 1), minlength=N_material + 1
+            )
+            count_cell += np.bincount(cell_IDs % (N_cell + 1), minlength=N_cell + 1)
+
+        MPI.COMM_WORLD.Allreduce(MPI.IN_PLACE, count_material, op=MPI.SUM)
+        MPI.COMM_WORLD.Allreduce(MPI.IN_PLACE, count_cell, op=MPI.SUM)
+
+        # Volumes and standard deviations of the binomial estimates
+        #   (the outside of the model is counted in both last bins alike)
+        result = {}
+        mean, sdev = binomial_volume(count_material, N_sample, volume_box)
+        result["material"] = (mean[:-1], sdev[:-1])
+        result["outside"] = (mean[-1], sdev[-1])
+        mean, sdev = binomial_volume(count_cell, N_sample, volume_box)
+        result["cell"] = (mean[:-1], sdev[:-1])
+        results.append(result)
+
+    return results
+
+
 def visualize(vis_type, x=0.0, y=0.0, z=0.0, pixel=(100, 100), colors=None):
     """
     2D visualization of the created model
@@ -1520,19 +2432,19 @@ def visualize(vis_type, x=0.0, y=0.0, z=0.0, pixel=(100, 100), colors=None):
     """
     # TODO: add input error checkers
 
-    _, mcdc = prepare()
+    _, mcdc_arr = prepare()
+    mcdc = mcdc_arr[0]
 
-    # Color assignment for materials (by material ID)
+    # Color assignment for materials (by material ID, the last one is for
+    # points outside the model)
+    N_material = len(mcdc["materials"])
+    color_table = np.zeros((N_material + 1, 3))
+    for i in range(N_material):
+        color_table[i] = plt.cm.Set1(i)[:-1]
     if colors is not None:
-        new_colors = {}
         for item in colors.items():
-            new_colors[item[0].ID] = mpl_colors.to_rgb(item[1])
-        colors = new_colors
-    else:
-        colors = {}
-        for i in range(len(mcdc["materials"])):
-            colors[i] = plt.cm.Set1(i)[:-1]
-    WHITE = mpl_colors.to_rgb("white")
+            color_table[item[0].ID] = mpl_colors.to_rgb(item[1])
+    color_table[-1] = mpl_colors.to_rgb("white")
 
     # Set reference axis
     for axis in ["x", "y", "z"]:
@@ -1575,28 +2487,17 @@ def visualize(vis_type, x=0.0, y=0.0, z=0.0, pixel=(100, 100), colors=None):
     second_grid = np.linspace(second[0], second[1], pixel[1] + 1)
     second_midpoint = 0.5 * (second_grid[1:] + second_grid[:-1])
 
-    # Set dummy particle
-    particle = np.zeros(1, dtype=type_.particle)[0]
-    particle[reference_key] = reference
-    particle["g"] = 0
-    particle["E"] = 1e6
+    # Pixel midpoints
+    coordinates = {reference_key: reference}
+    coordinates[first_key], coordinates[second_key] = np.meshgrid(
+        first_midpoint, second_midpoint, indexing="ij"
+    )
 
     # RGB color data for each pixel
-    data = np.zeros(pixel + (3,))
-
-    # Loop over the two axes
-    for i in range(pixel[0]):
-        particle[first_key] = first_midpoint[i]
-        for j in range(pixel[1]):
-            particle[second_key] = second_midpoint[j]
-
-            # Get material
-            particle["cell_ID"] = -1
-            particle["material_ID"] = -1
-            if geometry.locate_particle(particle, mcdc):
-                data[i, j] = colors[particle["material_ID"]]
-            else:
-                data[i, j] = WHITE
+    material_IDs, _ = locate_points(
+        coordinates["x"], coordinates["y"], coordinates["z"], mcdc_arr
+    )
+    data = color_table[material_IDs]
 
     data = np.transpose(data, (1, 0, 2))
     plt.imshow(data, origin="lower", extent=first + second)
@@ -54,10 +54,12 @@ def print_banner(mcdc):
             else:
                 solver = mcdc["technique"]["iqmc"]["fixed_source_solver"]
             banner += "         Solver | " + solver + "\n"
+        elif mcdc["setting"]["event_batch_size"] > 0:
+            banner += "      Algorithm | Event-based\n"
         else:
             banner += "      Algorithm | History-based\n"
         banner += "  MPI Processes | %i\n" % size
-        banner += " OpenMP Threads | 1"
+        banner += "  Numba Threads | %i" % mcdc["setting"]["N_thread"]
         print(banner)
         sys.stdout.flush()
 
@@ -8,6 +8,7 @@ from mpi4py.util.dtlib import from_numpy_dtype
 from numba import njit
 
 from mcdc.print_ import print_error
+import mcdc.xslib as xslib
 
 
 # ==============================================================================
@@ -35,7 +36,10 @@ particle = None
 particle_record = None
 
 nuclide = None
+nuclide_data_size = 0
+E_union_size = 0
 material = None
+material_data_size = 0
 
 universe = None
 lattice = None
@@ -69,14 +73,15 @@ def material_j_size():
     pass
 
 
-def rpn_buffer_size():
+def sense_cache_size():
     pass
 
 
-def make_size_rpn(input_deck):
-    global rpn_buffer_size
-    size = max([np.sum(np.array(x._region_RPN) >= 0.0) for x in input_deck.cells])
-    rpn_buffer_size = literalize(size)
+def make_size_sense_cache(input_deck):
+    global sense_cache_size
+    # Direct-mapped by surface ID, capped to keep the per-lookup reset cheap
+    size = min(max(len(input_deck.surfaces), 1), 64)
+    sense_cache_size = literalize(size)
 
 
 # ==============================================================================
@@ -219,6 +224,23 @@ def make_type_particle(input_deck):
         ("fresh", bool_),
         ("event", int64),
         ("rng_seed", uint64),
+        # Macroscopic XS cache (total, scatter, capture, fission, nu-fission)
+        #   keyed on material ID, energy group, and energy
+        ("xs_cache_material_ID", int64),
+        ("xs_cache_g", uint64),
+        ("xs_cache_E", float64),
+        ("xs_cache_flag", int64),
+        ("xs_cache", float64, (5,)),
+        # Boundary (surface or lattice crossing) event, surface ID, and distance
+        #   cache keyed on top cell ID and direction
+        ("boundary_cache_flag", bool_),
+        ("boundary_cache_cell_ID", int64),
+        ("boundary_cache_ux", float64),
+        ("boundary_cache_uy", float64),
+        ("boundary_cache_uz", float64),
+        ("boundary_cache_event", int64),
+        ("boundary_cache_surface_ID", int64),
+        ("boundary_cache_distance", float64),
     ]
 
     # Get modes
@@ -299,14 +321,54 @@ precursor = into_dtype(
 # ==============================================================================
 
 
-def particle_bank(max_size):
-    return into_dtype(
-        [
-            ("particles", particle_record, (max_size,)),
-            ("size", int64, (1,)),
-            ("tag", str_),
+def particle_bank(max_size, soa=False):
+    particles = ("particles", particle_record, (max_size,))
+
+    # Structure of arrays: an array for each particle record field
+    if soa:
+        struct = [
+            (name, particle_record[name], (max_size,))
+            for name in particle_record.names
+            if name != "iqmc"
         ]
-    )
+        particles = ("particles", into_dtype(struct))
+
+    return into_dtype([particles, ("size", int64, (1,)), ("tag", str_)])
+
+
+def particle_pool(max_size):
+    """
+    Structure-of-arrays pool of the in-flight particles of the event-based
+    algorithm, with the boundary or flight distance and the speed of the
+    current event
+    """
+    struct = [
+        (name, particle[name], (max_size,))
+        for name in [
+            "x",
+            "y",
+            "z",
+            "t",
+            "ux",
+            "uy",
+            "uz",
+            "g",
+            "E",
+            "w",
+            "rng_seed",
+            "material_ID",
+            "cell_ID",
+            "surface_ID",
+            "event",
+            "alive",
+        ]
+    ]
+    struct += [
+        ("distance", float64, (max_size,)),
+        ("speed", float64, (max_size,)),
+        ("size", int64, (1,)),
+    ]
+    return into_dtype(struct)
 
 
 def precursor_bank(max_size):
@@ -321,7 +383,7 @@ def precursor_bank(max_size):
 
 
 def make_type_nuclide(input_deck):
-    global nuclide
+    global nuclide, nuclide_data_size, E_union_size
 
     # Get modes
     mode_CE = input_deck.setting["mode_CE"]
@@ -333,31 +395,22 @@ def make_type_nuclide(input_deck):
         G = 1
         J = 0
 
-        # Get maximum energy grid sizes for CE data
-        NE_xs = 0
-        NE_nu_p = 0
-        NE_nu_d = 0
-        NE_chi_p = 0
-        NE_chi_d1 = 0
-        NE_chi_d2 = 0
-        NE_chi_d3 = 0
-        NE_chi_d4 = 0
-        NE_chi_d5 = 0
-        NE_chi_d6 = 0
-
-        dir_name = os.getenv("MCDC_XSLIB")
-        for nuc in input_deck.nuclides:
-            with h5py.File(dir_name + "/" + nuc.name + ".h5", "r") as f:
-                NE_xs = max(NE_xs, len(f["E_xs"][:]))
-                NE_nu_p = max(NE_nu_p, len(f["E_nu_p"][:]))
-                NE_nu_d = max(NE_nu_d, len(f["E_nu_d"][:]))
-                NE_chi_p = max(NE_chi_p, len(f["E_chi_p"][:]))
-                NE_chi_d1 = max(NE_chi_d1, len(f["E_chi_d1"][:]))
-                NE_chi_d2 = max(NE_chi_d2, len(f["E_chi_d2"][:]))
-                NE_chi_d3 = max(NE_chi_d3, len(f["E_chi_d3"][:]))
-                NE_chi_d4 = max(NE_chi_d4, len(f["E_chi_d4"][:]))
-                NE_chi_d5 = max(NE_chi_d5, len(f["E_chi_d5"][:]))
-                NE_chi_d6 = max(NE_chi_d6, len(f["E_chi_d6"][:]))
+        # Get energy grid sizes for CE data
+        #   (each nuclide only takes what it needs in the shared data pool)
+        nuclide_names = [nuc.name for nuc in input_deck.nuclides]
+        N_data = 0
+        for sizes in xslib.nuclide_sizes(nuclide_names):
+            N_data += xslib.block_size(sizes)
+
+        E_union = np.zeros(0)
+        for E_xs in xslib.nuclide_energy_grids(nuclide_names):
+            E_union = np.union1d(E_union, E_xs)
+
+        # Unionized XS energy grid size
+        NE_union = len(E_union)
+
+        # Fission spectrum hash table size
+        N_hash = input_deck.setting["energy_hash_size"]
 
     # Get MG sizes
     if mode_MG:
@@ -365,16 +418,9 @@ def make_type_nuclide(input_deck):
         J = input_deck.materials[0].J
 
         # Zeros for CE sizes
-        NE_xs = 0
-        NE_nu_p = 0
-        NE_nu_d = 0
-        NE_chi_p = 0
-        NE_chi_d1 = 0
-        NE_chi_d2 = 0
-        NE_chi_d3 = 0
-        NE_chi_d4 = 0
-        NE_chi_d5 = 0
-        NE_chi_d6 = 0
+        N_data = 0
+        NE_union = 0
+        N_hash = 0
 
     # General data
     struct = [
@@ -415,35 +461,42 @@ def make_type_nuclide(input_deck):
         ("NE_chi_d4", int64),
         ("NE_chi_d5", int64),
         ("NE_chi_d6", int64),
-        ("E_xs", float64, (NE_xs,)),
-        ("E_nu_p", float64, (NE_nu_p,)),
-        ("E_nu_d", float64, (NE_nu_d,)),
-        ("E_chi_p", float64, (NE_chi_p,)),
-        ("E_chi_d1", float64, (NE_chi_d1,)),
-        ("E_chi_d2", float64, (NE_chi_d2,)),
-        ("E_chi_d3", float64, (NE_chi_d3,)),
-        ("E_chi_d4", float64, (NE_chi_d4,)),
-        ("E_chi_d5", float64, (NE_chi_d5,)),
-        ("E_chi_d6", float64, (NE_chi_d6,)),
-        ("ce_total", float64, (NE_xs,)),
-        ("ce_capture", float64, (NE_xs,)),
-        ("ce_scatter", float64, (NE_xs,)),
-        ("ce_fission", float64, (NE_xs,)),
-        ("ce_nu_p", float64, (NE_nu_p,)),
-        ("ce_nu_d", float64, (6, NE_nu_d)),
-        ("ce_chi_p", float64, (NE_chi_p,)),
-        ("ce_chi_d1", float64, (NE_chi_d1,)),
-        ("ce_chi_d2", float64, (NE_chi_d2,)),
-        ("ce_chi_d3", float64, (NE_chi_d3,)),
-        ("ce_chi_d4", float64, (NE_chi_d4,)),
-        ("ce_chi_d5", float64, (NE_chi_d5,)),
-        ("ce_chi_d6", float64, (NE_chi_d6,)),
+        ("E_xs_data_idx", int64),
+        ("E_nu_p_data_idx", int64),
+        ("E_nu_d_data_idx", int64),
+        ("E_chi_p_data_idx", int64),
+        ("E_chi_d1_data_idx", int64),
+        ("E_chi_d2_data_idx", int64),
+        ("E_chi_d3_data_idx", int64),
+        ("E_chi_d4_data_idx", int64),
+        ("E_chi_d5_data_idx", int64),
+        ("E_chi_d6_data_idx", int64),
+        ("ce_total_data_idx", int64),
+        ("ce_capture_data_idx", int64),
+        ("ce_scatter_data_idx", int64),
+        ("ce_fission_data_idx", int64),
+        ("ce_nu_p_data_idx", int64),
+        ("ce_nu_d_data_idx", int64),
+        ("ce_chi_p_data_idx", int64),
+        ("ce_chi_d1_data_idx", int64),
+        ("ce_chi_d2_data_idx", int64),
+        ("ce_chi_d3_data_idx", int64),
+        ("ce_chi_d4_data_idx", int64),
+        ("ce_chi_d5_data_idx", int64),
+        ("ce_chi_d6_data_idx", int64),
+        ("chi_hash", int64, (7, N_hash + 1)),
         ("ce_decay", float64, (6,)),
     ]
 
     # Set the type
     nuclide = into_dtype(struct)
 
+    # Size of the shared CE data pool
+    nuclide_data_size = N_data
+
+    # Unionized XS energy grid size
+    E_union_size = NE_union
+
 
 # ==============================================================================
 # Material
@@ -451,7 +504,7 @@ def make_type_nuclide(input_deck):
 
 
 def make_type_material(input_deck):
-    global material
+    global material, material_data_size
 
     # Maximum number of nuclides per material
     Nmax_nuclide = max([material.N_nuclide for material in input_deck.materials])
@@ -471,6 +524,15 @@ def make_type_material(input_deck):
         G = input_deck.materials[0].G
         J = input_deck.materials[0].J
 
+    # Precomputed CE macroscopic XS data pool size
+    #   (total, capture, scatter, and fission on the unionized energy grid, only
+    #   for the materials opting in)
+    N_data = 0
+    if mode_CE:
+        for material_ in input_deck.materials:
+            if material_.precompute_xs:
+                N_data += 4 * E_union_size
+
     G_adjusted = max(1, G)
     J_adjusted = max(1, J)
 
@@ -505,9 +567,21 @@ def make_type_material(input_deck):
         ("chi_p", float64, (G, G)),
     ]
 
+    # CE data
+    struct += [
+        ("precompute_xs", bool_),
+        ("ce_total_data_idx", int64),
+        ("ce_capture_data_idx", int64),
+        ("ce_scatter_data_idx", int64),
+        ("ce_fission_data_idx", int64),
+    ]
+
     # Set the type
     material = into_dtype(struct)
 
+    # Size of the precomputed CE data pool
+    material_data_size = N_data
+
 
 # ==============================================================================
 # Surface
@@ -525,6 +599,7 @@ def make_type_surface(input_deck):
     surface = into_dtype(
         [
             ("ID", int64),
+            ("type", int64),
             ("BC", int64),
             ("A", float64),
             ("B", float64),
@@ -563,6 +638,9 @@ cell = into_dtype(
         # Data indices
         ("surface_data_idx", int64),
         ("region_data_idx", int64),
+        ("neighbor_data_idx", int64),
+        # Bounding box [x_min, x_max, y_min, y_max, z_min, z_max]
+        ("bbox", float64, (6,)),
     ]
 )
 
@@ -579,7 +657,16 @@ def make_type_universe(input_deck):
     Nmax_cell = max([universe.N_cell for universe in input_deck.universes])
 
     universe = into_dtype(
-        [("ID", int64), ("N_cell", int64), ("cell_IDs", int64, (Nmax_cell,))]
+        [
+            ("ID", int64),
+            ("N_cell", int64),
+            ("cell_IDs", int64, (Nmax_cell,)),
+            # Cell search grid (bin cell lists in the universe grid data)
+            ("grid_data_idx", int64),
+            ("grid_low", float64, (3,)),
+            ("grid_factor", float64, (3,)),
+            ("grid_N", int64, (3,)),
+        ]
     )
 
 
@@ -614,7 +701,12 @@ def make_type_lattice(input_deck):
             ("t0", float64),
             ("dt", float64),
             ("Nt", int64),
+            ("inv_dx", float64),
+            ("inv_dy", float64),
+            ("inv_dz", float64),
+            ("inv_dt", float64),
             ("universe_IDs", int64, (Nmax_x, Nmax_y, Nmax_z)),
+            ("material_IDs", int64, (Nmax_x, Nmax_y, Nmax_z)),
         ]
     )
 
@@ -845,6 +937,7 @@ def make_type_setting(deck):
         # Basic MC simulation parameters
         ("N_particle", uint64),
         ("N_batch", uint64),
+        ("history_group_size", int64),
         ("rng_seed", uint64),
         ("time_boundary", float64),
         # Physics flags
@@ -874,6 +967,24 @@ def make_type_setting(deck):
         ("IC_file", bool_),
         ("IC_file_name", str_),
         ("N_precursor", uint64),
+        # Energy search hash tables
+        ("energy_hash_size", int64),
+        # Node-shared nuclide data
+        ("xs_shared_memory", bool_),
+        # Cell neighbor lists
+        ("cell_neighbor_size", int64),
+        ("cell_neighbor_prepopulate", bool_),
+        ("universe_grid_size", int64),
+        ("surface_distance_cache", bool_),
+        ("delta_tracking", bool_),
+        # Shared-memory threads
+        ("N_thread", int64),
+        # Dynamic MPI work distribution
+        ("work_chunk_size", int64),
+        # Cost-weighted bank rebalance
+        ("cost_weighted_rebalance", bool_),
+        # Event-based transport
+        ("event_batch_size", int64),
     ]
 
     # Finalize setting type
@@ -1259,9 +1370,42 @@ def make_type_global(input_deck):
     # Cell data sizes
     N_cell_surface = 0
     N_cell_region = 0
+    N_cell_neighbor = 0
     for cell_ in input_deck.cells:
         N_cell_surface += 1 + len(cell_.surface_IDs)
-        N_cell_region += 1 + len(cell_._region_RPN)
+        N_cell_region += 1 + len(cell_._region_program)
+        N_cell_neighbor += len(cell_.surface_IDs)
+    N_cell_neighbor *= input_deck.setting["cell_neighbor_size"]
+
+    # Universe cell search grid data size (bin offsets and cell lists)
+    N_universe_grid = 0
+    for universe_ in input_deck.universes:
+        if universe_._grid_N is not None:
+            N_universe_grid += len(universe_._grid_offsets)
+            N_universe_grid += len(universe_._grid_cell_IDs)
+
+    # Nuclide data pool size (not stored in the global struct if node-shared)
+    N_nuclide_data = nuclide_data_size
+    if input_deck.setting["xs_shared_memory"]:
+        N_nuclide_data = 0
+
+    # Unionized XS energy grid size, and the size of the per-nuclide index maps
+    #   (not stored in the global struct if node-shared)
+    NE_union = E_union_size
+    N_union_idx = N_nuclide * NE_union
+    if input_deck.setting["xs_shared_memory"]:
+        N_union_idx = 0
+    N_hash = 0
+    if mode_CE:
+        N_hash = input_deck.setting["energy_hash_size"]
+
+    # Delta tracking majorant XS (per group or unionized energy grid bin)
+    N_majorant = 0
+    if input_deck.setting["delta_tracking"]:
+        if mode_MG:
+            N_majorant = input_deck.materials[0].G
+        else:
+            N_majorant = NE_union
 
     # Simulation parameters
     N_particle = input_deck.setting["N_particle"]
@@ -1272,6 +1416,9 @@ def make_type_global(input_deck):
     bank_active_buff = input_deck.setting["bank_active_buff"]
     bank_census_buff = input_deck.setting["bank_census_buff"]
 
+    # Thread-local active banks
+    N_thread = input_deck.setting["N_thread"]
+
     # Number of precursor groups
     if mode_MG:
         J = input_deck.materials[0].J
@@ -1282,45 +1429,61 @@ def make_type_global(input_deck):
     N_work = math.ceil(N_particle / MPI.COMM_WORLD.Get_size())
     N_work_precursor = math.ceil(N_precursor / MPI.COMM_WORLD.Get_size())
 
-    # Particle bank types
-    bank_active = particle_bank(1 + bank_active_buff)
+    # Particle bank types (the census and source banks in the selected layout)
+    soa = input_deck.setting["bank_layout"] == "soa"
+    event_batch_size = input_deck.setting["event_batch_size"]
+    bank_active = particle_bank(1 + bank_active_buff + event_batch_size)
     if input_deck.setting["mode_eigenvalue"] or input_deck.setting["N_census"] > 1:
-        bank_census = particle_bank(int((1 + bank_census_buff) * N_work))
-        bank_source = particle_bank(int((1 + bank_census_buff) * N_work))
+        bank_census = particle_bank(int((1 + bank_census_buff) * N_work), soa)
+        bank_source = particle_bank(int((1 + bank_census_buff) * N_work), soa)
     else:
-        bank_census = particle_bank(0)
-        bank_source = particle_bank(0)
+        bank_census = particle_bank(0, soa)
+        bank_source = particle_bank(0, soa)
     bank_precursor = precursor_bank(0)
 
     # iQMC bank adjustment
     if input_deck.technique["iQMC"]:
-        bank_source = particle_bank(N_work)
+        bank_source = particle_bank(N_work, soa)
         if input_deck.setting["mode_eigenvalue"]:
-            bank_census = particle_bank(0)
+            bank_census = particle_bank(0, soa)
 
     # Source and IC files bank adjustments
     if not input_deck.setting["mode_eigenvalue"]:
         if input_deck.setting["source_file"]:
-            bank_source = particle_bank(N_work)
+            bank_source = particle_bank(N_work, soa)
         if input_deck.setting["IC_file"]:
-            bank_source = particle_bank(N_work)
+            bank_source = particle_bank(N_work, soa)
             bank_precursor = precursor_bank(N_precursor)
 
     if (
         input_deck.setting["source_file"] and not input_deck.setting["mode_eigenvalue"]
     ) or input_deck.technique["iQMC"]:
-        bank_source = particle_bank(N_work)
+        bank_source = particle_bank(N_work, soa)
 
     # GLobal type
     global_ = into_dtype(
         [
             ("nuclides", nuclide, (N_nuclide,)),
+            ("nuclide_data", float64, (N_nuclide_data,)),
+            ("nuclide_data_address", uintp),
+            ("nuclide_data_size", int64),
+            ("E_union", float64, (NE_union,)),
+            ("NE_union", int64),
+            ("E_union_idx", int32, (N_union_idx,)),
+            ("E_union_idx_address", uintp),
+            ("E_union_hash", int64, (N_hash + 1,)),
+            ("E_union_log_min", float64),
+            ("E_union_hash_factor", float64),
+            ("majorant_xs", float64, (N_majorant,)),
             ("materials", material, (N_material,)),
+            ("material_data", float64, (material_data_size,)),
             ("surfaces", surface, (N_surface,)),
             ("cells", cell, (N_cell,)),
             ("cell_surface_data", int64, (N_cell_surface,)),
             ("cell_region_data", int64, (N_cell_region,)),
+            ("cell_neighbor_data", int64, (N_cell_neighbor,)),
             ("universes", universe, (N_universe,)),
+            ("universe_grid_data", int64, (N_universe_grid,)),
             ("lattices", lattice, (N_lattice,)),
             ("sources", source, (N_source,)),
             ("mesh_tallies", mesh_tally, (N_mesh_tally,)),
@@ -1328,10 +1491,11 @@ def make_type_global(input_deck):
             ("setting", setting),
             ("technique", technique),
             ("domain_decomp", domain_decomp),
-            ("bank_active", bank_active),
+            ("bank_active", bank_active, (N_thread,)),
             ("bank_census", bank_census),
             ("bank_source", bank_source),
             ("bank_precursor", bank_precursor),
+            ("event_pool", particle_pool(event_batch_size)),
             ("rng_seed_base", uint64),
             ("rng_seed", uint64),
             ("rng_stride", int64),
@@ -1342,10 +1506,10 @@ def make_type_global(input_deck):
             ("k_sdv", float64),
             ("n_avg", float64),  # Neutron density
             ("n_sdv", float64),
-            ("n_max", float64),
+            ("n_max", float64, (1,)),
             ("C_avg", float64),  # Precursor density
             ("C_sdv", float64),
-            ("C_max", float64),
+            ("C_max", float64, (1,)),
             ("k_avg_running", float64),
             ("k_sdv_running", float64),
             ("gyration_radius", float64, (N_cycle,)),
@@ -1356,12 +1520,14 @@ def make_type_global(input_deck):
             ("eigenvalue_tally_C", float64, (1,)),
             ("idx_census", int64),
             ("idx_batch", int64),
+            ("tally_N_group", int64),
             ("mpi_size", int64),
             ("mpi_rank", int64),
             ("mpi_master", bool_),
             ("mpi_work_start", int64),
             ("mpi_work_size", int64),
             ("mpi_work_size_total", int64),
+            ("mpi_work_cost", float64),
             ("mpi_work_start_precursor", int64),
             ("mpi_work_size_precursor", int64),
             ("mpi_work_size_total_precursor", int64),
@@ -1388,7 +1554,15 @@ def make_type_tally(input_deck, tally_size):
     else:
         width = 5
 
-    tally = into_dtype([("tally", float64, (width, tally_size))])
+    # Indices of the score bins touched since the last accumulation, so that
+    # per-history closeout only needs to sweep the bins actually scored
+    tally = into_dtype(
+        [
+            ("tally", float64, (width, tally_size)),
+            ("dirty_idx", int64, (tally_size,)),
+            ("dirty_size", int64, (1,)),
+        ]
+    )
 
 
 # ==============================================================================
@@ -0,0 +1,302 @@
+"""
+Continuous-energy nuclear data library
+
+The library pointed to by the environment variable MCDC_XSLIB is either a
+directory of per-nuclide HDF5 files (<nuclide>.h5) or a single pre-processed
+library file compiled from them with `compile_library`. The compiled library
+stores a size table and the nuclide data already laid out as in the
+simulation data pool, so that preparation only needs one file open and bulk
+reads.
+
+Compile a library with
+
+    python -m mcdc.xslib <library file> [<nuclide name> ...]
+
+which takes the nuclides (all if none given) from the MCDC_XSLIB directory.
+"""
+
+import h5py
+import numpy as np
+import os, sys
+
+from mcdc.print_ import print_error
+
+# Compiled library format version
+VERSION = 1
+
+# Energy grids, whose sizes make the library size table
+GRID_NAMES = [
+    "E_xs",
+    "E_nu_p",
+    "E_nu_d",
+    "E_chi_p",
+    "E_chi_d1",
+    "E_chi_d2",
+    "E_chi_d3",
+    "E_chi_d4",
+    "E_chi_d5",
+    "E_chi_d6",
+]
+
+# Layout of a nuclide data block: (data name, energy grid, number of rows)
+DATA_LAYOUT = [(name, name, 1) for name in GRID_NAMES] + [
+    ("ce_capture", "E_xs", 1),
+    ("ce_scatter", "E_xs", 1),
+    ("ce_fission", "E_xs", 1),
+    ("ce_total", "E_xs", 1),
+    ("ce_nu_p", "E_nu_p", 1),
+    ("ce_nu_d", "E_nu_d", 6),
+    ("ce_chi_p", "E_chi_p", 1),
+    ("ce_chi_d1", "E_chi_d1", 1),
+    ("ce_chi_d2", "E_chi_d2", 1),
+    ("ce_chi_d3", "E_chi_d3", 1),
+    ("ce_chi_d4", "E_chi_d4", 1),
+    ("ce_chi_d5", "E_chi_d5", 1),
+    ("ce_chi_d6", "E_chi_d6", 1),
+]
+
+# Cached size tables of compiled libraries, keyed by path and modified time
+_library_cache = {}
+
+
+# =============================================================================
+# Library access
+# =============================================================================
+
+
+def library_path():
+    path = os.getenv("MCDC_XSLIB")
+    if path == None:
+        print_error(
+            "Continuous energy data directory not configured \n       "
+            "see https://cement-psaapgithubio.readthedocs.io/en/latest"
+            "/install.html#configuring-continuous-energy-library \n"
+        )
+    return path
+
+
+def is_compiled(path):
+    return os.path.isfile(path)
+
+
+def block_size(sizes):
+    """
+    Size of a nuclide data block given its energy grid sizes
+    """
+    return sum([sizes["N" + grid] * N_row for _, grid, N_row in DATA_LAYOUT])
+
+
+def library_table(path):
+    """
+    Nuclide names, energy grid sizes, block offsets, and scalar data of a
+    compiled library (read once and cached)
+    """
+    key = (path, os.path.getmtime(path))
+    if key not in _library_cache:
+        with h5py.File(path, "r") as f:
+            if f.attrs.get("format") != "mcdc_xslib":
+                print_error("%s is not a compiled MC/DC XS library" % path)
+            if f.attrs["version"] != VERSION:
+                print_error(
+                    "XS library %s has version %i, expected %i; please recompile"
+                    % (path, f.attrs["version"], VERSION)
+                )
+            table = {
+                "index": {name.decode(): i for i, name in enumerate(f["nuclides"][()])},
+                "sizes": f["sizes"][()],
+                "offsets": f["offsets"][()],
+                "A": f["A"][()],
+                "fissionable": f["fissionable"][()],
+                "decay_rate": f["decay_rate"][()],
+            }
+        _library_cache.clear()
+        _library_cache[key] = table
+    return _library_cache[key]
+
+
+def library_index(table, nuclide_name, path):
+    if nuclide_name not in table["index"]:
+        print_error("Nuclide %s is not in XS library %s" % (nuclide_name, path))
+    return table["index"][nuclide_name]
+
+
+def nuclide_fissionable(nuclide_name):
+    path = library_path()
+    if is_compiled(path):
+        table = library_table(path)
+        return bool(table["fissionable"][library_index(table, nuclide_name, path)])
+    with h5py.File(path + "/" + nuclide_name + ".h5", "r") as f:
+        return max(f["fission"][:]) > 0.0
+
+
+def table_sizes(table, i):
+    return {"N" + grid: int(table["sizes"][i, j]) for j, grid in enumerate(GRID_NAMES)}
+
+
+def nuclide_sizes(nuclide_names):
+    """
+    Energy grid sizes {"NE_xs": ..., "NE_nu_p": ..., ...} of the nuclides
+    """
+    path = library_path()
+    if is_compiled(path):
+        table = library_table(path)
+        return [
+            table_sizes(table, library_index(table, name, path))
+            for name in nuclide_names
+        ]
+
+    result = []
+    for nuclide_name in nuclide_names:
+        with h5py.File(path + "/" + nuclide_name + ".h5", "r") as f:
+            result.append({"N" + grid: f[grid].shape[0] for grid in GRID_NAMES})
+    return result
+
+
+def nuclide_energy_grids(nuclide_names):
+    """
+    XS energy grids of the nuclides
+    """
+    path = library_path()
+    result = []
+    if is_compiled(path):
+        table = library_table(path)
+        with h5py.File(path, "r") as f:
+            for nuclide_name in nuclide_names:
+                # The XS energy grid leads the nuclide data block
+                i = library_index(table, nuclide_name, path)
+                start = table["offsets"][i]
+                result.append(f["data"][start : start + table["sizes"][i, 0]])
+        return result
+
+    for nuclide_name in nuclide_names:
+        with h5py.File(path + "/" + nuclide_name + ".h5", "r") as f:
+            result.append(f["E_xs"][:])
+    return result
+
+
+def load_nuclides(nuclide_names, nuclide_data):
+    """
+    Load the nuclides' data blocks back to back into the data pool
+    `nuclide_data` (skipped if None), and return the nuclides' energy grid
+    sizes, atomic weight ratios, and decay rates
+    """
+    path = library_path()
+    result = []
+
+    # Compiled library: one file open, one bulk read per nuclide block
+    if is_compiled(path):
+        table = library_table(path)
+        with h5py.File(path, "r") as f:
+            data_idx = 0
+            for nuclide_name in nuclide_names:
+                i = library_index(table, nuclide_name, path)
+                sizes = table_sizes(table, i)
+                N = block_size(sizes)
+                if nuclide_data is not None and N > 0:
+                    start = table["offsets"][i]
+                    f["data"].read_direct(
+                        nuclide_data,
+                        np.s_[start : start + N],
+                        np.s_[data_idx : data_idx + N],
+                    )
+                data_idx += N
+                result.append((sizes, table["A"][i], table["decay_rate"][i]))
+        return result
+
+    # Per-nuclide files
+    data_idx = 0
+    for nuclide_name in nuclide_names:
+        with h5py.File(path + "/" + nuclide_name + ".h5", "r") as f:
+            sizes = {"N" + grid: f[grid].shape[0] for grid in GRID_NAMES}
+            N = block_size(sizes)
+            if nuclide_data is not None:
+                nuclide_data[data_idx : data_idx + N] = nuclide_block(f)
+            data_idx += N
+            decay_rate = np.zeros(6)
+            decay_rate[: len(f["decay_rate"][:])] = f["decay_rate"][:]
+            result.append((sizes, f["A"][()], decay_rate))
+    return result
+
+
+def nuclide_block(f):
+    """
+    Data block of the per-nuclide file `f`, laid out as in DATA_LAYOUT
+    """
+    total = np.zeros(f["E_xs"].shape[0])
+    for name in ["capture", "scatter", "fission"]:
+        total += f[name][:]
+
+    block = []
+    for name, _, _ in DATA_LAYOUT:
+        if name == "ce_total":
+            block.append(total)
+        elif name[:3] == "ce_":
+            block.append(np.ravel(f[name[3:]][()]))
+        else:
+            block.append(f[name][:])
+    return np.concatenate(block)
+
+
+# =============================================================================
+# Library compiler
+# =============================================================================
+
+
+def compile_library(file_name, nuclide_names=None, dir_name=None):
+    """
+    Compile per-nuclide HDF5 files into a single pre-processed XS library.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the compiled library file.
+    nuclide_names : list of str, optional
+        Nuclides to include (default all <nuclide>.h5 files in `dir_name`).
+    dir_name : str, optional
+        Directory of the per-nuclide files (default $MCDC_XSLIB).
+    """
+    if dir_name is None:
+        dir_name = library_path()
+    if nuclide_names is None:
+        nuclide_names = sorted(
+            [name[:-3] for name in os.listdir(dir_name) if name[-3:] == ".h5"]
+        )
+    N_nuclide = len(nuclide_names)
+
+    sizes = np.zeros((N_nuclide, len(GRID_NAMES)), dtype=np.int64)
+    offsets = np.zeros(N_nuclide, dtype=np.int64)
+    A = np.zeros(N_nuclide)
+    fissionable = np.zeros(N_nuclide, dtype=bool)
+    decay_rate = np.zeros((N_nuclide, 6))
+    blocks = []
+
+    data_idx = 0
+    for i, nuclide_name in enumerate(nuclide_names):
+        with h5py.File(dir_name + "/" + nuclide_name + ".h5", "r") as f:
+            for j, grid in enumerate(GRID_NAMES):
+                sizes[i, j] = f[grid].shape[0]
+            offsets[i] = data_idx
+            A[i] = f["A"][()]
+            fissionable[i] = max(f["fission"][:]) > 0.0
+            decay_rate[i, : len(f["decay_rate"][:])] = f["decay_rate"][:]
+            blocks.append(nuclide_block(f))
+            data_idx += len(blocks[-1])
+
+    with h5py.File(file_name, "w") as f:
+        f.attrs["format"] = "mcdc_xslib"
+        f.attrs["version"] = VERSION
+        f["nuclides"] = np.array(nuclide_names, dtype="S")
+        f["grids"] = np.array(GRID_NAMES, dtype="S")
+        f["sizes"] = sizes
+        f["offsets"] = offsets
+        f["A"] = A
+        f["fissionable"] = fissionable
+        f["decay_rate"] = decay_rate
+        f.create_dataset("data", data=np.concatenate([np.zeros(0)] + blocks))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m mcdc.xslib <library file> [<nuclide name> ...]")
+        sys.exit(1)
+    compile_library(sys.argv[1], sys.argv[2:] if len(sys.argv) > 2 else None)
@@ -0,0 +1,49 @@
+import numpy as np
+
+import mcdc
+
+
+# =============================================================================
+# Set model
+# =============================================================================
+# Multiplying slab with a vacuum and a reflective boundary, run on multiple MPI
+# ranks with the dynamic work distribution, which must not change the results
+
+# Set materials
+m1 = mcdc.material(
+    capture=np.array([0.5]),
+    scatter=np.array([[0.4]]),
+    fission=np.array([0.1]),
+    nu_p=np.array([2.0]),
+)
+m2 = mcdc.material(capture=np.array([0.2]), scatter=np.array([[0.8]]))
+
+# Set surfaces
+s1 = mcdc.surface("plane-x", x=0.0, bc="vacuum")
+s2 = mcdc.surface("plane-x", x=2.0)
+s3 = mcdc.surface("plane-x", x=4.0, bc="reflective")
+
+# Set cells
+mcdc.cell(+s1 & -s2, m1)
+mcdc.cell(+s2 & -s3, m2)
+
+# =============================================================================
+# Set source
+# =============================================================================
+
+mcdc.source(x=[0.0, 1.0], isotropic=True)
+
+# =============================================================================
+# Set tally, setting, and run mcdc
+# =============================================================================
+
+# Tally
+mcdc.tally.mesh_tally(scores=["flux", "total"], x=np.linspace(0.0, 4.0, 21))
+
+# Setting
+mcdc.setting(
+    N_particle=200, history_group_size=5, work_chunk_size=15, progress_bar=False
+)
+
+# Run
+mcdc.run()
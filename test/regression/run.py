@@ -58,6 +58,13 @@ for name in names:
             + "Note: Skipping %s (require 8 MPI ranks)" % name
             + Style.RESET_ALL
         )
+    elif name.startswith("mpi_") and not (mpiexec > 1 or srun > 1):
+        temp.remove(name)
+        print(
+            Fore.YELLOW
+            + "Note: Skipping %s (require multiple MPI ranks)" % name
+            + Style.RESET_ALL
+        )
 names = temp
 
 # Skip iqmc if GPU run
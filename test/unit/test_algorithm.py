@@ -0,0 +1,27 @@
+import numpy as np
+
+from mcdc.algorithm import binary_search, binary_search_window, halton
+
+
+def test_binary_search_window():
+    """
+    Searching in a window that brackets the value must give the same bin index
+    as searching the full grid.
+    """
+    grid = np.array([0.0, 1.0, 2.0, 2.5, 4.0, 8.0, 9.0])
+    for val in [-1.0, 0.0, 0.5, 1.0, 2.2, 2.5, 7.0, 9.0, 10.0]:
+        idx = binary_search(val, grid)
+        left = max(idx, 0)
+        right = min(idx + 1, len(grid) - 1)
+        assert binary_search_window(val, grid, left, right) == idx
+
+
+def test_halton_skip():
+    """
+    Skipped Halton sequences must continue the full sequence, also across the
+    digit count changes of the skipped point count.
+    """
+    full = halton(300, 5)
+    assert np.allclose(full[:4, 0], [0.5, 0.25, 0.75, 0.125])
+    for skip in [1, 8, 26, 27, 124, 125, 200]:
+        assert np.array_equal(halton(300 - skip, 5, skip=skip), full[skip:])
@@ -0,0 +1,56 @@
+import numpy as np
+
+import mcdc
+import mcdc.mesh as mesh
+from mcdc import type_
+from mcdc.constant import INF
+from mcdc.geometry import get_lattice_element
+
+
+def test_get_lattice_element():
+    """
+    The fused lattice element search must reproduce the separate uniform mesh
+    index and crossing distance searches.
+    """
+    mcdc.reset()
+    material = mcdc.material(capture=np.array([1.0]))
+    universe = mcdc.universe([mcdc.cell(fill=material)])
+    card = mcdc.lattice(
+        x=[-1.0, 0.3, 7], y=[0.5, 0.7, 3], universes=[[universe] * 7] * 3
+    )
+    input_deck = mcdc.global_.input_deck
+    type_.make_type_particle(input_deck)
+    type_.make_type_lattice(input_deck)
+    lattice = np.zeros(1, dtype=type_.lattice)[0]
+    for name in ["x0", "dx", "Nx", "y0", "dy", "Ny", "z0", "dz", "Nz"]:
+        lattice[name] = getattr(card, name)
+    lattice["t0"] = 0.0
+    lattice["dt"] = INF
+    lattice["Nt"] = 1
+    for axis in ["x", "y", "z", "t"]:
+        lattice["inv_d" + axis] = 1.0 / lattice["d" + axis]
+
+    rng = np.random.default_rng(11)
+    P_arr = np.zeros(1, dtype=type_.particle)
+    P = P_arr[0]
+    for i in range(500):
+        # Random points, on and around the lattice, some on the grid lines
+        P["x"] = rng.uniform(-1.5, 1.6)
+        P["y"] = rng.uniform(0.0, 3.0)
+        if i % 2 == 0:
+            P["x"] = -1.0 + 0.3 * rng.integers(0, 8)
+        if i % 3 == 0:
+            P["y"] = 0.5 + 0.7 * rng.integers(0, 4)
+        u = rng.normal(size=3)
+        if i % 5 == 0:
+            u[0] = 0.0
+        P["ux"], P["uy"], P["uz"] = u / np.linalg.norm(u)
+
+        ix, iy, iz, distance, outside = get_lattice_element(P_arr, 1.0, lattice)
+        ix_ref, iy_ref, iz_ref, it_ref, outside_ref = mesh.uniform.get_indices(
+            P_arr, lattice
+        )
+        assert outside == outside_ref
+        if not outside:
+            assert (ix, iy, iz) == (ix_ref, iy_ref, iz_ref)
+            assert distance == mesh.uniform.get_crossing_distance(P_arr, 1.0, lattice)
@@ -1,8 +1,33 @@
 import numpy as np
 import mcdc as MCDC
 from mcdc.iqmc.iqmc_loop import AxV
-from mcdc.kernel import rng
+from mcdc.constant import (
+    TALLY,
+    TALLY_DIRTY_SIZE,
+    TALLY_SCORE,
+    TALLY_SUM,
+    TALLY_SUM_SQ,
+)
+from mcdc.kernel import (
+    BANK_SOA_FIELDS,
+    add_bank_record,
+    copy_bank,
+    get_bank_record,
+    get_bank_records,
+    get_bank_size,
+    rebalance_counts,
+    rng,
+    score_tally_bin,
+    sort_bank,
+    tally_accumulate,
+    tally_accumulate_history,
+    tally_closeout,
+    tally_reduce_threads,
+    work_bounds_cost,
+)
 import mcdc.global_ as mcdc_
+import mcdc.kernel as kernel
+import mcdc.type_ as type_
 
 input_deck = mcdc_.input_deck
 
@@ -130,5 +155,240 @@ def test_AxV_linearity():
     assert np.allclose(F1, F2, rtol=1e-10)
 
 
+def test_tally_accumulate_sparse():
+    """
+    Accumulating only the dirty bins must match a full sweep, including when
+    the dirty list is forced to fall back to the full sweep.
+    """
+    MCDC.reset()
+
+    N_bin = 8
+    type_.make_type_tally(input_deck, N_bin)
+    data_sparse = np.zeros(1, dtype=type_.tally)[0]
+    data_full = np.zeros(1, dtype=type_.tally)[0]
+
+    np.random.seed(123456)
+    for history in range(5):
+        for idx in np.random.randint(0, N_bin, 3):
+            score = np.random.random()
+            score_tally_bin(data_sparse, idx, score)
+            score_tally_bin(data_full, idx, score)
+        data_full[TALLY_DIRTY_SIZE][0] = N_bin + 1
+
+        tally_accumulate(data_sparse, None)
+        tally_accumulate(data_full, None)
+
+    for row in [TALLY_SCORE, TALLY_SUM, TALLY_SUM_SQ]:
+        assert np.allclose(data_sparse[TALLY][row], data_full[TALLY][row])
+    assert np.all(data_sparse[TALLY][TALLY_SCORE] == 0.0)
+
+
+def test_tally_reduce_threads():
+    """
+    Histories accumulated into thread-private tally copies must reduce to the
+    single-copy accumulation, leaving the other copies reset.
+    """
+    MCDC.reset()
+
+    N_bin = 8
+    N_thread = 3
+    type_.make_type_tally(input_deck, N_bin)
+    data_arr = np.zeros(N_thread, dtype=type_.tally)
+    data_single = np.zeros(1, dtype=type_.tally)[0]
+
+    np.random.seed(654321)
+    for history in range(10):
+        data = data_arr[history % N_thread]
+        for idx in np.random.randint(0, N_bin, 3):
+            score = np.random.random()
+            score_tally_bin(data, idx, score)
+            score_tally_bin(data_single, idx, score)
+        tally_accumulate(data, None)
+        tally_accumulate(data_single, None)
+
+    tally_reduce_threads(data_arr)
+    for row in [TALLY_SCORE, TALLY_SUM, TALLY_SUM_SQ]:
+        assert np.allclose(data_arr[0][TALLY][row], data_single[TALLY][row])
+    for i in range(1, N_thread):
+        assert np.all(data_arr[i][TALLY] == 0.0)
+        assert data_arr[i][TALLY_DIRTY_SIZE][0] == 0
+
+
+def test_tally_closeout_grouped():
+    """
+    Grouped histories must close out to the batch-means statistics of the
+    group means, weighted by the group history counts, including the partial
+    last group of each rank's work.
+    """
+    MCDC.reset()
+
+    N_bin = 8
+    N_particle = 25
+    group_size = 4
+    work_sizes = [13, 12]  # Two ranks, each ending with a partial group
+    type_.make_type_tally(input_deck, N_bin)
+    data = np.zeros(1, dtype=type_.tally)[0]
+    mcdc = {
+        "setting": {
+            "N_particle": N_particle,
+            "N_batch": 1,
+            "mode_eigenvalue": False,
+            "history_group_size": group_size,
+        },
+        "technique": {"domain_decomposition": False},
+        "tally_N_group": 0,
+    }
+
+    np.random.seed(112233)
+    group_scores = []
+    group_counts = []
+    for work_size in work_sizes:
+        for idx_work in range(work_size):
+            if idx_work % group_size == 0:
+                group_scores.append(np.zeros(N_bin))
+                group_counts.append(0)
+            for idx in np.random.randint(0, N_bin, 3):
+                score = np.random.random()
+                score_tally_bin(data, idx, score)
+                group_scores[-1][idx] += score
+            group_counts[-1] += 1
+            tally_accumulate_history(idx_work, work_size, data, mcdc)
+
+    # Size-weighted batch means of the group means
+    N_group = len(group_scores)
+    assert mcdc["tally_N_group"] == N_group == 7
+    assert group_counts == [4, 4, 4, 1, 4, 4, 4]
+    counts = np.array(group_counts)[:, None]
+    means = np.array(group_scores) / counts
+    mean = np.sum(counts * means, axis=0) / N_particle
+    var = np.sum(counts * (means - mean) ** 2, axis=0) / (N_group - 1) / N_particle
+    sdev = np.sqrt(var)
+
+    tally_closeout(data, mcdc)
+    assert np.allclose(data[TALLY][TALLY_SUM], mean, rtol=1e-12)
+    assert np.allclose(data[TALLY][TALLY_SUM_SQ], sdev, rtol=1e-12)
+
+
+def test_bank_layout(monkeypatch):
+    """
+    Census and source bank operations must store and return the same particles
+    in both bank layouts.
+    """
+    MCDC.reset()
+
+    type_.make_type_particle_record(input_deck)
+    N = 5
+    records = np.zeros(N, type_.particle_record)
+    np.random.seed(24680)
+    for name in BANK_SOA_FIELDS:
+        records[name] = np.random.random(N) * 10.0
+
+    for soa in [False, True]:
+        monkeypatch.setattr(kernel, "BANK_SOA", soa)
+        bank_type = type_.particle_bank(2 * N, soa)
+        bank = np.zeros(1, bank_type)[0]
+        bank_copy = np.zeros(1, bank_type)[0]
+
+        for i in range(N):
+            add_bank_record(records[i : i + 1], bank)
+        assert get_bank_size(bank) == N
+
+        copy_bank(bank_copy, bank)
+        assert get_bank_size(bank_copy) == N
+
+        records_copy = get_bank_records(bank_copy, N)
+        P_rec_arr = np.zeros(1, type_.particle_record)
+        get_bank_record(P_rec_arr, bank, 3)
+        for name in BANK_SOA_FIELDS:
+            assert np.array_equal(records_copy[name], records[name])
+            assert P_rec_arr[0][name] == records[3][name]
+
+
+def test_sort_bank(monkeypatch):
+    """
+    Banks filled in different orders must be sorted into the same order, the
+    order of the particle seeds, in both bank layouts.
+    """
+    MCDC.reset()
+
+    type_.make_type_particle_record(input_deck)
+    N = 6
+    records = np.zeros(N, type_.particle_record)
+    np.random.seed(13579)
+    for name in BANK_SOA_FIELDS:
+        records[name] = np.random.random(N) * 10.0
+    records["rng_seed"] = np.random.randint(0, 2**62, N)
+
+    for soa in [False, True]:
+        monkeypatch.setattr(kernel, "BANK_SOA", soa)
+        bank_type = type_.particle_bank(N, soa)
+        sorted_records = []
+        for order in [np.arange(N), np.random.permutation(N)]:
+            bank = np.zeros(1, bank_type)[0]
+            for i in order:
+                add_bank_record(records[i : i + 1], bank)
+            sort_bank(bank)
+            sorted_records.append(get_bank_records(bank, N))
+
+        assert np.all(np.diff(sorted_records[0]["rng_seed"].astype(float)) > 0)
+        for name in BANK_SOA_FIELDS:
+            assert np.array_equal(sorted_records[0][name], sorted_records[1][name])
+
+
+def test_work_bounds_cost():
+    """
+    The cost-weighted work boundaries must split the work in proportion to the
+    rank speeds, give unmeasured ranks the mean cost, and fall back to the even
+    distribution without measured costs or source bank capacity.
+    """
+    N = 70
+    capacity = 100
+    even = [0, 24, 47, 70]
+
+    bounds = work_bounds_cost(N, np.array([1.0, 2.0, 4.0]), capacity)
+    assert list(bounds) == [0, 40, 60, 70]
+    bounds = work_bounds_cost(N, np.array([2.0, 0.0, 1.0]), capacity)
+    assert list(bounds) == [0, 16, 38, 70]
+    assert list(work_bounds_cost(N, np.zeros(3), capacity)) == even
+    assert list(work_bounds_cost(N, np.array([1.0, 2.0, 4.0]), 30)) == even
+
+
+def test_rebalance_counts():
+    """
+    The Alltoallv counts and displacements of all ranks must move each particle,
+    in the global order, from its current rank to its assigned rank.
+    """
+    N_current = [10, 0, 25, 5, 30]
+    current = np.concatenate([[0], np.cumsum(N_current)])
+    N = current[-1]
+    assigned = work_bounds_cost(N, np.array([1.0, 3.0, 0.0, 2.0, 1.0]), N)
+    size = len(N_current)
+
+    ranges = np.zeros(4 * size, np.int64)
+    for i in range(size):
+        ranges[4 * i : 4 * i + 4] = [
+            current[i],
+            current[i + 1],
+            assigned[i],
+            assigned[i + 1],
+        ]
+    counts = [rebalance_counts(ranges, i) for i in range(size)]
+
+    # Emulate the exchange with the global particle indices
+    for i in range(size):
+        send_counts, send_displs, recv_counts, recv_displs = counts[i]
+        assert np.sum(send_counts) == N_current[i]
+        buff = np.zeros(assigned[i + 1] - assigned[i], np.int64)
+        for j in range(size):
+            j_send_counts, j_send_displs = counts[j][:2]
+            assert recv_counts[j] == j_send_counts[i]
+            records = np.arange(current[j], current[j + 1])
+            start = j_send_displs[i]
+            buff[recv_displs[j] : recv_displs[j] + recv_counts[j]] = records[
+                start : start + j_send_counts[i]
+            ]
+        assert np.array_equal(buff, np.arange(assigned[i], assigned[i + 1]))
+
+
 # if __name__ == "__main__":
 #     test_AxV_linearity()
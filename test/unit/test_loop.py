@@ -0,0 +1,337 @@
+import h5py
+import numba as nb
+import numpy as np
+import pytest
+
+import mcdc
+import mcdc.kernel as kernel
+import mcdc.loop as loop
+from mcdc.constant import INF, TALLY, TALLY_SUM, TALLY_SUM_SQ, UNIVERSE_ROOT
+from mcdc.loop import loop_eigenvalue, loop_fixed_source
+from test_xslib import write_test_nuclide
+
+
+def run_slab(**setting):
+    mcdc.reset()
+    m = mcdc.material(
+        capture=np.array([0.5]),
+        scatter=np.array([[0.4]]),
+        fission=np.array([0.1]),
+        nu_p=np.array([2.0]),
+    )
+    s1 = mcdc.surface("plane-x", x=0.0, bc="vacuum")
+    s2 = mcdc.surface("plane-x", x=4.0, bc="reflective")
+    mcdc.cell(+s1 & -s2, m)
+    mcdc.source(x=[0.0, 1.0], isotropic=True)
+    mcdc.tally.mesh_tally(scores=["flux"], x=np.linspace(0.0, 4.0, 9))
+    mcdc.setting(N_particle=30, progress_bar=False, **setting)
+
+    data_arr, mcdc_arr = mcdc.prepare()
+    loop_fixed_source(data_arr, mcdc_arr)
+    return data_arr[0][TALLY]
+
+
+def test_loop_source_dynamic():
+    """
+    The dynamically distributed source loop must score as the static one.
+    """
+    tally_static = run_slab()
+    tally_dynamic = run_slab(work_chunk_size=7)
+    for row in [TALLY_SUM, TALLY_SUM_SQ]:
+        assert np.allclose(tally_dynamic[row], tally_static[row], rtol=1e-12)
+
+    # The history groups are closed at the chunk ends
+    tally_static = run_slab(history_group_size=4)
+    tally_dynamic = run_slab(work_chunk_size=8, history_group_size=4)
+    for row in [TALLY_SUM, TALLY_SUM_SQ]:
+        assert np.allclose(tally_dynamic[row], tally_static[row], rtol=1e-12)
+
+
+def test_loop_source_dynamic_switch():
+    """
+    The source distribution must follow the work_chunk_size of each prepared
+    run, not the one of the compiled loop.
+    """
+    for work_chunk_size in [10, 0, 10, 0]:
+        run_slab(work_chunk_size=work_chunk_size)
+        counter = np.zeros(1, np.int64)
+        if loop.work_window is not None:
+            loop.work_window.Lock(0)
+            loop.work_window.Get(counter, 0)
+            loop.work_window.Unlock(0)
+            loop.work_window.Lock(0)
+            loop.work_window.Put(np.zeros(1, np.int64), 0)
+            loop.work_window.Unlock(0)
+
+        # The counter ends past the source particles only if they were fetched
+        if work_chunk_size > 0:
+            assert counter[0] >= 30
+        else:
+            assert counter[0] == 0
+
+
+def run_pins(**setting):
+    mcdc.reset()
+    fuel = mcdc.material(
+        capture=np.array([0.3]),
+        scatter=np.array([[0.6]]),
+        fission=np.array([0.1]),
+        nu_p=np.array([2.0]),
+        speed=np.array([2.0]),
+    )
+    water = mcdc.material(
+        capture=np.array([0.1]), scatter=np.array([[1.5]]), speed=np.array([1.0])
+    )
+    reflector = mcdc.material(
+        capture=np.array([0.2]), scatter=np.array([[1.0]]), speed=np.array([1.0])
+    )
+    cy = mcdc.surface("cylinder-z", center=[0.0, 0.0], radius=0.4)
+    pin = mcdc.universe([mcdc.cell(-cy, fuel), mcdc.cell(+cy, water)])
+    hole = mcdc.universe([mcdc.cell(-cy, water), mcdc.cell(+cy, water)])
+    lattice = mcdc.lattice(
+        x=[0.0, 1.0, 3],
+        y=[0.0, 1.0, 3],
+        universes=[[pin, hole, pin], [hole, pin, hole], [pin, pin, hole]],
+    )
+    x0 = mcdc.surface("plane-x", x=0.0, bc="vacuum")
+    x1 = mcdc.surface("plane-x", x=3.0)
+    x2 = mcdc.surface("plane-x", x=4.0, bc="vacuum")
+    y0 = mcdc.surface("plane-y", y=0.0, bc="vacuum")
+    y1 = mcdc.surface("plane-y", y=1.5)
+    y2 = mcdc.surface("plane-y", y=3.0, bc="reflective")
+    sphere = mcdc.surface("sphere", center=[3.5, 2.2, 0.0], radius=0.3)
+    c1 = mcdc.cell(+x0 & -x1 & +y0 & -y2, lattice)
+    c2 = mcdc.cell(+x1 & -x2 & +y0 & -y1, water)
+    c3 = mcdc.cell(+x1 & -x2 & +y1 & -y2 & +sphere, reflector)
+    c4 = mcdc.cell(-sphere, fuel)
+    mcdc.universe([c1, c2, c3, c4], root=True)
+    mcdc.source(x=[0.5, 3.5], y=[0.5, 2.5], isotropic=True)
+    mcdc.tally.mesh_tally(
+        scores=["flux"],
+        x=np.linspace(0.0, 4.0, 5),
+        y=np.linspace(0.0, 3.0, 4),
+        t=np.array([0.0, 1.0, 2.0]),
+    )
+    mcdc.setting(N_particle=100, progress_bar=False, time_boundary=2.0, **setting)
+    mcdc.global_.input_deck.setting["census_time"] = np.array([1.0, INF])
+    mcdc.global_.input_deck.setting["N_census"] = 2
+
+    data_arr, mcdc_arr = mcdc.prepare()
+    loop_fixed_source(data_arr, mcdc_arr)
+    return data_arr[0][TALLY], mcdc_arr[0]
+
+
+def test_cell_neighbors():
+    """
+    Cell searches starting from the (learned or prepopulated) neighbor lists
+    must reproduce the tallies of the full cell searches.
+    """
+    tally_ref, _ = run_pins()
+    for prepopulate in [False, True]:
+        tally, mcdc_ = run_pins(
+            cell_neighbor_size=2, cell_neighbor_prepopulate=prepopulate
+        )
+        assert np.any(mcdc_["cell_neighbor_data"] > -1)
+        for row in [TALLY_SUM, TALLY_SUM_SQ]:
+            assert np.array_equal(tally[row], tally_ref[row])
+
+
+def test_universe_grid():
+    """
+    Cell searches over the universe grid bins must reproduce the tallies of the
+    full cell searches.
+    """
+    tally_ref, _ = run_pins()
+    tally, mcdc_ = run_pins(universe_grid_size=4)
+    assert np.array_equal(mcdc_["universes"][UNIVERSE_ROOT]["grid_N"], [4, 4, 4])
+    for row in [TALLY_SUM, TALLY_SUM_SQ]:
+        assert np.array_equal(tally[row], tally_ref[row])
+
+
+def test_surface_distance_cache(monkeypatch):
+    """
+    Cached boundary distances must reproduce the tallies of the recomputed
+    ones, with flights crossing lattice elements, universe cells, and root cells.
+    Scattering is made direction-preserving, so that the cache is reused.
+    """
+    monkeypatch.setattr(
+        kernel, "scatter_direction", lambda ux, uy, uz, mu0, azi: (ux, uy, uz)
+    )
+    tally_ref, _ = run_pins()
+    tally, _ = run_pins(surface_distance_cache=True)
+    for row in [TALLY_SUM, TALLY_SUM_SQ]:
+        assert np.allclose(tally[row], tally_ref[row], rtol=1e-12)
+
+
+@pytest.mark.skipif(
+    nb.config.NUMBA_NUM_THREADS < 2, reason="needs at least two numba threads"
+)
+def test_loop_source_threaded():
+    """
+    The threaded source loop must score as the serial one, also across the
+    time census (the census bank is sorted after the threaded loop).
+    """
+    tally_serial, _ = run_pins()
+    tally_threaded, _ = run_pins(N_thread=2)
+    for row in [TALLY_SUM, TALLY_SUM_SQ]:
+        assert np.allclose(tally_threaded[row], tally_serial[row], rtol=1e-12)
+
+
+def test_loop_source_event():
+    """
+    The event-based source loop must score as the history-based one with
+    history groups of the batch size, with fission secondaries, reflections,
+    lattice and universe cells, and the time census.
+    """
+    tally_history = run_slab(history_group_size=8)
+    tally_event = run_slab(event_batch_size=8)
+    for row in [TALLY_SUM, TALLY_SUM_SQ]:
+        assert np.allclose(tally_event[row], tally_history[row], rtol=1e-12)
+
+    # The crossings looking up the neighbor lists are done on particle copies
+    for cell_neighbor_size in [0, 2]:
+        tally_history, _ = run_pins(
+            history_group_size=16, cell_neighbor_size=cell_neighbor_size
+        )
+        tally_event, _ = run_pins(
+            event_batch_size=16, cell_neighbor_size=cell_neighbor_size
+        )
+        for row in [TALLY_SUM, TALLY_SUM_SQ]:
+            assert np.allclose(
+                tally_event[row], tally_history[row], rtol=1e-12, equal_nan=True
+            )
+
+
+def test_xs_cache(tmp_path, monkeypatch):
+    """
+    Macroscopic XS served from the particle cache must reproduce the tallies
+    of the uncached lookups, and save nuclide sums.
+    """
+    for name, NE_xs in [["light", 300], ["heavy", 700]]:
+        write_test_nuclide(tmp_path / (name + ".h5"), NE_xs, False)
+        with h5py.File(tmp_path / (name + ".h5"), "r+") as f:
+            del f["E_xs"]
+            f["E_xs"] = np.sort(10.0 ** np.random.uniform(-5.0, 7.5, NE_xs))
+    monkeypatch.setenv("MCDC_XSLIB", str(tmp_path))
+
+    # Count the nuclide sums
+    N_sum = [0]
+    get_MacroXS_CE = kernel.get_MacroXS_CE
+
+    def get_MacroXS_CE_counted(type_, material, P_arr, mcdc):
+        N_sum[0] += 1
+        return get_MacroXS_CE(type_, material, P_arr, mcdc)
+
+    monkeypatch.setattr(kernel, "get_MacroXS_CE", get_MacroXS_CE_counted)
+
+    tally = []
+    N_sums = []
+    for cached in [True, False]:
+        if not cached:
+            monkeypatch.setattr(kernel, "get_MacroXS_cached", get_MacroXS_CE_counted)
+        N_sum[0] = 0
+
+        mcdc.reset()
+        m1 = mcdc.material([["light", 1.0], ["heavy", 0.5]])
+        m2 = mcdc.material([["heavy", 2.0]])
+        s1 = mcdc.surface("plane-x", x=0.0, bc="vacuum")
+        s2 = mcdc.surface("plane-x", x=1.0)
+        s3 = mcdc.surface("plane-x", x=2.0, bc="vacuum")
+        mcdc.cell(+s1 & -s2, m1)
+        mcdc.cell(+s2 & -s3, m2)
+        mcdc.source(x=[0.4, 0.6], energy=np.array([[1e6, 2e6], [1.0, 1.0]]))
+        mcdc.tally.mesh_tally(scores=["flux"], x=np.linspace(0.0, 2.0, 5))
+        mcdc.setting(N_particle=50, progress_bar=False)
+
+        data_arr, mcdc_arr = mcdc.prepare()
+        loop_fixed_source(data_arr, mcdc_arr)
+        tally.append(data_arr[0][TALLY].copy())
+        N_sums.append(N_sum[0])
+
+    assert N_sums[0] < N_sums[1]
+    for row in [TALLY_SUM, TALLY_SUM_SQ]:
+        assert np.array_equal(tally[0][row], tally[1][row])
+
+
+def run_slab_lattice(delta_tracking):
+    mcdc.reset()
+    m1 = mcdc.material(
+        capture=np.array([0.2]), scatter=np.array([[0.6]]), speed=np.array([1.0])
+    )
+    m2 = mcdc.material(
+        capture=np.array([0.4]), scatter=np.array([[1.2]]), speed=np.array([1.0])
+    )
+    m3 = mcdc.material(
+        capture=np.array([0.1]), scatter=np.array([[0.4]]), speed=np.array([3.0])
+    )
+    s1 = mcdc.surface("plane-x", x=0.0, bc="vacuum")
+    s2 = mcdc.surface("plane-x", x=2.0)
+    s3 = mcdc.surface("plane-x", x=4.0, bc="vacuum")
+    u1 = mcdc.universe([mcdc.cell(fill=m1)])
+    u2 = mcdc.universe([mcdc.cell(fill=m2)])
+    lattice = mcdc.lattice(x=[0.0, 1.0, 2], y=[-1e10, 2e10, 1], universes=[[u1, u2]])
+    c1 = mcdc.cell(+s1 & -s2, lattice)
+    c2 = mcdc.cell(+s2 & -s3, m3)
+    mcdc.universe([c1, c2], root=True)
+    mcdc.source(x=[0.0, 2.0], isotropic=True)
+    mcdc.tally.mesh_tally(
+        scores=["flux"], x=np.linspace(0.0, 4.0, 5), t=np.array([0.0, 1.0, 2.0])
+    )
+    mcdc.setting(
+        N_particle=1000,
+        progress_bar=False,
+        time_boundary=4.0,
+        delta_tracking=delta_tracking,
+    )
+    mcdc.global_.input_deck.setting["census_time"] = np.array([2.0, INF])
+    mcdc.global_.input_deck.setting["N_census"] = 2
+
+    data_arr, mcdc_arr = mcdc.prepare()
+    loop_fixed_source(data_arr, mcdc_arr)
+    return data_arr[0][TALLY]
+
+
+def test_delta_tracking():
+    """
+    Delta tracking must give the ray-tracing tallies within statistics, with
+    the flights spanning the lattice materials and the root cells having
+    different MG speeds.
+    """
+    tally_ray = run_slab_lattice(False)
+    tally_delta = run_slab_lattice(True)
+    sdev = np.sqrt(tally_ray[TALLY_SUM_SQ] ** 2 + tally_delta[TALLY_SUM_SQ] ** 2)
+    assert np.all(sdev > 0.0)
+    assert np.all(np.abs(tally_delta[TALLY_SUM] - tally_ray[TALLY_SUM]) < 4.0 * sdev)
+
+
+def test_loop_eigenvalue_cost_weighted():
+    """
+    The cost-weighted bank rebalance must keep the whole source bank on a
+    single rank and give the results of the even one.
+    """
+    k_eff = []
+    for cost_weighted in [False, True]:
+        mcdc.reset()
+        m = mcdc.material(
+            capture=np.array([0.5]),
+            scatter=np.array([[0.4]]),
+            fission=np.array([0.3]),
+            nu_p=np.array([2.5]),
+        )
+        s1 = mcdc.surface("plane-x", x=0.0, bc="vacuum")
+        s2 = mcdc.surface("plane-x", x=4.0, bc="reflective")
+        mcdc.cell(+s1 & -s2, m)
+        mcdc.source(x=[0.0, 4.0], isotropic=True)
+        mcdc.setting(
+            N_particle=30,
+            progress_bar=False,
+            cost_weighted_rebalance=cost_weighted,
+        )
+        mcdc.eigenmode(N_inactive=1, N_active=2)
+
+        data_arr, mcdc_arr = mcdc.prepare()
+        loop_eigenvalue(data_arr, mcdc_arr)
+        assert mcdc_arr[0]["mpi_work_size"] == mcdc_arr[0]["mpi_work_size_total"]
+        assert mcdc_arr[0]["mpi_work_cost"] > 0.0
+        k_eff.append(mcdc_arr[0]["k_eff"])
+    assert k_eff[1] == k_eff[0]
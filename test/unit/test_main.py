@@ -0,0 +1,320 @@
+import h5py
+import numpy as np
+import pytest
+
+import mcdc
+from mcdc.algorithm import binary_search_with_length
+from mcdc.card import UniverseCard
+from mcdc.constant import BOOL_AND, BOOL_NOT, BOOL_OR, INF, REGION_TRUE
+from mcdc.kernel import (
+    get_nuclide_data,
+    get_nuclide_index,
+    get_union_index,
+    hash_search,
+)
+from mcdc.main import (
+    calculate_volumes,
+    cell_bounding_box,
+    check_geometry,
+    compile_region_program,
+    make_universe_grid,
+)
+from test_xslib import write_test_nuclide
+
+
+class TmpCell:
+    def __init__(self, RPN):
+        self._region_RPN = RPN
+        self._bbox = None
+
+
+def test_compile_region_program():
+    """
+    Region programs must decide the region as the full RPN evaluation does,
+    for all combinations of surface senses.
+    """
+    RPNs = [
+        [],
+        [0],
+        [0, BOOL_NOT],
+        [0, 1, BOOL_AND, 2, BOOL_NOT, BOOL_OR],
+        [0, 1, BOOL_OR, BOOL_NOT, 2, 3, BOOL_AND, BOOL_AND],
+        [0, BOOL_NOT, 1, BOOL_AND, BOOL_NOT, 2, BOOL_OR, 3, BOOL_NOT, BOOL_AND],
+    ]
+    for RPN in RPNs:
+        program = compile_region_program(RPN)
+        assert len(program) == 1 + 3 * sum([token >= 0 for token in RPN])
+
+        for senses in range(16):
+            sense = [bool(senses & (1 << i)) for i in range(4)]
+
+            # Full RPN evaluation
+            stack = []
+            for token in RPN:
+                if token >= 0:
+                    stack.append(sense[token])
+                elif token == BOOL_NOT:
+                    stack.append(not stack.pop())
+                elif token == BOOL_AND:
+                    stack.append(stack.pop() & stack.pop())
+                else:
+                    stack.append(stack.pop() | stack.pop())
+            expected = stack[0] if len(stack) > 0 else True
+
+            # Program evaluation
+            node = program[0]
+            while node >= 0:
+                surface_ID, target_true, target_false = program[
+                    1 + 3 * node : 4 + 3 * node
+                ]
+                node = target_true if sense[surface_ID] else target_false
+            assert (node == REGION_TRUE) == expected
+
+
+def test_compile_region_program_long():
+    """
+    Long AND/OR chains must compile without recursion, in prepare() as well.
+    """
+    N = 3000
+    RPN = [0]
+    for i in range(N):
+        RPN += [1 + i % 3, BOOL_NOT, BOOL_AND if i % 2 == 0 else BOOL_OR]
+    program = compile_region_program(RPN)
+    assert len(program) == 1 + 3 * (N + 1)
+
+    # The chain is decided by its last (outermost) operands
+    for sense in [[True, True, False, True], [False, False, True, False]]:
+        node = program[0]
+        while node >= 0:
+            surface_ID, target_true, target_false = program[1 + 3 * node : 4 + 3 * node]
+            node = target_true if sense[surface_ID] else target_false
+        expected = sense[0]
+        for i in range(N):
+            operand = not sense[1 + i % 3]
+            expected = (expected and operand) if i % 2 == 0 else (expected or operand)
+        assert (node == REGION_TRUE) == expected
+
+    mcdc.reset()
+    m = mcdc.material(capture=np.array([1.0]))
+    s1 = mcdc.surface("plane-x", x=0.0, bc="vacuum")
+    s2 = mcdc.surface("plane-x", x=1.0, bc="vacuum")
+    s3 = mcdc.surface("plane-y", y=0.0)
+    region = +s1 & -s2
+    for i in range(N):
+        region = region & (+s3 | -s3)
+    mcdc.cell(region, m)
+    mcdc.source(point=[0.5, 0.0, 0.0], isotropic=True)
+    mcdc.setting(N_particle=10)
+
+    _, mcdc_arr = mcdc.prepare()
+    material_IDs, _ = mcdc.locate_points([0.5, 2.0], 0.1, 0.0, mcdc_arr)
+    assert np.array_equal(material_IDs, [0, -1])
+
+
+def test_cell_bounding_box():
+    """
+    Cell bounding boxes must bound the region, with infinite bounds where the
+    region is unbounded.
+    """
+    mcdc.reset()
+    sphere = mcdc.surface("sphere", center=[1.0, 2.0, 3.0], radius=2.0)
+    cylinder = mcdc.surface("cylinder-z", center=[0.0, 0.0], radius=1.0)
+    plane = mcdc.surface("plane-x", x=1.5)
+    surfaces = mcdc.global_.input_deck.surfaces
+
+    # Inside the sphere and on the left of the plane
+    box = cell_bounding_box(
+        TmpCell([sphere.ID, BOOL_NOT, plane.ID, BOOL_NOT, BOOL_AND]), surfaces
+    )
+    assert np.allclose(box, [-1.0, 1.5, 0.0, 4.0, 1.0, 5.0])
+
+    # Inside the cylinder
+    box = cell_bounding_box(TmpCell([cylinder.ID, BOOL_NOT]), surfaces)
+    assert np.allclose(box, [-1.0, 1.0, -1.0, 1.0, -INF, INF])
+
+    # Outside of the sphere or the cylinder (complement of their intersection)
+    box = cell_bounding_box(
+        TmpCell([sphere.ID, BOOL_NOT, cylinder.ID, BOOL_NOT, BOOL_AND, BOOL_NOT]),
+        surfaces,
+    )
+    assert np.all(np.abs(box) == INF)
+
+    # Inside the sphere or the cylinder
+    box = cell_bounding_box(
+        TmpCell([sphere.ID, BOOL_NOT, cylinder.ID, BOOL_NOT, BOOL_OR]), surfaces
+    )
+    assert np.allclose(box, [-1.0, 3.0, -1.0, 4.0, -INF, INF])
+
+
+def test_make_universe_grid():
+    """
+    Grid bins must list the cells whose boxes overlap them, in universe order.
+    """
+    cells = [TmpCell([]) for _ in range(3)]
+    cells[0]._bbox = np.array([0.0, 1.0, 0.0, 1.0, -INF, INF])
+    cells[1]._bbox = np.array([1.0, 2.0, 0.0, 1.0, -INF, INF])
+    cells[2]._bbox = np.array([-INF, INF, -INF, INF, -INF, INF])
+    universe = UniverseCard(3)
+    universe.cell_IDs = np.array([2, 0, 1])
+
+    low, factor, N, offsets, cell_IDs = make_universe_grid(universe, cells, 4)
+    assert np.allclose(low, [0.0, 0.0, 0.0])
+    assert np.allclose(factor, [2.0, 4.0, 0.0])
+    assert np.array_equal(N, [4, 4, 1])
+
+    # Bin (ix=1, iy=2): cell 0 only besides the unbounded cell
+    idx = 1 * 4 + 2
+    assert np.array_equal(cell_IDs[offsets[idx] : offsets[idx + 1]], [2, 0])
+
+    # Bin (ix=2, iy=0): both boxes touch x = 1
+    idx = 2 * 4 + 0
+    assert np.array_equal(cell_IDs[offsets[idx] : offsets[idx + 1]], [2, 0, 1])
+
+
+def test_locate_points():
+    """
+    Points must be located in their material and root-universe cell, or be
+    marked as outside the model.
+    """
+    mcdc.reset()
+    m1 = mcdc.material(capture=np.array([1.0]))
+    m2 = mcdc.material(capture=np.array([2.0]))
+    s1 = mcdc.surface("plane-x", x=0.0, bc="vacuum")
+    s2 = mcdc.surface("plane-x", x=1.0)
+    s3 = mcdc.surface("plane-x", x=3.0, bc="vacuum")
+    sphere = mcdc.surface("sphere", center=[2.0, 0.0, 0.0], radius=0.5)
+    mcdc.cell(+s1 & -s2, m1)
+    mcdc.cell(+s2 & -s3 & +sphere, m2)
+    mcdc.cell(-sphere, m1)
+    mcdc.source(point=[0.5, 0.0, 0.0], isotropic=True)
+    mcdc.setting(N_particle=10)
+
+    x = np.array([[-1.0, 0.5, 1.2], [2.1, 2.9, 4.0]])
+    material_IDs, cell_IDs = mcdc.locate_points(x, 0.1, 0.0)
+    assert np.array_equal(material_IDs, [[-1, 0, 1], [0, 1, -1]])
+    assert np.array_equal(cell_IDs, [[-1, 0, 1], [2, 1, -1]])
+
+
+def test_calculate_volumes():
+    """
+    Volume estimates must be within their uncertainties of the exact volumes.
+    """
+    mcdc.reset()
+    m1 = mcdc.material(capture=np.array([1.0]))
+    m2 = mcdc.material(capture=np.array([2.0]))
+    s1 = mcdc.surface("plane-x", x=0.0, bc="vacuum")
+    s2 = mcdc.surface("plane-x", x=2.0, bc="vacuum")
+    sphere = mcdc.surface("sphere", center=[1.0, 0.0, 0.0], radius=0.5)
+    mcdc.cell(+s1 & -s2 & +sphere, m2)
+    mcdc.cell(-sphere, m1)
+    mcdc.source(point=[1.0, 0.0, 0.0], isotropic=True)
+    mcdc.setting(N_particle=10)
+    box = dict(x=[-1.0, 2.0], y=[-0.5, 0.5], z=[-0.5, 0.5])
+    mcdc.volume_calculation(**box, N_sample=3000)
+    mcdc.volume_calculation(**box, N_sample=3000, method="halton")
+
+    _, mcdc_arr = mcdc.prepare()
+    V_sphere = 4.0 / 3.0 * np.pi * 0.5**3
+    exact = np.array([V_sphere, 2.0 - V_sphere])
+    for result in calculate_volumes(mcdc_arr):
+        for name in ["material", "cell"]:
+            mean, sdev = result[name]
+            if name == "cell":
+                mean, sdev = mean[::-1], sdev[::-1]
+            assert np.all(np.abs(mean - exact) < 4.0 * sdev)
+        mean, sdev = result["outside"]
+        assert abs(mean - 1.0) < 4.0 * sdev
+
+        # The material and the cell bins both add up to the box with the outside
+        for name in ["material", "cell"]:
+            assert np.isclose(np.sum(result[name][0]) + mean, 3.0)
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_check_geometry(capsys, monkeypatch, parallel):
+    """
+    The geometry check must report overlapping cells and gaps inside the model,
+    but not the space outside the model, with the serial and parallel kernels.
+    """
+    if parallel:
+        monkeypatch.setattr(mcdc.main, "GEOMETRY_CHECK_PARALLEL_MIN", 0)
+    for case in ["overlap", "gap", "valid"]:
+        mcdc.reset()
+        m = mcdc.material(capture=np.array([1.0]))
+        s1 = mcdc.surface("plane-x", x=0.0)
+        s2 = mcdc.surface("plane-x", x=1.0)
+        s3 = mcdc.surface("plane-x", x=1.5)
+        sphere = mcdc.surface("sphere", center=[1.0, 0.0, 0.0], radius=2.0, bc="vacuum")
+        if case == "overlap":
+            mcdc.cell(-sphere & -s3, m)
+        else:
+            mcdc.cell(-sphere & -s1, m)
+        if case == "gap":
+            mcdc.cell(-sphere & +s2, m)
+        else:
+            mcdc.cell(-sphere & +s1, m)
+        mcdc.source(point=[1.0, 0.0, 0.0], isotropic=True)
+        mcdc.setting(N_particle=10, geometry_check=500)
+
+        _, mcdc_arr = mcdc.prepare()
+        capsys.readouterr()
+        check_geometry(mcdc_arr)
+        output = capsys.readouterr().out
+        assert ("multiple cells" in output) == (case == "overlap")
+        assert ("undefined regions" in output) == (case == "gap")
+
+
+def test_energy_hash(tmp_path, monkeypatch):
+    """
+    Searches bounded by the prepared energy and fission spectrum hash tables
+    must reproduce the full binary searches.
+    """
+    np.random.seed(123456)
+    for name, NE_xs in [["light", 300], ["heavy", 700]]:
+        write_test_nuclide(tmp_path / (name + ".h5"), NE_xs, True)
+        with h5py.File(tmp_path / (name + ".h5"), "r+") as f:
+            del f["E_xs"], f["E_chi_p"], f["chi_p"]
+            f["E_xs"] = np.sort(10.0 ** np.random.uniform(-5.0, 7.0, NE_xs))
+            f["E_chi_p"] = np.linspace(0.0, 2e7, NE_xs)
+            chi_p = np.cumsum(np.random.rand(NE_xs))
+            f["chi_p"] = (chi_p - chi_p[0]) / (chi_p[-1] - chi_p[0])
+    monkeypatch.setenv("MCDC_XSLIB", str(tmp_path))
+
+    mcdc.reset()
+    m = mcdc.material([["light", 1.0], ["heavy", 0.5]])
+    s1 = mcdc.surface("plane-x", x=0.0, bc="vacuum")
+    s2 = mcdc.surface("plane-x", x=1.0, bc="vacuum")
+    mcdc.cell(+s1 & -s2, m)
+    mcdc.source(x=[0.0, 1.0], energy=np.array([[1e6 - 1.0, 1e6 + 1.0], [1.0, 1.0]]))
+    mcdc.setting(N_particle=10, energy_hash_size=64, progress_bar=False)
+    data_arr, mcdc_arr = mcdc.prepare()
+    mcdc_ = mcdc_arr[0]
+
+    # Unionized energy grid
+    NE = mcdc_["NE_union"]
+    E_union = mcdc_["E_union"][:NE]
+    E_samples = np.concatenate(
+        [E_union[1:], 10.0 ** np.random.uniform(-5.0, 7.0, 1000), [1e-6, 1e8]]
+    )
+    for E in E_samples:
+        assert get_union_index(E, mcdc_) == binary_search_with_length(E, E_union, NE)
+
+    # Unionized grid index maps into the nuclide grids
+    for nuclide in mcdc_["nuclides"]:
+        NE_xs = nuclide["NE_xs"]
+        E_xs = get_nuclide_data(nuclide["E_xs_data_idx"], NE_xs, mcdc_)
+        for E in E_samples:
+            idx = get_nuclide_index(nuclide, get_union_index(E, mcdc_), mcdc_)
+            assert idx == binary_search_with_length(E, E_xs, NE_xs)
+
+    # Fission spectrum CDFs
+    for nuclide in mcdc_["nuclides"]:
+        for j, name in enumerate(
+            ["chi_p", "chi_d1", "chi_d2", "chi_d3", "chi_d4", "chi_d5", "chi_d6"]
+        ):
+            NE = nuclide["NE_" + name]
+            chi = get_nuclide_data(nuclide["ce_" + name + "_data_idx"], NE, mcdc_)
+            for xi in np.concatenate([chi[1:-1], np.random.rand(200)]):
+                k = min(int(xi * 64), 63)
+                idx = hash_search(xi, chi, NE, nuclide["chi_hash"][j], k)
+                assert idx == binary_search_with_length(xi, chi, NE)
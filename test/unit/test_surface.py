@@ -1,8 +1,20 @@
 import numpy as np
 
+import mcdc
 from mcdc import type_
-from mcdc.geometry import surface_evaluate
-from mcdc.constant import INF
+from mcdc.geometry import surface_distance, surface_evaluate, surface_normal
+from mcdc.constant import (
+    INF,
+    SURFACE_CYLINDER_X,
+    SURFACE_CYLINDER_Y,
+    SURFACE_CYLINDER_Z,
+    SURFACE_PLANE,
+    SURFACE_PLANE_X,
+    SURFACE_PLANE_Y,
+    SURFACE_PLANE_Z,
+    SURFACE_QUADRIC,
+    SURFACE_SPHERE,
+)
 
 
 # =============================================================================
@@ -32,3 +44,57 @@ def tmp_plane_x():
     P["x"] = 9.0
     result = surface_evaluate(P, S, trans)
     assert result > 0.0
+
+
+def test_surface_type_kernels():
+    """
+    Type-specialized surface kernels must reproduce the general quadric ones.
+    """
+    mcdc.reset()
+    cards = [
+        mcdc.surface("plane-x", x=0.3),
+        mcdc.surface("plane-y", y=-0.2),
+        mcdc.surface("plane-z", z=0.1),
+        mcdc.surface("cylinder-x", center=[0.1, -0.2], radius=0.7),
+        mcdc.surface("cylinder-y", center=[-0.3, 0.2], radius=0.6),
+        mcdc.surface("cylinder-z", center=[0.2, 0.1], radius=0.5),
+        mcdc.surface("sphere", center=[0.1, 0.2, -0.1], radius=0.8),
+    ]
+    types = [
+        SURFACE_PLANE_X,
+        SURFACE_PLANE_Y,
+        SURFACE_PLANE_Z,
+        SURFACE_CYLINDER_X,
+        SURFACE_CYLINDER_Y,
+        SURFACE_CYLINDER_Z,
+        SURFACE_SPHERE,
+    ]
+    input_deck = mcdc.global_.input_deck
+    type_.make_type_particle(input_deck)
+    type_.make_type_surface(input_deck)
+    surfaces = np.zeros(len(cards), dtype=type_.surface)
+    for card, surface in zip(cards, surfaces):
+        for name in ["A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "linear"]:
+            surface[name] = getattr(card, name)
+        surface["nx"], surface["ny"], surface["nz"] = card.nx, card.ny, card.nz
+
+    rng = np.random.default_rng(7)
+    P_arr = np.zeros(1, dtype=type_.particle)
+    P = P_arr[0]
+    for _ in range(100):
+        P["x"], P["y"], P["z"] = rng.uniform(-1.0, 1.0, 3)
+        u = rng.normal(size=3)
+        P["ux"], P["uy"], P["uz"] = u / np.linalg.norm(u)
+        for i, card in enumerate(cards):
+            results = []
+            general = SURFACE_PLANE if card.linear else SURFACE_QUADRIC
+            for type_ID in [types[i], general]:
+                surfaces[i]["type"] = type_ID
+                results.append(
+                    (
+                        surface_evaluate(P_arr, surfaces[i]),
+                        surface_distance(P_arr, surfaces[i], None),
+                        surface_normal(P_arr, surfaces[i]),
+                    )
+                )
+            assert results[0] == results[1]
@@ -0,0 +1,64 @@
+import h5py, os
+import numpy as np
+
+import mcdc.xslib as xslib
+
+
+def write_test_nuclide(file_name, NE_xs, fissionable):
+    np.random.seed(NE_xs)
+    with h5py.File(file_name, "w") as f:
+        f["A"] = float(NE_xs)
+        f["E_xs"] = np.sort(np.random.rand(NE_xs))
+        f["capture"] = np.random.rand(NE_xs)
+        f["scatter"] = np.random.rand(NE_xs)
+        f["fission"] = np.random.rand(NE_xs) * fissionable
+        f["E_nu_p"] = np.array([0.0, 2e7])
+        f["nu_p"] = np.array([2.4, 2.6])
+        f["E_nu_d"] = np.array([0.0, 1.0, 2e7])
+        f["nu_d"] = np.random.rand(6, 3)
+        f["E_chi_p"] = np.array([0.0, 1e5, 2e7])
+        f["chi_p"] = np.array([0.0, 0.3, 1.0])
+        for j in range(6):
+            f["E_chi_d%i" % (j + 1)] = np.array([0.0, 2e7])
+            f["chi_d%i" % (j + 1)] = np.array([0.0, 1.0])
+        f["decay_rate"] = np.random.rand(6)
+
+
+def test_compile_library(tmp_path, monkeypatch):
+    """
+    Loading from a compiled library must reproduce loading from the
+    per-nuclide files.
+    """
+    write_test_nuclide(tmp_path / "light.h5", 5, False)
+    write_test_nuclide(tmp_path / "heavy.h5", 40, True)
+    names = ["heavy", "light"]
+
+    # Load from the per-nuclide files
+    monkeypatch.setenv("MCDC_XSLIB", str(tmp_path))
+    sizes = xslib.nuclide_sizes(names)
+    N_data = sum([xslib.block_size(size) for size in sizes])
+    data_dir = np.zeros(N_data)
+    result_dir = xslib.load_nuclides(names, data_dir)
+    fissionable_dir = [xslib.nuclide_fissionable(name) for name in names]
+
+    # Load from the compiled library (nuclides stored in a different order)
+    library = str(tmp_path / "library.h5")
+    xslib.compile_library(library, ["light", "heavy"])
+    monkeypatch.setenv("MCDC_XSLIB", library)
+    assert xslib.nuclide_sizes(names) == sizes
+    data_lib = np.zeros(N_data)
+    result_lib = xslib.load_nuclides(names, data_lib)
+    fissionable_lib = [xslib.nuclide_fissionable(name) for name in names]
+
+    assert np.array_equal(data_dir, data_lib)
+    assert fissionable_dir == fissionable_lib == [True, False]
+    for (sizes_dir, A_dir, decay_dir), (sizes_lib, A_lib, decay_lib) in zip(
+        result_dir, result_lib
+    ):
+        assert sizes_dir == sizes_lib
+        assert A_dir == A_lib
+        assert np.array_equal(decay_dir, decay_lib)
+
+    # The XS energy grid leads each data block
+    E_grids = xslib.nuclide_energy_grids(names)
+    assert np.array_equal(E_grids[0], data_lib[: sizes[0]["NE_xs"]])